@@ -0,0 +1,325 @@
+"""Non-interactive benchmark of the Lab 1 simulator's execution modes.
+
+Runs the static, threaded, process-pool and asyncio modes over generated maps and rover
+counts. Commands come from `DiggingCommandSource` behind a simulated latency instead of
+the live API, and every run reports the time spent in the load, fetch, simulate, mine and
+write phases as JSON so scaling curves can be compared across changes.
+
+Every mode does the same work: each rover gets its own fresh copy of the map, so no mode
+sees mines another rover already cleared, and the pin cache starts empty on every run.
+Next to the times, a run reports the moves made, the mines dug and the pins brute forced.
+
+Phase times are summed over all rovers, so in the concurrent modes they can add up to
+more than the wall-clock time. `simulate` excludes the time spent mining. The rovers'
+console output is discarded while the benchmark runs.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent import futures
+
+import common_path     #commands and pins are shared with the other labs
+from common.commands import CommandSource, LatencyModel, SimulatedLatencySource, SyntheticCommandSource
+from common.pins import pin_cache
+from models import Map, Rover
+
+
+PHASES = ("load", "fetch", "simulate", "mine", "write")
+WORK = ("moves", "mines_dug", "pins_solved")
+MODES = ("static", "threaded", "process", "async")
+
+
+#============================================
+# Workload generation
+#============================================
+
+def generate_map(directory: str, size: int, mine_density: float, num_serials: int = 100, seed: int = 0) -> tuple[str, str]:
+    """Writes a random `size` x `size` map and a mines file into `directory`.
+
+    Returns:
+        (tuple[str, str]) : The map file path and the mines file path
+    """
+
+    rng = random.Random(seed)
+    map_path = os.path.join(directory, f"map_{size}.txt")
+    mine_path = os.path.join(directory, f"mines_{size}.txt")
+
+    with open(map_path, "w") as map_f:
+        map_f.write(f"{size} {size}\n")
+        for row in range(size):
+            #Keep the start cell clear so rovers don't die before the first command
+            cells = ["0" if row == 0 and col == 0 else ("1" if rng.random() < mine_density else "0") for col in range(size)]
+            map_f.write(" ".join(cells) + "\n")
+
+    with open(mine_path, "w") as mine_f:
+        alphabet = "abcdefghijklmnopqrstuvwxyz0123456789"
+        mine_f.write("\n".join("".join(rng.choice(alphabet) for _ in range(10)) for _ in range(num_serials)))
+
+    return map_path, mine_path
+
+
+class DiggingCommandSource(SyntheticCommandSource):
+    """Synthetic commands that dig after every move, so rovers clear the mines they reach instead of dying on them.
+    A dig on an empty cell is skipped by the rover."""
+
+    def get_commands(self, rover_id: int) -> str:
+        return super().get_commands(rover_id).replace("M", "MD")[:self.length]
+
+
+def make_source(latency: float, moves_length: int) -> CommandSource:
+    """Stands in for the rover API: deterministic command strings behind a fixed latency"""
+    return SimulatedLatencySource(DiggingCommandSource(length=moves_length), LatencyModel(mean=latency))
+
+
+class TimedRover(Rover):
+    """Rover that keeps track of the time it spends mining and of the commands it carries out"""
+
+    def __init__(self, *args, pin_prefix: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pin_prefix = pin_prefix
+        self.mine_time = 0.0
+        self.moves_made = 0
+        self.mines_dug = 0
+
+    def move(self, command: str) -> bool:
+        self.moves_made += 1
+        return super().move(command)
+
+    def mine(self, serial: str) -> bool:
+        start_time = time.perf_counter()
+        try:
+            dug = super().mine(serial)
+        finally:
+            self.mine_time += time.perf_counter() - start_time
+        if dug:
+            self.mines_dug += 1
+        return dug
+
+
+#============================================
+# One rover, shared by every mode
+#============================================
+
+def simulate_rover(map_files: tuple[str, str], rover_id: int, moves: str, out_dir: str, pin_prefix: str) -> dict:
+    """Runs one rover whose commands are already fetched on a fresh copy of the map, writes its path
+    and returns its phase times and the work it did"""
+
+    start_time = time.perf_counter()
+    grid = Map(*map_files)
+    load_time = time.perf_counter() - start_time
+
+    rover = TimedRover(rover_id, moves, grid.cells[0][0], grid.num_cols, grid.num_rows, pin_prefix=pin_prefix)
+
+    solved_before = pin_cache.misses
+    start_time = time.perf_counter()
+    rover.run()
+    run_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    with open(os.path.join(out_dir, f"path_{rover.id}.txt"), "w") as output:
+        output.write(rover.getPathArrayString())
+    write_time = time.perf_counter() - start_time
+
+    return {
+        "load": load_time,
+        "simulate": run_time - rover.mine_time,
+        "mine": rover.mine_time,
+        "write": write_time,
+        "moves": rover.moves_made,
+        "mines_dug": rover.mines_dug,
+        #Only exact when the rover has the process to itself. The in-process modes count the whole run instead
+        "pins_solved": pin_cache.misses - solved_before,
+    }
+
+
+def fetch_and_simulate(map_files: tuple[str, str], source: CommandSource, rover_id: int, out_dir: str, pin_prefix: str) -> dict:
+    start_time = time.perf_counter()
+    moves = source.get_commands(rover_id)
+    fetch_time = time.perf_counter() - start_time
+
+    result = simulate_rover(map_files, rover_id, moves, out_dir, pin_prefix)
+    result["fetch"] = fetch_time
+    return result
+
+
+#============================================
+# Execution modes
+#============================================
+
+def run_static(map_files, source, rover_ids, out_dir, pin_prefix, workers) -> list[dict]:
+    """Fetch every rover first, then run them one after another, like `static_main`"""
+
+    fetched = {}
+    fetch_times = {}
+    for rover_id in rover_ids:
+        start_time = time.perf_counter()
+        fetched[rover_id] = source.get_commands(rover_id)
+        fetch_times[rover_id] = time.perf_counter() - start_time
+
+    results = []
+    for rover_id in rover_ids:
+        result = simulate_rover(map_files, rover_id, fetched[rover_id], out_dir, pin_prefix)
+        result["fetch"] = fetch_times[rover_id]
+        results.append(result)
+    return results
+
+
+def run_threaded(map_files, source, rover_ids, out_dir, pin_prefix, workers) -> list[dict]:
+    """One thread per rover that fetches, runs and writes, like `dynamic_main`"""
+
+    results = []
+    lock = threading.Lock()
+
+    def rover_thread(rover_id: int):
+        result = fetch_and_simulate(map_files, source, rover_id, out_dir, pin_prefix)
+        with lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=rover_thread, args=(rover_id,)) for rover_id in rover_ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+_worker_source: CommandSource = None
+
+def _init_worker(latency: float, moves_length: int):
+    global _worker_source
+    #Sources hold locks, so each worker builds its own instead of receiving the parent's
+    _worker_source = make_source(latency, moves_length)
+    sys.stdout = open(os.devnull, "w")
+
+
+def _process_task(map_files, rover_id, out_dir, pin_prefix) -> dict:
+    return fetch_and_simulate(map_files, _worker_source, rover_id, out_dir, pin_prefix)
+
+
+def run_process(map_files, source, rover_ids, out_dir, pin_prefix, workers, latency=0.0, moves_length=500) -> list[dict]:
+    """Rovers spread over a process pool so mining is not serialized by the GIL.
+    Every worker starts with an empty pin cache of its own"""
+
+    with futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(latency, moves_length)) as pool:
+        tasks = [pool.submit(_process_task, map_files, rover_id, out_dir, pin_prefix) for rover_id in rover_ids]
+        return [task.result() for task in tasks]
+
+
+def run_async(map_files, source, rover_ids, out_dir, pin_prefix, workers) -> list[dict]:
+    """Fetch everything concurrently and start each rover as soon as its commands arrive, like `async_main`"""
+
+    async def fetch_one(rover_id: int) -> tuple[int, str, float]:
+        start_time = time.perf_counter()
+        moves = await source.aget_commands(rover_id)
+        return rover_id, moves, time.perf_counter() - start_time
+
+    async def main() -> list[dict]:
+        runners = []
+        for next_done in asyncio.as_completed([fetch_one(rover_id) for rover_id in rover_ids]):
+            rover_id, moves, fetch_time = await next_done
+            runners.append((fetch_time, asyncio.create_task(
+                asyncio.to_thread(simulate_rover, map_files, rover_id, moves, out_dir, pin_prefix))))
+
+        results = []
+        for fetch_time, runner in runners:
+            result = await runner
+            result["fetch"] = fetch_time
+            results.append(result)
+        return results
+
+    return asyncio.run(main())
+
+
+RUNNERS = {
+    "static": run_static,
+    "threaded": run_threaded,
+    "process": run_process,
+    "async": run_async,
+}
+
+
+def benchmark(mode: str, size: int, num_rovers: int, args: argparse.Namespace, work_dir: str) -> dict:
+    """Runs one mode on one workload and returns its timings"""
+
+    map_path, mine_path = generate_map(work_dir, size, args.mine_density, seed=args.seed)
+    out_dir = tempfile.mkdtemp(dir=work_dir, prefix=f"out_{mode}_{size}_{num_rovers}_")
+    source = make_source(args.fetch_latency, args.moves)
+    rover_ids = list(range(1, num_rovers + 1))
+
+    extra = {"latency": args.fetch_latency, "moves_length": args.moves} if mode == "process" else {}
+
+    #Every run starts with no solved pins, so a mode can't reuse the brute forces of the one before it
+    pin_cache.clear()
+
+    start_time = time.perf_counter()
+    results = RUNNERS[mode]((map_path, mine_path), source, rover_ids, out_dir, args.pin_prefix, args.workers, **extra)
+    wall_time = time.perf_counter() - start_time
+
+    work = {key: sum(result[key] for result in results) for key in WORK}
+    if mode != "process":
+        #The rovers shared this process's cache, so its miss count is the number of brute forces
+        work["pins_solved"] = pin_cache.misses
+
+    return {
+        "mode": mode,
+        "map_size": size,
+        "rovers": num_rovers,
+        "wall_s": round(wall_time, 6),
+        "phases_s": {phase: round(sum(result[phase] for result in results), 6) for phase in PHASES},
+        "work": work,
+    }
+
+
+def parse_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",")]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the Lab 1 simulator execution modes")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma separated subset of {', '.join(MODES)}")
+    parser.add_argument("--sizes", type=parse_list, default=[12, 48], help="Comma separated map sizes (square maps)")
+    parser.add_argument("--rovers", type=parse_list, default=[10, 50], help="Comma separated rover counts")
+    parser.add_argument("--moves", type=int, default=500, help="Length of each rover's command string")
+    parser.add_argument("--mine-density", type=float, default=0.1, help="Fraction of cells holding a mine")
+    parser.add_argument("--fetch-latency", type=float, default=0.05, help="Simulated command fetch latency in seconds")
+    parser.add_argument("--pin-prefix", default="0000", help="Required hash prefix when mining. The labs use 000000")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Process pool size")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per mode and workload")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated maps")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    modes = args.modes.split(",")
+    for mode in modes:
+        if mode not in RUNNERS:
+            parser.error(f"Unknown mode {mode}")
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix="rover_bench_") as work_dir, open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for size in args.sizes:
+            for num_rovers in args.rovers:
+                for mode in modes:
+                    for _ in range(args.repeat):
+                        report["results"].append(benchmark(mode, size, num_rovers, args, work_dir))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -1,12 +1,18 @@
 from models import *
-import requests
+import asyncio
 import time
 from threading import Thread
+import common_path     #fetch, commands and output are shared with the other labs
+from common import fetch
+from common import commands
+from common.output import PathSink
 
 map_path = "./res/map.txt"
 mine_path = "./res/mines.txt"
 num_rovers = 10
+max_concurrency = 10
 baseURL = "https://coe892.reev.dev/lab1/rover/"
+archive_path = None     #set to e.g. "./out/paths.bin" to write every path into one archive instead of path_{id}.txt files
 
 
 def init_rovers(map_width: int, map_height: int):
@@ -15,11 +21,11 @@ def init_rovers(map_width: int, map_height: int):
     
     #Grab the rover data
     for rover_id in range(1, num_rovers+1):
-        endpoint = f"{baseURL}/{rover_id}"
-        response = requests.get(endpoint).json()
-
-        #Parse the json response body
-        moves = response["data"]["moves"]
+        try:
+            moves = command_source.get_commands(rover_id)
+        except fetch.FetchError as e:
+            print(f"[ROVER {rover_id}]: {e}. Skipping rover.")
+            continue
 
         #Initialize rover object
         rover = Rover(rover_id, moves, grid.cells[0][0], map_width, map_height)
@@ -41,19 +47,17 @@ def static_main():
         rover.run()
         print(f"[ROVER {rover.id}]: finished.")
         
-        output = open(f"./out/path_{rover.id}.txt", "w")
-        output.write(rover.getPathArrayString())
-        output.close()
+        path_sink.write(rover.id, rover.getPathArrayString())
       
         
 def roverThread(rover_id: int):
     """Thread function for each rover when threading option is selected"""
     
-    endpoint = f"{baseURL}/{rover_id}"
-    response = requests.get(endpoint).json()
-
-    #Parse the json response body
-    moves = response["data"]["moves"]
+    try:
+        moves = command_source.get_commands(rover_id)
+    except fetch.FetchError as e:
+        print(f"[ROVER {rover_id}]: {e}. Rover not started.")
+        return
 
     #Initialize rover object
     rover = Rover(rover_id, moves, grid.cells[0][0], grid.num_cols, grid.num_rows)
@@ -62,9 +66,7 @@ def roverThread(rover_id: int):
     rover.run()
     print(f"[ROVER {rover.id}]: finished.")
     
-    output = open(f"./out/path_{rover.id}.txt", "w")
-    output.write(rover.getPathArrayString())
-    output.close()
+    path_sink.write(rover.id, rover.getPathArrayString())
    
     
 def dynamic_main():
@@ -78,24 +80,65 @@ def dynamic_main():
         
     for t in threads:
         t.join()
+        
+        
+def runRover(rover: Rover):
+    """Runs a rover whose commands are already fetched and writes its path to file"""
+    
+    print(f"[ROVER {rover.id}]: starting...")
+    rover.run()
+    print(f"[ROVER {rover.id}]: finished.")
+    
+    path_sink.write(rover.id, rover.getPathArrayString())
+        
+        
+async def async_main():
+    """Asyncio version of the program. Fetches all commands concurrently over one
+    connection pool and starts each rover as soon as its commands arrive."""
+    
+    runners = []
+    try:
+        async for rover_id, moves in commands.iter_commands(command_source, range(1, num_rovers+1)):
+            rover = Rover(rover_id, moves, grid.cells[0][0], grid.num_cols, grid.num_rows)
+            
+            #Simulate off the event loop so the remaining responses keep being received
+            runners.append(asyncio.create_task(asyncio.to_thread(runRover, rover)))
+            
+        await asyncio.gather(*runners)
+    finally:
+        await command_source.aclose()
  
    
 if __name__ == "__main__":
     
-    option = input("Enter 1 for non-threaded version, 2 for threaded version: ")
+    option = input("Enter 1 for non-threaded version, 2 for threaded version, 3 for asyncio version: ")
     
     start_time = time.time()
     #Initialize the map grid and rover objects
     grid = Map(map_path, mine_path)
     print("Map initialized")
     
+    #The rover API by default. Set ROVER_COMMAND_SOURCE to use a recorded fixture or synthetic commands instead
+    command_source = commands.source_from_env(baseURL, max_concurrency=max_concurrency)
+    
+    #Paths are written by a background thread, off the rovers' threads
+    path_sink = PathSink("./out", archive_path)
+    
     if option == "1":
         static_main()
     elif option == "2":
         dynamic_main()
+    elif option == "3":
+        asyncio.run(async_main())
     else:
         print("Invalid option. Aborting")
         exit(1)
+        
+    command_source.close()
+    path_sink.close()
+    
+    if command_source.stats is not None:
+        print(f"\nFetch stats: {command_source.stats}")
     
     end_time = time.time()
     exec_time = end_time - start_time
@@ -1,6 +1,8 @@
 import time
 import random
 from hashlib import sha256
+import common_path     #pins is shared with the other labs
+from common.pins import solve_pin
 
 """All the data models for the Rover application"""
     
@@ -83,6 +85,8 @@ class Map():
 class Rover():
     """A class representing the Rover object"""
     
+    pin_prefix: str = "000000"      #a pin is valid when the hash of pin+serial starts with this
+    
     def __init__(self, id: int, commands: str, start_cell: Cell, map_width: int, map_height: int):
         self.id: int = id
         self.commands: list = list(commands)
@@ -172,21 +176,15 @@ class Rover():
            (bool) : True if the mine was successfully mined, False otherwise
         """
         
-        pin = 0
-        while True:
-            hash_val = self.hashKey(str(pin), serial)
-            
-            if hash_val.startswith("000000"):
-                
-                #Clear the current cell
-                self.position.value = "EMPTY"
-                
-                print(f"[MINE {serial}]: Dig Success. Pin: {pin}. Full hash: {hash_val}")
-                return True
-            
-            pin += 1
-            
-        return False
+        #Rovers digging mines with the same serial share one brute force
+        pin = solve_pin(serial, self.pin_prefix)
+        hash_val = self.hashKey(str(pin), serial)
+        
+        #Clear the current cell
+        self.position.value = "EMPTY"
+        
+        print(f"[MINE {serial}]: Dig Success. Pin: {pin}. Full hash: {hash_val}")
+        return True
                     
     def __repr__(self) -> str:
         return f"[ROVER {self.id}]: Position: ({self.position.x_coord}, {self.position.y_coord}), Orientation: {self.orientation}"
@@ -0,0 +1,120 @@
+"""GetMap latency under concurrent load, with the response rebuilt per request vs served pre-serialized.
+
+Both variants run the thread-pool server in this process on generated square maps. Each
+simulated rover opens its own channel and calls GetMap repeatedly, all rovers at once. The
+clients share the process with the server, so absolute numbers are pessimistic.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent import futures
+
+import grpc
+
+import server
+from rpc import ground_control_pb2 as gc_pb2
+from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+from src.ground_control import GroundControl
+from common.map_cache import add_servicer_to_server, build_map_response
+from src.models import ServerMap
+
+
+class RebuildMapService(server.GroundControlService):
+    """GetMap as it was before the response cache: converted and serialized on every request"""
+
+    def GetMap(self, request, context):
+        print("\nMap requested")
+        return build_map_response(server.ground_control.map)
+
+
+def generate_map(directory: str, size: int, mine_density: float = 0.1, seed: int = 0) -> str:
+    """Writes a random `size` x `size` map file and returns its path"""
+
+    rng = random.Random(seed)
+    map_path = os.path.join(directory, f"map_{size}.txt")
+    with open(map_path, "w") as map_f:
+        map_f.write(f"{size} {size}\n")
+        for _ in range(size):
+            map_f.write(" ".join("1" if rng.random() < mine_density else "0" for _ in range(size)) + "\n")
+    return map_path
+
+
+def start_server(cached: bool) -> tuple[grpc.Server, int]:
+    grpc_server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    if cached:
+        add_servicer_to_server(server.GroundControlService(), grpc_server)
+    else:
+        gc_pb2_grpc.add_GroundControlServicer_to_server(RebuildMapService(), grpc_server)
+    port = grpc_server.add_insecure_port("127.0.0.1:0")
+    grpc_server.start()
+    return grpc_server, port
+
+
+async def run_rovers(port: int, rovers: int, calls: int) -> dict:
+    """Every rover calls GetMap `calls` times over its own channel, all rovers concurrently"""
+
+    latencies: list[float] = []
+
+    async def rover():
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = gc_pb2_grpc.GroundControlStub(channel)
+            await channel.channel_ready()
+            for _ in range(calls):
+                start_time = time.perf_counter()
+                await stub.GetMap(gc_pb2.MapRequest())
+                latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(rover() for _ in range(rovers)))
+    wall_time = time.perf_counter() - start_time
+
+    latencies.sort()
+    percentile = lambda pct: latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))] * 1000
+    return {
+        "calls_per_s": len(latencies) / wall_time,
+        "p50_ms": percentile(50),
+        "p99_ms": percentile(99),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+def parse_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",")]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=parse_list, default=[12, 100, 250], help="Comma separated map sizes (square maps)")
+    parser.add_argument("--rovers", type=parse_list, default=[10, 50], help="Comma separated numbers of concurrent rovers")
+    parser.add_argument("--calls", type=int, default=20, help="GetMap calls per rover")
+    args = parser.parse_args()
+
+    print(f"{'size':>5} {'rovers':>6}  {'variant':<10} {'calls/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+
+    with tempfile.TemporaryDirectory(prefix="map_bench_") as work_dir:
+        for size in args.sizes:
+            #GetMap records nothing, so the server needs no ledger
+            map = ServerMap(generate_map(work_dir, size), server.mine_file_path)
+            server.ground_control = GroundControl(map, ledger=None)
+
+            #Both variants must send the same map
+            assert gc_pb2.MapResponse.FromString(server.ground_control.map_cache.get()) == build_map_response(map)
+
+            for rovers in args.rovers:
+                for variant, cached in (("rebuild", False), ("cached", True)):
+                    grpc_server, port = start_server(cached)
+                    try:
+                        #Discard the server's per-request output
+                        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                            result = asyncio.run(run_rovers(port, rovers, args.calls))
+                    finally:
+                        grpc_server.stop(None)
+
+                    print(f"{size:>5} {rovers:>6}  {variant:<10} {result['calls_per_s']:9.1f} "
+                          f"{result['p50_ms']:9.2f} {result['p99_ms']:9.2f}")
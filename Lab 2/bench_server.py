@@ -0,0 +1,135 @@
+"""Compares the thread-pool GroundControl server (`server.py`) with the grpc.aio server (`aio_server.py`).
+
+Each server runs in its own process. Every simulated rover asks for its commands at the same
+time, and none of them are cached, so each call waits on the upstream delay. The thread-pool
+server can only hold ten of those calls at once.
+
+By default the upstream is the synthetic command source behind a simulated delay, so only the
+servers are measured. `--http` goes through the local stub rover API and the HTTP clients
+instead, which shares the CPU with the stub.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import grpc
+
+from rpc import ground_control_pb2 as gc_pb2
+from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+import common_path     #stub_server is shared with the other labs
+from common.stub_server import StubServer
+
+SERVERS = {
+    "thread-pool": "server.py",
+    "asyncio": "aio_server.py",
+}
+TARGET = "localhost:5001"
+
+
+def start_server(script: str, upstream_env: dict[str, str], ledger_path: str) -> subprocess.Popen:
+    """Starts a server script and waits until it accepts calls. Its reports go to `ledger_path`,
+    so benchmark traffic never lands in the real ledger."""
+
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("ROVER_COMMAND_", "ROVER_SOURCE_"))}
+    env.update(upstream_env)
+    env["GROUND_CONTROL_LEDGER"] = ledger_path
+    process = subprocess.Popen([sys.executable, script], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    with grpc.insecure_channel(TARGET) as channel:
+        try:
+            grpc.channel_ready_future(channel).result(timeout=60)
+        except grpc.FutureTimeoutError:
+            process.kill()
+            raise RuntimeError(f"{script} did not start")
+    return process
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def run_rovers(rover_ids: list[int], concurrency: int, timeout: float) -> dict:
+    """Every rover calls GetCommands once, with at most `concurrency` calls in flight"""
+
+    latencies: list[float] = []
+    errors = 0
+    limiter = asyncio.Semaphore(concurrency)
+
+    async with grpc.aio.insecure_channel(TARGET) as channel:
+        stub = gc_pb2_grpc.GroundControlStub(channel)
+
+        async def call(rover_id: int):
+            nonlocal errors
+            async with limiter:
+                start_time = time.perf_counter()
+                try:
+                    await stub.GetCommands(gc_pb2.CommandRequest(rover_id=rover_id), timeout=timeout)
+                except grpc.aio.AioRpcError:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*(call(rover_id) for rover_id in rover_ids))
+        wall_time = time.perf_counter() - start_time
+
+    latencies.sort()
+    percentile = lambda pct: latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))] * 1000 if latencies else float("nan")
+    return {
+        "wall_s": wall_time,
+        "calls_per_s": len(latencies) / wall_time,
+        "errors": errors,
+        "p50_ms": percentile(50),
+        "p99_ms": percentile(99),
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rovers", type=int, default=2000, help="Number of simulated rovers")
+    parser.add_argument("--concurrency", type=int, default=1000, help="Most GetCommands calls in flight at once")
+    parser.add_argument("--delay", type=float, default=0.1, help="Upstream delay per request in seconds")
+    parser.add_argument("--http", action="store_true", help="Fetch upstream over HTTP from the local stub rover API")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Deadline of each GetCommands call in seconds")
+    parser.add_argument("--servers", default=",".join(SERVERS), help=f"Comma separated subset of {', '.join(SERVERS)}")
+    args = parser.parse_args()
+
+    if args.http:
+        upstream = StubServer(port=0, delay=args.delay)
+        upstream.start_background()
+        upstream_env = {"ROVER_API_URL": upstream.base_url, "ROVER_COMMAND_SOURCE": "http"}
+    else:
+        upstream = None
+        upstream_env = {"ROVER_COMMAND_SOURCE": "synthetic", "ROVER_SOURCE_LATENCY": str(args.delay * 1000)}
+
+    print(f"Rovers: {args.rovers}, in flight: {args.concurrency}, upstream delay: {args.delay}s "
+          f"({'stub HTTP API' if args.http else 'simulated'})\n")
+
+    #Rover ids past the prefetched 1-10, so every call goes upstream
+    rover_ids = list(range(1000, 1000 + args.rovers))
+
+    for name in args.servers.split(","):
+        with tempfile.TemporaryDirectory(prefix="bench_server_") as ledger_dir:
+            process = start_server(SERVERS[name], upstream_env, os.path.join(ledger_dir, "ledger.bin"))
+            try:
+                result = asyncio.run(run_rovers(rover_ids, args.concurrency, args.timeout))
+            finally:
+                stop_server(process)
+
+        print(f"{name:<12} {result['wall_s']:7.3f}s  {result['calls_per_s']:8.1f} calls/s  "
+              f"p50 {result['p50_ms']:8.1f}ms  p99 {result['p99_ms']:8.1f}ms  errors {result['errors']}")
+
+    if upstream is not None:
+        upstream.shutdown()
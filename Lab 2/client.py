@@ -1,18 +1,55 @@
+import atexit
 import grpc
+import os
+from concurrent import futures
 from rpc import ground_control_pb2 as gc_pb2
 from rpc import ground_control_pb2_grpc as gc_pb2_grpc
 
 from src.models import logger, Map, Rover
+from src.pins import SharedPins
+from src.reports import ReportQueue
+from common.map_store import load_map, save_map
+from common.output import PathSink
 
 #============================================
 # Constants
 #============================================
 HOST = "localhost"
 PORT = 5001
+REPLICA_PORTS = None    #e.g. range(5001, 5005) to spread clients over the servers started by replicas.py
+ARCHIVE_PATH = None     #set to e.g. "./out/paths.bin" to write paths into one archive instead of path_{id}.txt files
+MAP_CACHE_PATH = "./cache/map.pickle"   #decoded map from the last launch. None disables the cache
+PIPELINE_MINING = True  #solve the pins of upcoming mines in a process pool while the rover drives
+PIN_WORKERS = None      #pin pool size. None = one per CPU
+BATCH_REPORTS = True    #send pins, telemetry and the final status in batches from a background queue
+
+
+def open_channel(key: int = None) -> grpc.Channel:
+    """Opens the channel to ground control. With REPLICA_PORTS set, it connects to one replica,
+    picked by `key` (e.g. the rover id) or else by the process id.
+    
+    Replicas don't share the mines cleared on them or their map versions, so every call of a
+    client, and of every rover sharing its map, has to go to the same replica."""
+    
+    if not REPLICA_PORTS:
+        return grpc.insecure_channel(f"{HOST}:{PORT}")
+    
+    ports = list(REPLICA_PORTS)
+    port = ports[(os.getpid() if key is None else key) % len(ports)]
+    return grpc.insecure_channel(f"{HOST}:{port}")
 
 
 def fetch_map() -> Map:
-    """Fetch the map from the server and process it into a Map data structure"""
+    """Fetch the map from the server and process it into a Map data structure.
+    Loads the cached copy instead if the server's map hasn't changed since it was saved."""
+    
+    if MAP_CACHE_PATH is not None:
+        version_res = stub.GetMapVersion(gc_pb2.MapRequest())
+        map = load_map(MAP_CACHE_PATH, version_res.map_id, version_res.version)
+        if map is not None:
+            map.version = version_res.version
+            logger.info(f"Map version {version_res.version} loaded from cache")
+            return map
     
     map_res = stub.GetMap(gc_pb2.MapRequest())
     
@@ -24,9 +61,14 @@ def fetch_map() -> Map:
     
     #Store in Map Data Structure
     map = Map(grid=map_grid, num_rows=numRows, num_cols=numCols)
+    map.version = map_res.version       #WatchMap sends the mines cleared after this version
     
     logger.info("Map received and processed")
     
+    #Cache it before any rover changes it
+    if MAP_CACHE_PATH is not None:
+        save_map(MAP_CACHE_PATH, map_res.map_id, map_res.version, map)
+    
     return map
 
 
@@ -39,7 +81,7 @@ def init_rover(rover_id: int) -> Rover:
     commands:str = cmd_res.commands
     
     #Instantiate object
-    rover = Rover(id=rover_id, map=map, commands=commands, stub=stub)
+    rover = Rover(id=rover_id, map=map, commands=commands, stub=stub, pins=pins, reports=reports)
     logger.info(f"Commands received and processed: {commands}")
     
     return rover
@@ -58,7 +100,7 @@ if __name__ == "__main__":
     # Setup server communication
     #=================================================================
     try:
-        channel = grpc.insecure_channel(f"{HOST}:{PORT}")
+        channel = open_channel(id)
         stub = gc_pb2_grpc.GroundControlStub(channel)
     except Exception as e:
         logger.critical(f"Failed to establish communication with server")
@@ -74,6 +116,13 @@ if __name__ == "__main__":
     #=================================================================
     # Get rover commands and instantiate the Rover object
     #=================================================================
+    pin_pool = futures.ProcessPoolExecutor(max_workers=PIN_WORKERS) if PIPELINE_MINING else None
+    pins = SharedPins(pin_pool) if pin_pool is not None else None
+    
+    #Reports still queued are sent before the client exits, however it exits
+    reports = ReportQueue(stub) if BATCH_REPORTS else None
+    if reports is not None:
+        atexit.register(reports.close)
     rover = init_rover(id)
     logger.info(f"Rover {rover.id} initialized")
     
@@ -84,10 +133,14 @@ if __name__ == "__main__":
     
     rover.run()
     
+    if pin_pool is not None:
+        pin_pool.shutdown(cancel_futures=True)
+    if reports is not None:
+        reports.close()
+    
     # write rover's path to file
-    output = open(f"./out/path_{rover.id}.txt", "w")
-    output.write(rover.getPathArrayString())
-    output.close()
+    with PathSink("./out", ARCHIVE_PATH, append=True) as path_sink:
+        path_sink.write(rover.id, rover.getPathArrayString())
     logger.info(f"Rover {rover.id}'s output path written to file")
     
     print(f"\n[ROVER {rover.id}]: finished.")
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""Puts the top of the repository on the import path, so the modules every lab shares import
+as the `common` package. Import this before any of them."""
+import os
+import sys
+
+ROOT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
@@ -0,0 +1,155 @@
+"""Runs a fleet of rovers from one client process.
+
+The map is fetched once and every rover gets its own copy of it. All rovers share one gRPC
+channel and run at the same time: an asyncio loop drives them, each rover's blocking calls run
+on their own thread, the pins are solved in one shared process pool and all reports go
+through one batching report queue. Per-rover timings are printed at the end.
+
+    python fleet.py 1-10
+    python fleet.py 1,3,5-7 --pin-workers 4
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent import futures
+
+import client
+from rpc import ground_control_pb2 as gc_pb2
+from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+from src.models import logger, Map, Rover
+from common.output import PathSink
+from src.pins import SharedPins
+from src.reports import ReportQueue
+
+#============================================
+# Constants
+#============================================
+ARCHIVE_PATH = client.ARCHIVE_PATH
+PIN_WORKERS = client.PIN_WORKERS
+
+
+def parse_rover_ids(value: str) -> list[int]:
+    """Parses rover ids given as a comma separated list of ids and ranges, e.g. `1-5,8,10`"""
+
+    rover_ids: list[int] = []
+    for item in value.split(","):
+        first, _, last = item.partition("-")
+        rover_ids.extend(range(int(first), int(last or first) + 1))
+
+    if not rover_ids or min(rover_ids) < 1:
+        raise argparse.ArgumentTypeError("rover ids must be positive")
+    return list(dict.fromkeys(rover_ids))
+
+
+async def run_rover(rover_id: int, path_sink: PathSink) -> dict:
+    """Gets one rover's commands, runs it on its own copy of the map and writes its path"""
+
+    start_time = time.perf_counter()
+    cmd_res = await asyncio.to_thread(stub.GetCommands, gc_pb2.CommandRequest(rover_id=rover_id))
+    commands_time = time.perf_counter() - start_time
+
+    #Rovers clear the mines they dig, so they can't share a Map
+    rover_map = Map(grid=map_grid, num_rows=map.num_rows, num_cols=map.num_cols)
+    rover_map.version = map.version
+    rover = Rover(id=rover_id, map=rover_map, commands=cmd_res.commands, stub=stub, pins=pins, reports=reports)
+
+    run_start = time.perf_counter()
+    await asyncio.to_thread(rover.run)
+    run_time = time.perf_counter() - run_start
+
+    path_sink.write(rover.id, rover.getPathArrayString())
+
+    return {
+        "rover_id": rover_id,
+        "commands": len(rover.commands),
+        "mines": len(rover.serials),
+        "commands_s": commands_time,
+        "run_s": run_time,
+        "total_s": time.perf_counter() - start_time,
+    }
+
+
+async def run_fleet(rover_ids: list[int]) -> list[dict]:
+    """Runs every rover at once. Failed rovers are logged and left out of the results."""
+
+    #One thread per rover, so no rover waits for another's blocking call
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(futures.ThreadPoolExecutor(max_workers=len(rover_ids), thread_name_prefix="rover"))
+
+    with PathSink("./out", ARCHIVE_PATH, append=True) as path_sink:
+        results = await asyncio.gather(*(run_rover(rover_id, path_sink) for rover_id in rover_ids), return_exceptions=True)
+
+    timings = []
+    for rover_id, result in zip(rover_ids, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Rover {rover_id} failed: {result!r}")
+        else:
+            timings.append(result)
+    return timings
+
+
+def print_timings(timings: list[dict], wall_time: float):
+    """Prints each rover's timings and the fleet totals"""
+
+    print(f"\n{'rover':>6} {'commands':>9} {'mines':>6} {'commands s':>11} {'run s':>9} {'total s':>9}")
+    for timing in sorted(timings, key=lambda timing: timing["rover_id"]):
+        print(f"{timing['rover_id']:>6} {timing['commands']:>9} {timing['mines']:>6} "
+              f"{timing['commands_s']:11.3f} {timing['run_s']:9.3f} {timing['total_s']:9.3f}")
+
+    if not timings:
+        return
+
+    totals = [timing["total_s"] for timing in timings]
+    print(f"\nrovers: {len(timings)}  wall: {wall_time:.3f} s  "
+          f"per rover min/mean/max: {min(totals):.3f} / {statistics.fmean(totals):.3f} / {max(totals):.3f} s  "
+          f"sequential equivalent: {sum(totals):.3f} s ({sum(totals) / wall_time:.1f}x)")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("rover_ids", type=parse_rover_ids, help="Rover ids and ranges, e.g. 1-10 or 1,3,5-7")
+    parser.add_argument("--pin-workers", type=int, default=PIN_WORKERS, help="Pin pool size. Default: one per CPU")
+    args = parser.parse_args()
+
+
+    #=================================================================
+    # Setup server communication. One channel for the whole fleet, on one of
+    # the replicas if client.REPLICA_PORTS is set, since all its rovers share one map
+    #=================================================================
+    channel = client.open_channel()
+    stub = gc_pb2_grpc.GroundControlStub(channel)
+    client.stub = stub
+
+
+    #=================================================================
+    # Get and process the map from the server, once
+    #=================================================================
+    start_time = time.perf_counter()
+    map: Map = client.fetch_map()
+    map_grid = map.array_repr()
+    logger.info(f"Map ready in {time.perf_counter() - start_time:.3f} s")
+
+
+    #=================================================================
+    # Run the fleet
+    #=================================================================
+    #One pin job per serial and one digger per mine for the whole fleet
+    pin_pool = futures.ProcessPoolExecutor(max_workers=args.pin_workers)
+    pins = SharedPins(pin_pool)
+    reports = ReportQueue(stub)
+    print(f"\n[FLEET]: starting {len(args.rover_ids)} rovers...\n")
+
+    start_time = time.perf_counter()
+    try:
+        timings = asyncio.run(run_fleet(args.rover_ids))
+    finally:
+        pin_pool.shutdown(cancel_futures=True)
+        reports.close()
+        channel.close()
+    wall_time = time.perf_counter() - start_time
+
+    print(f"\n[FLEET]: finished. {reports.reports} reports sent in {reports.batches} calls, "
+          f"{pins.submitted} pins solved and {pins.shared} shared between rovers")
+    print_timings(timings, wall_time)
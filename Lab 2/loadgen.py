@@ -0,0 +1,243 @@
+"""Load generator for the GroundControl server.
+
+Runs N simulated rovers against a local server, stepping N up to find where the server stops
+keeping up. Each simulated rover repeats a full rover session until the step ends:
+
+    GetMap -> GetCommands -> drive, and per mine reached: GetMineSerial, dig, ShareMinPin -> ReportStatus
+
+Driving and digging are paced with `--command-ms` per command and `--dig-ms` per mine instead of
+moving a real rover or solving real pins. The pins sent are not valid, so the server's map is
+never changed by the load. Every rover has its own channel, like the real clients.
+
+The server is started as a subprocess with its rover command API stubbed locally by the stub HTTP
+server (or, with `--synthetic`, by generated commands). `--target` uses an already running server
+instead. The load runs in this process, so on a small machine it competes with the server for
+the CPU. Compare the result with the server's own view from `show_stats.py`. `--replicas N` starts
+N server processes with `replicas.py` instead, and the rovers are spread over them, each staying on one
+replica like the real clients.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import grpc
+
+from bench_server import SERVERS, TARGET, start_server, stop_server
+from replicas import replica_ports, start_replicas, stop_replicas
+from rpc import ground_control_pb2 as gc_pb2
+from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+import common_path     #stub_server is shared with the other labs
+from common.stub_server import StubServer
+
+#Throughput growing by less than this between steps counts as saturated
+SATURATION_GAIN = 0.10
+
+MOVES = {"DOWN": (0, 1), "UP": (0, -1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
+TURNS = {
+    "L": {"DOWN": "RIGHT", "UP": "LEFT", "LEFT": "DOWN", "RIGHT": "UP"},
+    "R": {"DOWN": "LEFT", "UP": "RIGHT", "LEFT": "UP", "RIGHT": "DOWN"},
+}
+
+
+def mines_on_path(grid: list[list[str]], commands: str) -> list[tuple[int, tuple[int, int]]]:
+    """Walks the commands over the grid like a rover. Returns (command index, (x, y)) of each mine reached, once per mine."""
+
+    num_rows, num_cols = len(grid), len(grid[0]) if grid else 0
+    x_pos, y_pos, orientation = 0, 0, "DOWN"
+    mines: list[tuple[int, tuple[int, int]]] = []
+    seen: set[tuple[int, int]] = set()
+
+    for index, cmd in enumerate(commands):
+        if grid[y_pos][x_pos] == "1" and (x_pos, y_pos) not in seen:
+            seen.add((x_pos, y_pos))
+            mines.append((index, (x_pos, y_pos)))
+
+        if cmd == "M":
+            d_x, d_y = MOVES[orientation]
+            if 0 <= x_pos + d_x < num_cols and 0 <= y_pos + d_y < num_rows:
+                x_pos, y_pos = x_pos + d_x, y_pos + d_y
+        elif cmd in TURNS:
+            orientation = TURNS[cmd][orientation]
+
+    return mines
+
+
+class LoadStats():
+    """Latencies and errors of each RPC over one step"""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.sessions = 0
+
+    async def call(self, method: str, rpc, request, timeout: float):
+        """Makes one call and records it. Returns the response, or None if it failed."""
+
+        start_time = time.perf_counter()
+        try:
+            response = await rpc(request, timeout=timeout)
+        except grpc.aio.AioRpcError:
+            self.errors[method] = self.errors.get(method, 0) + 1
+            return None
+        self.latencies.setdefault(method, []).append(time.perf_counter() - start_time)
+        return response
+
+    @property
+    def calls(self) -> int:
+        return sum(len(latencies) for latencies in self.latencies.values())
+
+    @property
+    def failed(self) -> int:
+        return sum(self.errors.values())
+
+
+async def rover_session(stub: gc_pb2_grpc.GroundControlStub, rover_id: int, stats: LoadStats, args) -> bool:
+    """One full rover session. Returns False if a call failed and the session was abandoned."""
+
+    map_res = await stats.call("GetMap", stub.GetMap, gc_pb2.MapRequest(), args.timeout)
+    if map_res is None:
+        return False
+    grid = [list(row.cells) for row in map_res.grid]
+
+    cmd_res = await stats.call("GetCommands", stub.GetCommands, gc_pb2.CommandRequest(rover_id=rover_id), args.timeout)
+    if cmd_res is None:
+        return False
+
+    driven = 0
+    for index, (x_pos, y_pos) in mines_on_path(grid, cmd_res.commands):
+        #Drive up to the mine
+        await asyncio.sleep((index - driven) * args.command_ms / 1000)
+        driven = index
+
+        serial_res = await stats.call("GetMineSerial", stub.GetMineSerial,
+                                      gc_pb2.SerialNumRequest(x_pos=x_pos, y_pos=y_pos), args.timeout)
+        if serial_res is None:
+            return False
+
+        await asyncio.sleep(args.dig_ms / 1000)
+        if await stats.call("ShareMinPin", stub.ShareMinPin,
+                            gc_pb2.MinePin(rover_id=rover_id, pin="0", x_pos=x_pos, y_pos=y_pos), args.timeout) is None:
+            return False
+
+    await asyncio.sleep((len(cmd_res.commands) - driven) * args.command_ms / 1000)
+    status = gc_pb2.ExecutionStatus(rover_id=rover_id, success=True, msg="load test")
+    return await stats.call("ReportStatus", stub.ReportStatus, status, args.timeout) is not None
+
+
+async def run_step(rovers: int, args) -> tuple[LoadStats, float]:
+    """Runs `rovers` simulated rovers for `args.duration` seconds. Sessions still running then are finished."""
+
+    stats = LoadStats()
+    deadline = time.perf_counter() + args.duration
+
+    async def rover(rover_id: int):
+        #Replicas don't share cleared mines or map versions, so a rover keeps to one of them
+        async with grpc.aio.insecure_channel(args.targets[rover_id % len(args.targets)]) as channel:
+            stub = gc_pb2_grpc.GroundControlStub(channel)
+            while time.perf_counter() < deadline:
+                if await rover_session(stub, rover_id, stats, args):
+                    stats.sessions += 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(rover(rover_id) for rover_id in range(1, rovers + 1)))
+    return stats, time.perf_counter() - start_time
+
+
+def percentile(latencies: list[float], pct: float) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000
+
+
+def print_step(rovers: int, stats: LoadStats, wall_time: float):
+    print(f"\n{rovers} rovers: {stats.sessions / wall_time:8.1f} sessions/s  {stats.calls / wall_time:8.1f} calls/s  "
+          f"errors {stats.failed}")
+    for method in ("GetMap", "GetCommands", "GetMineSerial", "ShareMinPin", "ReportStatus"):
+        latencies = stats.latencies.get(method)
+        if latencies:
+            print(f"   {method:<14} {len(latencies):>8} calls  p50 {percentile(latencies, 50):8.2f} ms  "
+                  f"p99 {percentile(latencies, 99):8.2f} ms  mean {statistics.fmean(latencies) * 1000:8.2f} ms  "
+                  f"errors {stats.errors.get(method, 0)}")
+
+
+def find_saturation(steps: list[tuple[int, float, float]]) -> str:
+    """Finds the first step after which more rovers no longer bring more throughput, or errors appear.
+
+    Args:
+        steps (list): (rovers, calls per second, error ratio) of each step, in order
+
+    Returns:
+        (str) : A one line verdict
+    """
+
+    for (rovers, rate, error_ratio), (next_rovers, next_rate, next_error_ratio) in zip(steps, steps[1:]):
+        if next_error_ratio > 0.01:
+            return f"saturated at ~{rovers} rovers ({rate:.0f} calls/s): {next_error_ratio:.1%} of calls failed at {next_rovers}"
+        if next_rate < rate * (1 + SATURATION_GAIN):
+            return f"saturated at ~{rovers} rovers ({rate:.0f} calls/s): {next_rovers} rovers gave {next_rate:.0f} calls/s"
+
+    rovers, rate, _ = steps[-1]
+    return f"not saturated: still scaling at {rovers} rovers ({rate:.0f} calls/s)"
+
+
+def parse_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",")]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rovers", type=parse_list, default=[10, 50, 100, 200, 400], help="Comma separated rover counts, one step each")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per step")
+    parser.add_argument("--command-ms", type=float, default=2.0, help="Simulated time per command")
+    parser.add_argument("--dig-ms", type=float, default=50.0, help="Simulated time to dig each mine")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Deadline of each call in seconds")
+    parser.add_argument("--server", choices=SERVERS, default="thread-pool", help="Server to start")
+    parser.add_argument("--replicas", type=int, default=1, help="Server processes to start, each on its own port")
+    parser.add_argument("--target", default=None, help="host:port of an already running server to load instead. Comma separated for several replicas")
+    parser.add_argument("--synthetic", action="store_true", help="Generate rover commands in the server instead of using the stub API")
+    parser.add_argument("--upstream-delay", type=float, default=0.05, help="Delay of the stub rover API in seconds")
+    args = parser.parse_args()
+
+    upstream = process = replicas = None
+    #Load test reports go to a throwaway ledger, not ./out/ledger.bin
+    ledger_dir = tempfile.TemporaryDirectory(prefix="loadgen_")
+    if args.target is None:
+        args.target = TARGET
+        if args.synthetic:
+            upstream_env = {"ROVER_COMMAND_SOURCE": "synthetic", "ROVER_SOURCE_LATENCY": str(args.upstream_delay * 1000)}
+        else:
+            upstream = StubServer(port=0, delay=args.upstream_delay)
+            upstream.start_background()
+            upstream_env = {"ROVER_API_URL": upstream.base_url, "ROVER_COMMAND_SOURCE": "http"}
+        if args.replicas > 1:
+            replicas = start_replicas(SERVERS[args.server], args.replicas, env=upstream_env, quiet=True,
+                                      ledger_dir=ledger_dir.name)
+            args.target = ",".join(f"127.0.0.1:{port}" for port in replica_ports(args.replicas))
+        else:
+            process = start_server(SERVERS[args.server], upstream_env, os.path.join(ledger_dir.name, "ledger.bin"))
+
+    args.targets = args.target.split(",")
+    server = f"{args.replicas} x {args.server}" if replicas else args.server if process else "running server"
+    print(f"Target: {args.target} ({server}), {args.duration:g} s per step, "
+          f"{args.command_ms:g} ms per command, {args.dig_ms:g} ms per mine")
+
+    steps: list[tuple[int, float, float]] = []
+    try:
+        for rovers in args.rovers:
+            stats, wall_time = asyncio.run(run_step(rovers, args))
+            print_step(rovers, stats, wall_time)
+            attempted = stats.calls + stats.failed
+            steps.append((rovers, stats.calls / wall_time, stats.failed / attempted if attempted else 0.0))
+    finally:
+        if process is not None:
+            stop_server(process)
+        if replicas is not None:
+            stop_replicas(*replicas)
+        if upstream is not None:
+            upstream.shutdown()
+        ledger_dir.cleanup()
+
+    print(f"\n{find_saturation(steps)}")
@@ -0,0 +1,132 @@
+"""Runs several GroundControl server processes on this host, all serving one map.
+
+The map and mine files are loaded once here and published read-only in shared memory, and every
+replica builds its map from that copy. Each replica is a separate process with its own GIL, so
+calls served by different replicas run on different cores.
+
+By default replica i listens on PORT + i. Set `REPLICA_PORTS` in `client.py` to the printed ports
+and each client connects to one of them, picked by rover id (by process id for `fleet.py`).
+With `--reuseport` every replica listens on PORT itself (SO_REUSEPORT) and the kernel spreads
+new connections over them, so clients need no change, but all calls on one channel go to one
+replica.
+
+Every replica keeps its own cleared mines, map version, WatchMap streams and ledger
+(`out/ledger_{i}.bin`): a mine cleared through one replica is not cleared on the maps of the others.
+That is why a client stays on one replica. Spreading its calls over several would give it map
+versions and WatchMap updates that don't agree.
+
+    python replicas.py 4
+    python replicas.py 4 --server asyncio --reuseport
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from multiprocessing import shared_memory
+
+import grpc
+
+from bench_server import SERVERS
+from server import HOST, PORT, map_file_path, mine_file_path
+from src.models import ServerMap
+from common.shared_map import publish_map
+
+
+def replica_ports(count: int, reuse_port: bool = False) -> list[int]:
+    """Port of each replica"""
+    return [PORT] * count if reuse_port else [PORT + index for index in range(count)]
+
+
+def start_replicas(script: str, count: int, reuse_port: bool = False, env: dict[str, str] = None,
+                   quiet: bool = False, ledger_dir: str = "./out") -> tuple[shared_memory.SharedMemory, list[subprocess.Popen]]:
+    """Publishes the map and starts `count` replicas of a server script, then waits until they accept calls
+
+    Args:
+        script (str): Server script, e.g. "server.py"
+        count (int): Number of replicas
+        reuse_port (bool): All replicas listen on PORT instead of one port each
+        env (dict): Extra environment of every replica, e.g. the rover command source
+        quiet (bool): Discard the replicas' output
+        ledger_dir (str): Directory of the replicas' ledgers, `ledger_{index}.bin`. Load tests pass a temporary one
+
+    Returns:
+        (tuple) : The map's shared memory segment and the replica processes. Pass both to `stop_replicas`
+    """
+
+    segment = publish_map(ServerMap(map_file_path, mine_file_path))
+    processes: list[subprocess.Popen] = []
+    output = subprocess.DEVNULL if quiet else None
+
+    try:
+        for index, port in enumerate(replica_ports(count, reuse_port)):
+            replica_env = dict(os.environ, **(env or {}))
+            replica_env.update({
+                "GROUND_CONTROL_PORT": str(port),
+                "GROUND_CONTROL_REUSEPORT": "1" if reuse_port else "0",
+                "GROUND_CONTROL_SHARED_MAP": segment.name,
+                "GROUND_CONTROL_LEDGER": os.path.join(ledger_dir, f"ledger_{index}.bin"),
+            })
+            processes.append(subprocess.Popen([sys.executable, script], env=replica_env, stdout=output, stderr=output))
+
+        #With a shared port only the port can be checked, not each replica behind it
+        for port in sorted(set(replica_ports(count, reuse_port))):
+            with grpc.insecure_channel(f"{HOST}:{port}") as channel:
+                grpc.channel_ready_future(channel).result(timeout=60)
+        if any(process.poll() is not None for process in processes):
+            raise RuntimeError(f"A replica of {script} exited during startup")
+    except grpc.FutureTimeoutError:
+        stop_replicas(segment, processes)
+        raise RuntimeError(f"Replicas of {script} did not start")
+    except BaseException:
+        #Ctrl-C or SIGTERM during startup too, so no replica is left running
+        stop_replicas(segment, processes)
+        raise
+
+    return segment, processes
+
+
+def stop_replicas(segment: shared_memory.SharedMemory, processes: list[subprocess.Popen]):
+    """Stops the replicas, then removes the shared map"""
+
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    segment.close()
+    segment.unlink()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("replicas", type=int, help="Number of server processes")
+    parser.add_argument("--server", choices=SERVERS, default="thread-pool", help="Server to run")
+    parser.add_argument("--reuseport", action="store_true", help="Every replica listens on the same port")
+    args = parser.parse_args()
+
+    #A terminated launcher still stops its replicas
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    segment, processes = start_replicas(SERVERS[args.server], args.replicas, args.reuseport)
+    ports = replica_ports(args.replicas, args.reuseport)
+    print(f"\n[REPLICAS]: {args.replicas} x {SERVERS[args.server]} serving the map in shared memory {segment.name}")
+    if args.reuseport:
+        print(f"[REPLICAS]: all listening on port {PORT}")
+    else:
+        print(f"[REPLICAS]: ports {ports}. Set REPLICA_PORTS = range({ports[0]}, {ports[-1] + 1}) in client.py")
+
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+        print("[REPLICAS]: a replica exited. Stopping the others")
+    except KeyboardInterrupt:
+        print("\n[REPLICAS]: Keyboard Interrupt. Shutting down.")
+    finally:
+        stop_replicas(segment, processes)
@@ -25,7 +25,7 @@ _sym_db = _symbol_database.Default()
 from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14ground_control.proto\x1a\x1bgoogle/protobuf/empty.proto\"\x0c\n\nMapRequest\"\x17\n\x06MapRow\x12\r\n\x05\x63\x65lls\x18\x01 \x03(\t\"F\n\x0bMapResponse\x12\x15\n\x04grid\x18\x01 \x03(\x0b\x32\x07.MapRow\x12\x0f\n\x07numRows\x18\x02 \x01(\x05\x12\x0f\n\x07numCols\x18\x03 \x01(\x05\"\"\n\x0e\x43ommandRequest\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\"#\n\x0f\x43ommandResponse\x12\x10\n\x08\x63ommands\x18\x01 \x01(\t\"0\n\x10SerialNumRequest\x12\r\n\x05x_pos\x18\x01 \x01(\x05\x12\r\n\x05y_pos\x18\x02 \x01(\x05\"&\n\x11SerialNumResponse\x12\x11\n\tserialNum\x18\x01 \x01(\t\"A\n\x0f\x45xecutionStatus\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0b\n\x03msg\x18\x03 \x01(\t\"(\n\x07MinePin\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\x12\x0b\n\x03pin\x18\x02 \x01(\t2\x93\x02\n\rGroundControl\x12%\n\x06GetMap\x12\x0b.MapRequest\x1a\x0c.MapResponse\"\x00\x12\x32\n\x0bGetCommands\x12\x0f.CommandRequest\x1a\x10.CommandResponse\"\x00\x12\x38\n\rGetMineSerial\x12\x11.SerialNumRequest\x1a\x12.SerialNumResponse\"\x00\x12:\n\x0cReportStatus\x12\x10.ExecutionStatus\x1a\x16.google.protobuf.Empty\"\x00\x12\x31\n\x0bShareMinPin\x12\x08.MinePin\x1a\x16.google.protobuf.Empty\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14ground_control.proto\x1a\x1bgoogle/protobuf/empty.proto\"\x0c\n\nMapRequest\"\x17\n\x06MapRow\x12\r\n\x05\x63\x65lls\x18\x01 \x03(\t\"g\n\x0bMapResponse\x12\x15\n\x04grid\x18\x01 \x03(\x0b\x32\x07.MapRow\x12\x0f\n\x07numRows\x18\x02 \x01(\x05\x12\x0f\n\x07numCols\x18\x03 \x01(\x05\x12\x0e\n\x06map_id\x18\x04 \x01(\t\x12\x0f\n\x07version\x18\x05 \x01(\x05\"-\n\nMapVersion\x12\x0e\n\x06map_id\x18\x01 \x01(\t\x12\x0f\n\x07version\x18\x02 \x01(\x05\"\"\n\x0e\x43ommandRequest\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\"#\n\x0f\x43ommandResponse\x12\x10\n\x08\x63ommands\x18\x01 \x01(\t\"0\n\x10SerialNumRequest\x12\r\n\x05x_pos\x18\x01 \x01(\x05\x12\r\n\x05y_pos\x18\x02 \x01(\x05\"&\n\x11SerialNumResponse\x12\x11\n\tserialNum\x18\x01 \x01(\t\"9\n\x11SerialNumsRequest\x12$\n\tpositions\x18\x01 \x03(\x0b\x32\x11.SerialNumRequest\"(\n\x12SerialNumsResponse\x12\x12\n\nserialNums\x18\x01 \x03(\t\"A\n\x0f\x45xecutionStatus\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0b\n\x03msg\x18\x03 \x01(\t\"F\n\x07MinePin\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\x12\x0b\n\x03pin\x18\x02 \x01(\t\x12\r\n\x05x_pos\x18\x03 \x01(\x05\x12\r\n\x05y_pos\x18\x04 \x01(\x05\"\"\n\x08MinePins\x12\x16\n\x04pins\x18\x01 \x03(\x0b\x32\x08.MinePin\"U\n\tTelemetry\x12\r\n\x05x_pos\x18\x01 \x01(\x05\x12\r\n\x05y_pos\x18\x02 \x01(\x05\x12\x13\n\x0borientation\x18\x03 \x01(\t\x12\x15\n\rcommand_index\x18\x04 \x01(\x05\"B\n\x0fTelemetryReport\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\x12\x1d\n\ttelemetry\x18\x02 \x01(\x0b\x32\n.Telemetry\"u\n\x12ReportBatchRequest\x12\x16\n\x04pins\x18\x01 \x03(\x0b\x32\x08.MinePin\x12#\n\ttelemetry\x18\x02 \x03(\x0b\x32\x10.TelemetryReport\x12\"\n\x08statuses\x18\x03 \x03(\x0b\x32\x10.ExecutionStatus\"\xc3\x01\n\x0cRoverMessage\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\x12\x0b\n\x03seq\x18\x02 \x01(\r\x12\x1f\n\ttelemetry\x18\x03 \x01(\x0b\x32\n.TelemetryH\x00\x12+\n\x0eserial_request\x18\x04 \x01(\x0b\x32\x11.SerialNumRequestH\x00\x12\x17\n\x03pin\x18\x05 \x01(\x0b\x32\x08.MinePinH\x00\x12\"\n\x06status\x18\x06 \x01(\x0b\x32\x10.ExecutionStatusH\x00\x42\t\n\x07payload\"M\n\rGroundMessage\x12\x0b\n\x03seq\x18\x01 \x01(\r\x12$\n\x06serial\x18\x02 \x01(\x0b\x32\x12.SerialNumResponseH\x00\x42\t\n\x07payload\":\n\x0fWatchMapRequest\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\x12\x15\n\rsince_version\x18\x02 \x01(\x05\"\\\n\nCellUpdate\x12\r\n\x05x_pos\x18\x01 \x01(\x05\x12\r\n\x05y_pos\x18\x02 \x01(\x05\x12\r\n\x05value\x18\x03 \x01(\t\x12\x0f\n\x07version\x18\x04 \x01(\x05\x12\x10\n\x08rover_id\x18\x05 \x01(\x05\"\x0e\n\x0cStatsRequest\"\xd1\x01\n\x0bMethodStats\x12\x0e\n\x06method\x18\x01 \x01(\t\x12\r\n\x05\x63\x61lls\x18\x02 \x01(\x04\x12\x0e\n\x06\x65rrors\x18\x03 \x01(\x04\x12\x11\n\tcancelled\x18\x04 \x01(\x04\x12\x11\n\tin_flight\x18\x05 \x01(\x05\x12\x15\n\rmax_in_flight\x18\x06 \x01(\x05\x12\x0f\n\x07mean_ms\x18\x07 \x01(\x01\x12\x0e\n\x06p50_ms\x18\x08 \x01(\x01\x12\x0e\n\x06p99_ms\x18\t \x01(\x01\x12\x0e\n\x06max_ms\x18\n \x01(\x01\x12\x15\n\rbucket_counts\x18\x0b \x03(\x04\"\x93\x01\n\x0bServerStats\x12\x1d\n\x07methods\x18\x01 \x03(\x0b\x32\x0c.MethodStats\x12\x10\n\x08uptime_s\x18\x02 \x01(\x01\x12\x0f\n\x07workers\x18\x03 \x01(\x05\x12\x11\n\tin_flight\x18\x04 \x01(\x05\x12\x15\n\rmax_in_flight\x18\x05 \x01(\x05\x12\x18\n\x10\x62ucket_bounds_ms\x18\x06 \x03(\x01\x32\x82\x05\n\rGroundControl\x12%\n\x06GetMap\x12\x0b.MapRequest\x1a\x0c.MapResponse\"\x00\x12+\n\rGetMapVersion\x12\x0b.MapRequest\x1a\x0b.MapVersion\"\x00\x12\x32\n\x0bGetCommands\x12\x0f.CommandRequest\x1a\x10.CommandResponse\"\x00\x12\x38\n\rGetMineSerial\x12\x11.SerialNumRequest\x1a\x12.SerialNumResponse\"\x00\x12;\n\x0eGetMineSerials\x12\x12.SerialNumsRequest\x1a\x13.SerialNumsResponse\"\x00\x12:\n\x0cReportStatus\x12\x10.ExecutionStatus\x1a\x16.google.protobuf.Empty\"\x00\x12\x31\n\x0bShareMinPin\x12\x08.MinePin\x1a\x16.google.protobuf.Empty\"\x00\x12\x30\n\tSharePins\x12\t.MinePins\x1a\x16.google.protobuf.Empty\"\x00\x12<\n\x0bReportBatch\x12\x13.ReportBatchRequest\x1a\x16.google.protobuf.Empty\"\x00\x12\x33\n\x0cRoverSession\x12\r.RoverMessage\x1a\x0e.GroundMessage\"\x00(\x01\x30\x01\x12-\n\x08WatchMap\x12\x10.WatchMapRequest\x1a\x0b.CellUpdate\"\x00\x30\x01\x12/\n\x0eGetServerStats\x12\r.StatsRequest\x1a\x0c.ServerStats\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -37,19 +37,47 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_MAPROW']._serialized_start=67
   _globals['_MAPROW']._serialized_end=90
   _globals['_MAPRESPONSE']._serialized_start=92
-  _globals['_MAPRESPONSE']._serialized_end=162
-  _globals['_COMMANDREQUEST']._serialized_start=164
-  _globals['_COMMANDREQUEST']._serialized_end=198
-  _globals['_COMMANDRESPONSE']._serialized_start=200
-  _globals['_COMMANDRESPONSE']._serialized_end=235
-  _globals['_SERIALNUMREQUEST']._serialized_start=237
-  _globals['_SERIALNUMREQUEST']._serialized_end=285
-  _globals['_SERIALNUMRESPONSE']._serialized_start=287
-  _globals['_SERIALNUMRESPONSE']._serialized_end=325
-  _globals['_EXECUTIONSTATUS']._serialized_start=327
-  _globals['_EXECUTIONSTATUS']._serialized_end=392
-  _globals['_MINEPIN']._serialized_start=394
-  _globals['_MINEPIN']._serialized_end=434
-  _globals['_GROUNDCONTROL']._serialized_start=437
-  _globals['_GROUNDCONTROL']._serialized_end=712
+  _globals['_MAPRESPONSE']._serialized_end=195
+  _globals['_MAPVERSION']._serialized_start=197
+  _globals['_MAPVERSION']._serialized_end=242
+  _globals['_COMMANDREQUEST']._serialized_start=244
+  _globals['_COMMANDREQUEST']._serialized_end=278
+  _globals['_COMMANDRESPONSE']._serialized_start=280
+  _globals['_COMMANDRESPONSE']._serialized_end=315
+  _globals['_SERIALNUMREQUEST']._serialized_start=317
+  _globals['_SERIALNUMREQUEST']._serialized_end=365
+  _globals['_SERIALNUMRESPONSE']._serialized_start=367
+  _globals['_SERIALNUMRESPONSE']._serialized_end=405
+  _globals['_SERIALNUMSREQUEST']._serialized_start=407
+  _globals['_SERIALNUMSREQUEST']._serialized_end=464
+  _globals['_SERIALNUMSRESPONSE']._serialized_start=466
+  _globals['_SERIALNUMSRESPONSE']._serialized_end=506
+  _globals['_EXECUTIONSTATUS']._serialized_start=508
+  _globals['_EXECUTIONSTATUS']._serialized_end=573
+  _globals['_MINEPIN']._serialized_start=575
+  _globals['_MINEPIN']._serialized_end=645
+  _globals['_MINEPINS']._serialized_start=647
+  _globals['_MINEPINS']._serialized_end=681
+  _globals['_TELEMETRY']._serialized_start=683
+  _globals['_TELEMETRY']._serialized_end=768
+  _globals['_TELEMETRYREPORT']._serialized_start=770
+  _globals['_TELEMETRYREPORT']._serialized_end=836
+  _globals['_REPORTBATCHREQUEST']._serialized_start=838
+  _globals['_REPORTBATCHREQUEST']._serialized_end=955
+  _globals['_ROVERMESSAGE']._serialized_start=958
+  _globals['_ROVERMESSAGE']._serialized_end=1153
+  _globals['_GROUNDMESSAGE']._serialized_start=1155
+  _globals['_GROUNDMESSAGE']._serialized_end=1232
+  _globals['_WATCHMAPREQUEST']._serialized_start=1234
+  _globals['_WATCHMAPREQUEST']._serialized_end=1292
+  _globals['_CELLUPDATE']._serialized_start=1294
+  _globals['_CELLUPDATE']._serialized_end=1386
+  _globals['_STATSREQUEST']._serialized_start=1388
+  _globals['_STATSREQUEST']._serialized_end=1402
+  _globals['_METHODSTATS']._serialized_start=1405
+  _globals['_METHODSTATS']._serialized_end=1614
+  _globals['_SERVERSTATS']._serialized_start=1617
+  _globals['_SERVERSTATS']._serialized_end=1764
+  _globals['_GROUNDCONTROL']._serialized_start=1767
+  _globals['_GROUNDCONTROL']._serialized_end=2409
 # @@protoc_insertion_point(module_scope)
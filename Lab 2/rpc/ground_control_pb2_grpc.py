@@ -41,6 +41,11 @@ class GroundControlStub(object):
                 request_serializer=ground__control__pb2.MapRequest.SerializeToString,
                 response_deserializer=ground__control__pb2.MapResponse.FromString,
                 _registered_method=True)
+        self.GetMapVersion = channel.unary_unary(
+                '/GroundControl/GetMapVersion',
+                request_serializer=ground__control__pb2.MapRequest.SerializeToString,
+                response_deserializer=ground__control__pb2.MapVersion.FromString,
+                _registered_method=True)
         self.GetCommands = channel.unary_unary(
                 '/GroundControl/GetCommands',
                 request_serializer=ground__control__pb2.CommandRequest.SerializeToString,
@@ -51,6 +56,11 @@ class GroundControlStub(object):
                 request_serializer=ground__control__pb2.SerialNumRequest.SerializeToString,
                 response_deserializer=ground__control__pb2.SerialNumResponse.FromString,
                 _registered_method=True)
+        self.GetMineSerials = channel.unary_unary(
+                '/GroundControl/GetMineSerials',
+                request_serializer=ground__control__pb2.SerialNumsRequest.SerializeToString,
+                response_deserializer=ground__control__pb2.SerialNumsResponse.FromString,
+                _registered_method=True)
         self.ReportStatus = channel.unary_unary(
                 '/GroundControl/ReportStatus',
                 request_serializer=ground__control__pb2.ExecutionStatus.SerializeToString,
@@ -61,6 +71,31 @@ class GroundControlStub(object):
                 request_serializer=ground__control__pb2.MinePin.SerializeToString,
                 response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                 _registered_method=True)
+        self.SharePins = channel.unary_unary(
+                '/GroundControl/SharePins',
+                request_serializer=ground__control__pb2.MinePins.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                _registered_method=True)
+        self.ReportBatch = channel.unary_unary(
+                '/GroundControl/ReportBatch',
+                request_serializer=ground__control__pb2.ReportBatchRequest.SerializeToString,
+                response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                _registered_method=True)
+        self.RoverSession = channel.stream_stream(
+                '/GroundControl/RoverSession',
+                request_serializer=ground__control__pb2.RoverMessage.SerializeToString,
+                response_deserializer=ground__control__pb2.GroundMessage.FromString,
+                _registered_method=True)
+        self.WatchMap = channel.unary_stream(
+                '/GroundControl/WatchMap',
+                request_serializer=ground__control__pb2.WatchMapRequest.SerializeToString,
+                response_deserializer=ground__control__pb2.CellUpdate.FromString,
+                _registered_method=True)
+        self.GetServerStats = channel.unary_unary(
+                '/GroundControl/GetServerStats',
+                request_serializer=ground__control__pb2.StatsRequest.SerializeToString,
+                response_deserializer=ground__control__pb2.ServerStats.FromString,
+                _registered_method=True)
 
 
 class GroundControlServicer(object):
@@ -73,6 +108,12 @@ class GroundControlServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetMapVersion(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetCommands(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -85,6 +126,12 @@ class GroundControlServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetMineSerials(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def ReportStatus(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -97,6 +144,36 @@ class GroundControlServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SharePins(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReportBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RoverSession(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchMap(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetServerStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_GroundControlServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -105,6 +182,11 @@ def add_GroundControlServicer_to_server(servicer, server):
                     request_deserializer=ground__control__pb2.MapRequest.FromString,
                     response_serializer=ground__control__pb2.MapResponse.SerializeToString,
             ),
+            'GetMapVersion': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMapVersion,
+                    request_deserializer=ground__control__pb2.MapRequest.FromString,
+                    response_serializer=ground__control__pb2.MapVersion.SerializeToString,
+            ),
             'GetCommands': grpc.unary_unary_rpc_method_handler(
                     servicer.GetCommands,
                     request_deserializer=ground__control__pb2.CommandRequest.FromString,
@@ -115,6 +197,11 @@ def add_GroundControlServicer_to_server(servicer, server):
                     request_deserializer=ground__control__pb2.SerialNumRequest.FromString,
                     response_serializer=ground__control__pb2.SerialNumResponse.SerializeToString,
             ),
+            'GetMineSerials': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMineSerials,
+                    request_deserializer=ground__control__pb2.SerialNumsRequest.FromString,
+                    response_serializer=ground__control__pb2.SerialNumsResponse.SerializeToString,
+            ),
             'ReportStatus': grpc.unary_unary_rpc_method_handler(
                     servicer.ReportStatus,
                     request_deserializer=ground__control__pb2.ExecutionStatus.FromString,
@@ -125,6 +212,31 @@ def add_GroundControlServicer_to_server(servicer, server):
                     request_deserializer=ground__control__pb2.MinePin.FromString,
                     response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
             ),
+            'SharePins': grpc.unary_unary_rpc_method_handler(
+                    servicer.SharePins,
+                    request_deserializer=ground__control__pb2.MinePins.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
+            'ReportBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReportBatch,
+                    request_deserializer=ground__control__pb2.ReportBatchRequest.FromString,
+                    response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            ),
+            'RoverSession': grpc.stream_stream_rpc_method_handler(
+                    servicer.RoverSession,
+                    request_deserializer=ground__control__pb2.RoverMessage.FromString,
+                    response_serializer=ground__control__pb2.GroundMessage.SerializeToString,
+            ),
+            'WatchMap': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchMap,
+                    request_deserializer=ground__control__pb2.WatchMapRequest.FromString,
+                    response_serializer=ground__control__pb2.CellUpdate.SerializeToString,
+            ),
+            'GetServerStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetServerStats,
+                    request_deserializer=ground__control__pb2.StatsRequest.FromString,
+                    response_serializer=ground__control__pb2.ServerStats.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'GroundControl', rpc_method_handlers)
@@ -164,6 +276,33 @@ class GroundControl(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetMapVersion(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GroundControl/GetMapVersion',
+            ground__control__pb2.MapRequest.SerializeToString,
+            ground__control__pb2.MapVersion.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetCommands(request,
             target,
@@ -218,6 +357,33 @@ class GroundControl(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetMineSerials(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GroundControl/GetMineSerials',
+            ground__control__pb2.SerialNumsRequest.SerializeToString,
+            ground__control__pb2.SerialNumsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def ReportStatus(request,
             target,
@@ -271,3 +437,138 @@ class GroundControl(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def SharePins(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GroundControl/SharePins',
+            ground__control__pb2.MinePins.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReportBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GroundControl/ReportBatch',
+            ground__control__pb2.ReportBatchRequest.SerializeToString,
+            google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RoverSession(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/GroundControl/RoverSession',
+            ground__control__pb2.RoverMessage.SerializeToString,
+            ground__control__pb2.GroundMessage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchMap(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/GroundControl/WatchMap',
+            ground__control__pb2.WatchMapRequest.SerializeToString,
+            ground__control__pb2.CellUpdate.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetServerStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GroundControl/GetServerStats',
+            ground__control__pb2.StatsRequest.SerializeToString,
+            ground__control__pb2.ServerStats.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
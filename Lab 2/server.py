@@ -1,7 +1,17 @@
 import grpc
-import requests
+import os
+import queue
 from concurrent import futures
-from src.models import Cell, ServerMap
+from src.models import ServerMap
+from common.shared_map import attach_map
+from common.fetch import FetchError
+from common.commands import source_from_env
+from common.map_cache import add_servicer_to_server
+from common.ledger import Ledger
+from src.ground_control import GroundControl, InvalidPosition
+from common.server_stats import ServerStats, StatsInterceptor
+from common.stream_slots import StreamSlots
+from common.cache import CommandCache
 import logging
 
 from rpc import ground_control_pb2 as gc_pb2
@@ -12,69 +22,125 @@ from rpc import ground_control_pb2_grpc as gc_pb2_grpc
 #============================================
 map_file_path = "./res/map.txt"
 mine_file_path = "./res/mines.txt"
-baseURL = "https://coe892.reev.dev/lab1/rover/"
+baseURL = os.environ.get("ROVER_API_URL", "https://coe892.reev.dev/lab1/rover/")     #point at common/stub_server.py to run offline
 HOST = "localhost"
-PORT = 5001
+PORT = int(os.environ.get("GROUND_CONTROL_PORT", 5001))          #replicas.py gives each replica its own port
+REUSE_PORT = os.environ.get("GROUND_CONTROL_REUSEPORT") == "1"  #let other replicas listen on the same port
+SHARED_MAP = os.environ.get("GROUND_CONTROL_SHARED_MAP")        #map published in shared memory by replicas.py
+ROVER_IDS = range(1, 11)
+COMMAND_TTL = 300           #seconds
+COMMAND_REFRESH = 30        #seconds
+MAX_WORKERS = 32
+STREAM_WORKERS = 24         #pool threads open streams may hold, the rest stay free for unary calls.
+                            #A rover holds one for its map watch and one more while its session is open
+STATS_DUMP_INTERVAL = None  #seconds between call statistics in the log. None = only through GetServerStats
+LEDGER_PATH = os.environ.get("GROUND_CONTROL_LEDGER", "./out/ledger.bin")  #append-only record of every pin and status reported
 
 
 
 class GroundControlService(gc_pb2_grpc.GroundControlServicer):
+    """Thread-pool servicer. The answers come from the shared GroundControl handlers"""
     
     def GetMap(self, request, context):
-        
-        print("\nMap requested")
-        
-        #Protobuf format conversion
-        map_array = map.array_repr()
-        map_rows = [gc_pb2.MapRow(cells=row) for row in map_array]
-        
-        return gc_pb2.MapResponse(grid=map_rows, numRows = map.num_rows, numCols = map.num_cols)
+        return ground_control.get_map()
+    
+    def GetMapVersion(self, request, context):
+        return ground_control.get_map_version()
     
     def GetCommands(self, request, context):
         
         rover_id = request.rover_id
         print(f"Commands requested for Rover {rover_id}")
         
-        endpoint = f"{baseURL}/{str(rover_id)}"
-        response = requests.get(endpoint).json()
-        
-        #Parse the json response body
-        moves:str = response["data"]["moves"]
+        try:
+            moves:str = command_cache.get(rover_id)
+        except FetchError as e:
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
         
         return gc_pb2.CommandResponse(commands=moves)
     
     def GetMineSerial(self, request, context):
         
-        x_pos, y_pos = request.x_pos, request.y_pos
-        print(f"Serial number requested for cell ({x_pos},{y_pos})")
-        
-        cell: Cell = map.cells[y_pos][x_pos]
-        serial = cell.mine_serial
+        try:
+            return ground_control.get_mine_serial(request)
+        except InvalidPosition as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+    
+    def GetMineSerials(self, request, context):
         
-        return gc_pb2.SerialNumResponse(serialNum = serial)
+        try:
+            return ground_control.get_mine_serials(request)
+        except InvalidPosition as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
     
     def ReportStatus(self, request, context):
         
-        rover_id = request.rover_id
-        success = "Completed" if request.success == True else "Failure"
-        message = request.msg
-        
-        print(f"[STATUS REPORT: ROVER {rover_id}]: {success}")
-        print(f"   {message}")
+        ground_control.record_status(request)
         return gc_pb2.google_dot_protobuf_dot_empty__pb2.Empty()
     
     def ShareMinPin(self, request, context):
         
-        rover_id = request.rover_id
-        pin = request.pin
+        try:
+            ground_control.record_pin(request.rover_id, request)
+        except InvalidPosition as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        return gc_pb2.google_dot_protobuf_dot_empty__pb2.Empty()
+    
+    def SharePins(self, request, context):
+        
+        try:
+            ground_control.record_pins(request.pins)
+        except InvalidPosition as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        return gc_pb2.google_dot_protobuf_dot_empty__pb2.Empty()
+    
+    def ReportBatch(self, request, context):
         
-        print(f"[PIN REPORT: ROVER {rover_id}]: {pin}")
+        try:
+            ground_control.report_batch(request)
+        except InvalidPosition as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
         return gc_pb2.google_dot_protobuf_dot_empty__pb2.Empty()
     
+    def RoverSession(self, request_iterator, context):
+        """One stream per rover. Messages are handled in order and only serial requests get a reply.
+        The stream holds one of the pool's threads for as long as it is open, so prefer aio_server.py for many rovers."""
+        
+        with stream_slots.hold(context):
+            for message in request_iterator:
+                try:
+                    reply = ground_control.handle_session_message(message)
+                except InvalidPosition as e:
+                    context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+                if reply is not None:
+                    yield reply
+    
+    def WatchMap(self, request, context):
+        """Cleared mines after the rover's map version, then every mine cleared while the stream is open.
+        Like RoverSession, the stream holds one of the pool's threads while it is open."""
+        
+        with stream_slots.hold(context):
+            updates: queue.Queue = queue.Queue()
+            ground_control.watch_hub.subscribe(request.since_version, updates.put)
+            
+            #Wakes the loop below when the rover cancels the stream
+            context.add_callback(lambda: updates.put(None))
+            try:
+                while (update := updates.get()) is not None:
+                    yield update
+            finally:
+                ground_control.watch_hub.unsubscribe(updates.put)
+    
+    def GetServerStats(self, request, context):
+        
+        #Per-method latencies and in-flight counts recorded by the stats interceptor
+        return server_stats.to_proto()
+    
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    gc_pb2_grpc.add_GroundControlServicer_to_server(GroundControlService(), server)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=MAX_WORKERS), interceptors=[StatsInterceptor(server_stats)],
+                         options=[("grpc.so_reuseport", int(REUSE_PORT))])
+    add_servicer_to_server(GroundControlService(), server)
     server.add_insecure_port(f"{HOST}:{PORT}")
     server.start()
     logging.info(f"Server started on port {PORT}. Listening...\n")
@@ -86,8 +152,33 @@ if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     logging.info("Log configured")
     
-    #Initialize the map into memory
-    map = ServerMap(map_file_path, mine_file_path)
+    #Initialize the map into memory. Replicas build theirs from the copy replicas.py shared
+    map = attach_map(SHARED_MAP, ServerMap) if SHARED_MAP else ServerMap(map_file_path, mine_file_path)
     logging.info("Map initialized")
+    
+    #Every reported pin and status is appended to the ledger. Replaying its pins
+    #keeps the mines cleared before a restart cleared
+    ledger = Ledger(LEDGER_PATH)
+    ground_control = GroundControl(map, ledger)
+    ground_control.replay_ledger()
+    
+    #Call statistics of every RPC, recorded by the stats interceptor
+    server_stats = ServerStats(workers=MAX_WORKERS)
+    if STATS_DUMP_INTERVAL is not None:
+        server_stats.start_dumping(STATS_DUMP_INTERVAL)
+    
+    #Streams past STREAM_WORKERS are turned away, so they can't take the threads every rover's unary calls need
+    stream_slots = StreamSlots(STREAM_WORKERS)
+    
+    #Pooled client for the rover command API, with deadlines, retries and hedging.
+    #ROVER_COMMAND_SOURCE switches to a recorded fixture or synthetic commands
+    command_source = source_from_env(baseURL, fixture_path="./res/commands.json", max_concurrency=10)
+    
+    #Prefetch every rover's commands so GetCommands is a memory lookup
+    command_cache = CommandCache(command_source, ROVER_IDS, ttl=COMMAND_TTL, refresh_interval=COMMAND_REFRESH)
+    command_cache.start()
 
-    serve()
\ No newline at end of file
+    try:
+        serve()
+    finally:
+        ledger.close()
\ No newline at end of file
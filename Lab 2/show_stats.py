@@ -0,0 +1,56 @@
+"""Prints a running GroundControl server's call statistics, from its GetServerStats RPC.
+
+    python show_stats.py                    once
+    python show_stats.py --every 5          every 5 seconds until interrupted
+    python show_stats.py --histogram        with each method's latency histogram
+"""
+import argparse
+import time
+
+import grpc
+
+from rpc import ground_control_pb2 as gc_pb2
+from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+import common_path     #server_stats is shared with the other labs
+from common.server_stats import format_stats
+
+#============================================
+# Constants
+#============================================
+HOST = "localhost"
+PORT = 5001
+
+
+def print_histograms(stats: gc_pb2.ServerStats):
+    """Prints the non-empty buckets of each method's latency histogram"""
+
+    labels = [f"<= {bound:g} ms" for bound in stats.bucket_bounds_ms] + [f"> {stats.bucket_bounds_ms[-1]:g} ms"]
+    for method in stats.methods:
+        print(f"\n   {method.method}")
+        widest = max(method.bucket_counts, default=0) or 1
+        for label, count in zip(labels, method.bucket_counts):
+            if count:
+                print(f"   {label:>12} {count:>8} {'#' * max(1, round(40 * count / widest))}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--every", type=float, default=None, help="Repeat every this many seconds")
+    parser.add_argument("--histogram", action="store_true", help="Also print the latency histograms")
+    args = parser.parse_args()
+
+    with grpc.insecure_channel(f"{HOST}:{PORT}") as channel:
+        stub = gc_pb2_grpc.GroundControlStub(channel)
+        try:
+            while True:
+                stats = stub.GetServerStats(gc_pb2.StatsRequest())
+                print("\n".join(format_stats(stats)))
+                if args.histogram:
+                    print_histograms(stats)
+                if args.every is None:
+                    break
+                time.sleep(args.every)
+                print()
+        except KeyboardInterrupt:
+            pass
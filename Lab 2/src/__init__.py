@@ -0,0 +1 @@
+import common_path     #the modules shared with the other labs import as the `common` package
@@ -0,0 +1,143 @@
+"""Request handling shared by the GroundControl servers.
+
+`server.py` and `aio_server.py` differ only in how a call waits: on a pool thread or on the event
+loop. What a call answers from the map, and what a report records, is the same for both, so their
+servicers hand every request to one `GroundControl` and only do the waiting themselves.
+"""
+import logging
+
+from rpc import ground_control_pb2 as gc_pb2
+from common.ledger import Ledger, PIN
+from common.map_cache import MapResponseCache
+from .map_watch import MapWatchHub
+from .models import Cell, ServerMap
+
+
+class InvalidPosition(ValueError):
+    """A request named a cell outside the map. The servicers answer it with INVALID_ARGUMENT."""
+
+
+class GroundControl():
+    """The server's map, ledger and map watch hub, and the handlers that answer from them"""
+
+    def __init__(self, map: ServerMap, ledger: Ledger):
+        """
+        Args:
+            map (ServerMap): Map the rovers are served, loaded from the map files or shared memory
+            ledger (Ledger): Ledger every reported pin and status is appended to
+        """
+        self.map = map
+        self.ledger = ledger
+        self.map_cache = MapResponseCache(map)      #GetMap responses, serialized once per map version
+        self.watch_hub = MapWatchHub(map)           #clears mines and pushes the changes to WatchMap streams
+
+    def replay_ledger(self):
+        """Replays the pins on record, so the mines cleared before a restart stay cleared.
+        A pin outside the map, e.g. recorded against other map files, is skipped with a warning."""
+
+        for entry in self.ledger.entries:
+            if entry.kind != PIN:
+                continue
+            try:
+                self.check_position(entry.x_pos, entry.y_pos)
+            except InvalidPosition as e:
+                logging.warning(f"Skipping ledger pin of rover {entry.rover_id}: {e}")
+                continue
+            self.watch_hub.report_pin(entry.rover_id, gc_pb2.MinePin(rover_id=entry.rover_id, pin=entry.text,
+                                                                     x_pos=entry.x_pos, y_pos=entry.y_pos))
+        logging.info(f"Ledger replayed: {len(self.ledger.entries)} entries, map version {self.map.version}")
+
+    def check_position(self, x_pos: int, y_pos: int):
+        """Raises InvalidPosition unless the position is a cell of the map. Unchecked, a negative
+        position would index the grid from its far end and a large one would raise IndexError."""
+
+        if not (0 <= x_pos < self.map.num_cols and 0 <= y_pos < self.map.num_rows):
+            raise InvalidPosition(f"Position ({x_pos},{y_pos}) is outside the {self.map.num_cols}x{self.map.num_rows} map")
+
+    def get_map(self) -> bytes:
+
+        print("\nMap requested")
+
+        #Serialized once per map version and shared by every request
+        return self.map_cache.get()
+
+    def get_map_version(self) -> gc_pb2.MapVersion:
+
+        #Lets clients skip GetMap when their cached copy is current
+        return gc_pb2.MapVersion(map_id = self.map.map_id, version = self.map.version)
+
+    def get_mine_serial(self, request) -> gc_pb2.SerialNumResponse:
+
+        x_pos, y_pos = request.x_pos, request.y_pos
+        print(f"Serial number requested for cell ({x_pos},{y_pos})")
+
+        self.check_position(x_pos, y_pos)
+        cell: Cell = self.map.cells[y_pos][x_pos]
+        return gc_pb2.SerialNumResponse(serialNum = cell.mine_serial)
+
+    def get_mine_serials(self, request) -> gc_pb2.SerialNumsResponse:
+
+        print(f"Serial numbers requested for {len(request.positions)} cells")
+
+        for position in request.positions:
+            self.check_position(position.x_pos, position.y_pos)
+        serials = [self.map.cells[position.y_pos][position.x_pos].mine_serial for position in request.positions]
+        return gc_pb2.SerialNumsResponse(serialNums = serials)
+
+    def report_batch(self, request):
+        """Reports from any number of rovers. Pins first, so a rover's status never comes before its pins.
+        A pin outside the map rejects the whole batch before any of it is recorded."""
+
+        self.record_pins(request.pins)
+
+        for report in request.telemetry:
+            self.record_telemetry(report.rover_id, report.telemetry)
+
+        for status in request.statuses:
+            self.record_status(status)
+
+    def handle_session_message(self, message) -> gc_pb2.GroundMessage:
+        """Handles one `RoverSession` message. Returns the reply to a serial request, None for anything else."""
+
+        rover_id = message.rover_id
+
+        match message.WhichOneof("payload"):
+            case "telemetry":
+                self.record_telemetry(rover_id, message.telemetry)
+            case "serial_request":
+                serial_res = self.get_mine_serial(message.serial_request)
+                return gc_pb2.GroundMessage(seq=message.seq, serial=serial_res)
+            case "pin":
+                self.record_pin(rover_id, message.pin)
+            case "status":
+                self.record_status(message.status)
+
+        return None
+
+    def record_telemetry(self, rover_id: int, telemetry):
+        logging.debug(f"[TELEMETRY: ROVER {rover_id}]: ({telemetry.x_pos},{telemetry.y_pos}) {telemetry.orientation}, command {telemetry.command_index}")
+
+    def record_pins(self, pins):
+        """Records a batch of pins. A pin outside the map rejects the batch before any of it is recorded."""
+
+        for pin in pins:
+            self.check_position(pin.x_pos, pin.y_pos)
+        for pin in pins:
+            self.record_pin(pin.rover_id, pin)
+
+    def record_pin(self, rover_id: int, pin):
+        """Prints and records a reported pin. A correct pin clears the mine for every rover.
+        A pin outside the map raises InvalidPosition and is never written to the ledger."""
+
+        self.check_position(pin.x_pos, pin.y_pos)
+        print(f"[PIN REPORT: ROVER {rover_id}]: {pin.pin}")
+        self.ledger.record_pin(rover_id, pin.pin, pin.x_pos, pin.y_pos)
+        self.watch_hub.report_pin(rover_id, pin)
+
+    def record_status(self, status):
+        """Prints and records a rover's final status"""
+
+        success = "Completed" if status.success == True else "Failure"
+        print(f"[STATUS REPORT: ROVER {status.rover_id}]: {success}")
+        print(f"   {status.msg}")
+        self.ledger.record_status(status.rover_id, status.success, status.msg)
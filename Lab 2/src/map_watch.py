@@ -0,0 +1,57 @@
+"""Server side of the `WatchMap` stream.
+
+GroundControl owns which mines are cleared. `MapWatchHub` applies each verified pin to the
+server map and pushes the change to every watching rover, so no rover digs a mine another
+rover has already cleared. The rover side is `session.MapWatch`.
+"""
+import threading
+from typing import Callable
+
+from rpc import ground_control_pb2 as gc_pb2
+from .models import ServerMap, check_pin
+
+
+class MapWatchHub():
+    """Clears mines on the server map and publishes each change to the subscribed watchers"""
+
+    def __init__(self, map: ServerMap):
+        self.map = map
+        self._lock = threading.Lock()
+        self._updates: list[gc_pb2.CellUpdate] = []     #every change since the map was loaded, in version order
+        self._watchers: list[Callable[[gc_pb2.CellUpdate], None]] = []
+
+    def report_pin(self, rover_id: int, pin: gc_pb2.MinePin) -> gc_pb2.CellUpdate:
+        """Clears the mine a pin was reported for, if the pin is right for it.
+        Returns the published update, or None if nothing changed."""
+
+        cell = self.map.cells[pin.y_pos][pin.x_pos]
+        if cell.value != "MINE" or not check_pin(cell.mine_serial, pin.pin):
+            return None
+
+        with self._lock:
+            if not self.map.clear_mine(pin.x_pos, pin.y_pos):
+                return None
+
+            update = gc_pb2.CellUpdate(x_pos=pin.x_pos, y_pos=pin.y_pos, value="EMPTY", version=self.map.version,
+                                       rover_id=rover_id)
+            self._updates.append(update)
+
+            #Published under the lock so every watcher sees the changes in version order
+            for watcher in self._watchers:
+                watcher(update)
+
+        return update
+
+    def subscribe(self, since_version: int, watcher: Callable[[gc_pb2.CellUpdate], None]):
+        """Sends `watcher` every change after `since_version`, then each new one as it happens.
+        `watcher` is called with the hub's lock held, so it must not block."""
+
+        with self._lock:
+            for update in self._updates:
+                if update.version > since_version:
+                    watcher(update)
+            self._watchers.append(watcher)
+
+    def unsubscribe(self, watcher: Callable[[gc_pb2.CellUpdate], None]):
+        with self._lock:
+            self._watchers.remove(watcher)
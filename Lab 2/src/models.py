@@ -1,7 +1,11 @@
 import logging
+from concurrent.futures import CancelledError, Future
 from hashlib import sha256
 from rpc import ground_control_pb2 as gc_pb2
 from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+from .pins import SharedPins
+from .reports import ReportQueue
+from .session import MapWatch, RoverSession
 
 """All the data models for the Rover application"""
     
@@ -10,6 +14,12 @@ logger = logging
 logger.basicConfig(level=logging.INFO, format="%(levelname)-2s [%(filename)s:%(lineno)d] %(message)s")
 
 
+def check_pin(serial: str, pin: str, prefix: str = "000000") -> bool:
+    """Whether `pin` solves the mine with the given serial"""
+    
+    return serial is not None and sha256((pin + serial).encode()).hexdigest().startswith(prefix)
+
+
 class Cell():
     """Represents a single cell on the map"""
     
@@ -25,6 +35,13 @@ class Cell():
         
     def __repr__(self):
         return f"Cell({self.x_coord}, {self.y_coord}, {self.value})"
+    
+    def __getstate__(self):
+        #Neighbour links are left out so pickling doesn't recurse across the whole grid. Map restores them
+        state = self.__dict__.copy()
+        for link in ("up", "down", "left", "right"):
+            state[link] = None
+        return state
 
      
 class Map():
@@ -36,6 +53,9 @@ class Map():
         self.num_rows = num_rows
         self.num_cols = num_cols
         
+        #Bumped whenever the grid changes, so cached copies of it know to rebuild
+        self.version: int = 0
+        
         for row_index, row in enumerate(grid):
             temp_row = []
             for col_index, cell in enumerate(row):
@@ -63,6 +83,10 @@ class Map():
                 if col < self.num_cols - 1:
                     cell.right = self.cells[row][col + 1]
             
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._link_cells()
+        
     def print_grid(self):
         """Print the map grid with character representations of empty cells and mines."""
         for row in self.cells:
@@ -98,6 +122,9 @@ class ServerMap(Map):
         
         super().__init__(grid, num_rows, num_cols)
         
+        #Identifies this map to clients caching it, so a restart with different files is noticed
+        self.map_id: str = sha256(f"{num_rows} {num_cols}\n{grid}".encode()).hexdigest()[:16]
+        
         #Process the mine file and add mine serials into the data structure
         with open(mine_file_path, "r") as mine_f:
             mine_serials = [line.strip() for line in mine_f]
@@ -109,21 +136,155 @@ class ServerMap(Map):
                 if cell.value == "MINE":
                     cell.mine_serial = mine_serials[serial_cntr % num_serials]
                     serial_cntr += 1
+        
+    def clear_mine(self, x_pos: int, y_pos: int) -> bool:
+        """Marks a mine as cleared. Returns False if there was no mine at the position."""
+        
+        cell: Cell = self.cells[y_pos][x_pos]
+        if cell.value != "MINE":
+            return False
+        
+        cell.value = "EMPTY"
+        self.version += 1
+        return True
     
        
 class Rover():
     """A class representing the Rover object"""
     
-    def __init__(self, id: int, map: Map, commands: str, stub: gc_pb2_grpc.GroundControlStub, start_x: int = 0, start_y: int = 0):
+    telemetry_interval: int = 10        #commands between position reports
+    
+    def __init__(self, id: int, map: Map, commands: str, stub: gc_pb2_grpc.GroundControlStub, start_x: int = 0, start_y: int = 0,
+                 pins: SharedPins = None, reports: ReportQueue = None):
         self.id: int = id
         self.commands: list = list(commands)
         self.stub: gc_pb2_grpc.GroundControlStub = stub         #lets rover comm w/ server on its own
         self.path_array: list[list[str]] = [["0" for _ in range(map.num_cols)] for _ in range(map.num_rows)]
         
         #Initialize the rover to the starting position. Default = cell(0, 0)
+        self.map: Map = map
         self.position: Cell = map.cells[start_y][start_x]
         self.orientation: str = "DOWN"
         
+        #Serials of the mines the rover will dig, fetched up front. (x, y) -> serial
+        self.serials: dict[tuple[int, int], str] = {}
+        
+        #Stream to ground control for serial requests, pins, telemetry and the final status. Opened on first use,
+        #so with batched reports and prefetched serials a run never holds one
+        self.session: RoverSession = None
+        
+        #Mines cleared by other rovers are applied to the map through this stream while running
+        self.watch: MapWatch = None
+        
+        #Optional pipeline: pins of upcoming mines are solved while the rover drives, in jobs shared with the
+        #other rovers of the process. The jobs this rover holds, serial -> pin
+        self.pins: SharedPins = pins
+        self.pin_futures: dict[str, Future] = {}
+        
+        #Optional batched reporting, possibly shared with other rovers. Without it reports go over the session
+        self.reports: ReportQueue = reports
+        
+        
+    def scan_mines(self) -> list[Cell]:
+        """Dry-runs the commands against the map and returns the mines the rover will dig, in order.
+        Nothing is mined and the rover is left where it started."""
+        
+        start_position, start_orientation = self.position, self.orientation
+        mines: list[Cell] = []
+        dug: set[Cell] = set()
+        
+        for cmd in self.commands:
+            on_mine = self.position.value == "MINE" and self.position not in dug
+            
+            #The rover is destroyed here, so nothing after this is reached
+            if on_mine and cmd != "D":
+                break
+            
+            if cmd == "D":
+                if on_mine:
+                    mines.append(self.position)
+                    dug.add(self.position)
+                continue
+            
+            self.move(cmd)
+            
+        self.position, self.orientation = start_position, start_orientation
+        return mines
+    
+    def fetch_serials(self):
+        """Fetches the serials of every mine the rover will dig in one GetMineSerials call"""
+        
+        mines = self.scan_mines()
+        if not mines:
+            return
+        
+        positions = [gc_pb2.SerialNumRequest(x_pos=cell.x_coord, y_pos=cell.y_coord) for cell in mines]
+        serials_res = self.stub.GetMineSerials(gc_pb2.SerialNumsRequest(positions=positions))
+        
+        self.serials = {(cell.x_coord, cell.y_coord): serial for cell, serial in zip(mines, serials_res.serialNums)}
+        print(f"[ROVER {self.id}]: Serial numbers fetched for {len(self.serials)} mines")
+        
+    def solve_pins_ahead(self):
+        """Starts solving the pins of every prefetched mine in the pin pool, nearest mine first.
+        Mines that share a serial share one job, with every rover of the process."""
+        
+        for serial in self.serials.values():
+            if serial not in self.pin_futures:
+                self.pin_futures[serial] = self.pins.solve(self.id, serial)
+        print(f"[ROVER {self.id}]: Solving {len(self.pin_futures)} pins ahead of the rover")
+        
+    def report_telemetry(self, command_index: int):
+        """Reports the rover's position without waiting"""
+        
+        x_pos, y_pos = self.position.x_coord, self.position.y_coord
+        if self.reports is not None:
+            self.reports.telemetry(self.id, x_pos, y_pos, self.orientation, command_index)
+        else:
+            self.open_session().telemetry(x_pos, y_pos, self.orientation, command_index)
+        
+    def report_pin(self, pin: str):
+        """Reports the pin of the mine under the rover without waiting"""
+        
+        x_pos, y_pos = self.position.x_coord, self.position.y_coord
+        if self.reports is not None:
+            self.reports.pin(self.id, pin, x_pos, y_pos)
+        else:
+            self.open_session().report_pin(pin, x_pos, y_pos)
+        
+    def on_cell_update(self, update: gc_pb2.CellUpdate):
+        """Called on the watch thread after a map change from ground control is applied.
+        Gives up the pin of a mine another rover has cleared, unless another mine ahead needs it."""
+        
+        if update.rover_id == self.id or update.value != "EMPTY":
+            return
+        
+        serial = self.serials.get((update.x_pos, update.y_pos))
+        if serial is None:
+            return
+        print(f"[ROVER {self.id}]: Mine at ({update.x_pos}, {update.y_pos}) was cleared by rover {update.rover_id}")
+        self.release_pin(serial)
+        
+    def release_pin(self, serial: str):
+        """Gives up the rover's pin job for a serial once no mine left ahead has it"""
+        
+        still_needed = any(other == serial and self.map.cells[y][x].value == "MINE" for (x, y), other in self.serials.items())
+        if serial in self.pin_futures and not still_needed:
+            self.pins.release(self.id, serial)
+        
+    def open_session(self) -> RoverSession:
+        """The rover's session stream, opened the first time it is needed"""
+        
+        if self.session is None:
+            self.session = RoverSession(self.stub, self.id)
+        return self.session
+        
+    def get_serial(self, cell: Cell) -> str:
+        """Returns a mine's serial, from the prefetched serials if possible"""
+        
+        serial = self.serials.get((cell.x_coord, cell.y_coord))
+        if serial is None:
+            serial = self.open_session().request_serial(cell.x_coord, cell.y_coord).result()
+        return serial
         
     def move(self, command: str) -> bool:
         "Moves the rover in the direction specified by the command and updates position and orientation."
@@ -161,24 +322,40 @@ class Rover():
                         self.orientation = "DOWN"
             case "D":
                 
+                #Another rover may have cleared it since the rover got here
+                if self.position.value != "MINE":
+                    return True
+                
+                #Or be digging it already. Claims are shared in the process, so this needs no round trip to ground control
+                x_pos, y_pos = self.position.x_coord, self.position.y_coord
+                if self.pins is not None and (digger := self.pins.claim(self.id, x_pos, y_pos)) != self.id:
+                    print(f"[ROVER {self.id}]: Mine at ({x_pos}, {y_pos}) is already dug by rover {digger}")
+                    self.position.value = "EMPTY"
+                    if (x_pos, y_pos) in self.serials:
+                        self.release_pin(self.serials[(x_pos, y_pos)])
+                    return True
+                
                 print(f"[ROVER {self.id}]: Mine hit at ({self.position.x_coord}, {self.position.y_coord}). Fetching serial number")
                 
-                #Request the mine serial number
-                serial_res = self.stub.GetMineSerial(gc_pb2.SerialNumRequest(x_pos=self.position.x_coord, y_pos=self.position.y_coord))
-                serial_num = serial_res.serialNum
+                #Look up the mine serial number. Normally prefetched by fetch_serials
+                serial_num = self.get_serial(self.position)
                 
                 print(f"[ROVER {self.id}]: Serial number fetched: {serial_num}. Begin digging...")
                 
                 #Mine the mine
                 pin = self.mine(serial_num)
                 
+                if pin is None and self.position.value != "MINE":
+                    print(f"[ROVER {self.id}]: Mine at ({self.position.x_coord}, {self.position.y_coord}) was cleared by another rover while digging")
+                    return True
+                
                 if pin is None:
                     #print(f"[ROVER {self.id}]: Failed to mine mine with serial {self.position.mine_serial}. Rover destroyed.")
                     raise Exception("Mining failed for unknown reason")
                 
                 
-                #Report the pin to the server
-                self.stub.ShareMinPin(gc_pb2.MinePin(rover_id=self.id, pin=str(pin)))
+                #Report the pin to the server. Only queued, so the rover doesn't wait
+                self.report_pin(str(pin))
                 print(f"[ROVER {self.id}]: Mine pin {pin} reported to server.")
                 
         return True
@@ -190,10 +367,21 @@ class Rover():
         report_msg = ""
         success = True
         
-        for cmd in self.commands:
+        #Follow the mines other rovers clear, starting with those cleared since the map was fetched
+        self.watch = MapWatch(self.stub, self.id, self.map, on_update=self.on_cell_update)
+        
+        #Get every serial the run will need before starting, so mining needs no round trips
+        self.fetch_serials()
+        if self.pins is not None:
+            self.solve_pins_ahead()
+        
+        for index, cmd in enumerate(self.commands):
             #Mark position in path array
             self.path_array[self.position.y_coord][self.position.x_coord] = "*"
             
+            if index % self.telemetry_interval == 0:
+                self.report_telemetry(index)
+            
             #print(f"[ROVER {self.id}]: Executing command {cmd}. Current pos: ({self.position.x_coord},{self.position.y_coord}) Orientation: {self.orientation}")
             
             #First check the termination case: rover is on a mine and does not dig
@@ -214,8 +402,19 @@ class Rover():
                 success = False
                 break
             
-        #Report the rover's status to the server
-        self.stub.ReportStatus(gc_pb2.ExecutionStatus(rover_id=self.id, success=success, msg=report_msg))
+        #Drop pins that are no longer needed, unless another rover still waits for them
+        for serial in self.pin_futures:
+            self.pins.release(self.id, serial)
+        
+        #Report the rover's status to the server, after everything reported before it
+        if self.reports is not None:
+            self.reports.status(self.id, success, report_msg)
+            if self.session is not None:
+                self.session.close()
+        else:
+            #This also ends the session once everything before it is delivered
+            self.open_session().close(success, report_msg)
+        self.watch.close()
             
     def hashKey(self, pin: str, serial: str) -> str:
         temp_key = pin + serial
@@ -232,9 +431,24 @@ class Rover():
             serial (str): The serial number of the mine
 
         Returns:
-           (bool) : True if the mine was successfully mined, False otherwise
+           (int) : The mine's pin, or None if the mine could not be mined
         """
         
+        #Pipelined mining: the pin is usually solved already
+        future = self.pin_futures.get(serial)
+        pin = None
+        if future is not None:
+            try:
+                pin = future.result()
+            except CancelledError:
+                #Dropped because another rover cleared this mine meanwhile
+                return None
+        if pin is not None:
+            hash_val = self.hashKey(str(pin), serial)
+            self.position.value = "EMPTY"
+            print(f"[MINE {serial}]: Dig Success. Pin: {pin} (solved ahead). Full hash: {hash_val}")
+            return pin
+        
         pin = 0
         while True:
             hash_val = self.hashKey(str(pin), serial)
@@ -0,0 +1,78 @@
+"""Pin solving shared by every rover in the process.
+
+Mines share serials, and rovers in one fleet often drive over the same mines. `SharedPins` gives
+every rover that needs a serial the same job in the pin pool, so each pin is solved once per
+process, and lets only the first rover to reach a mine dig it. The claim is made locally before
+digging starts, so it doesn't wait for the pin to reach ground control and come back over
+`WatchMap`, which only happens after the report queue's next batch.
+"""
+import threading
+from concurrent.futures import Executor, Future
+from hashlib import sha256
+
+
+def find_pin(serial: str, prefix: str = "000000") -> int:
+    """Brute forces the smallest pin whose sha256(pin + serial) hex digest starts with `prefix`.
+    Module level so it can run in a process pool."""
+
+    pin = 0
+    while not sha256((str(pin) + serial).encode()).hexdigest().startswith(prefix):
+        pin += 1
+    return pin
+
+
+class SharedPins():
+    """Pin jobs keyed by serial and the mines already claimed, shared by the rovers of one process"""
+
+    def __init__(self, pool: Executor):
+        """
+        Args:
+            pool (Executor): Pool the pins are solved in, normally a ProcessPoolExecutor
+        """
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Future] = {}              #serial -> pin job, kept once solved
+        self._wanted: dict[str, set[int]] = {}          #serial -> rovers still needing its pin
+        self._claimed: dict[tuple[int, int], int] = {}  #(x, y) -> rover digging or done digging the mine
+        self.submitted = 0
+        self.shared = 0
+
+    def solve(self, rover_id: int, serial: str) -> Future:
+        """The job solving `serial`, submitted on the first request and shared by every later one.
+        The rover keeps it alive until it calls `release`."""
+
+        with self._lock:
+            job = self._jobs.get(serial)
+            if job is None or job.cancelled():
+                job = self._jobs[serial] = self.pool.submit(find_pin, serial)
+                self.submitted += 1
+            else:
+                self.shared += 1
+            self._wanted.setdefault(serial, set()).add(rover_id)
+        return job
+
+    def release(self, rover_id: int, serial: str):
+        """The rover no longer needs the pin of `serial`. The job is cancelled once no rover does."""
+
+        with self._lock:
+            wanted = self._wanted.get(serial)
+            if wanted is None or rover_id not in wanted:
+                return
+            wanted.remove(rover_id)
+            if wanted:
+                return
+            del self._wanted[serial]
+
+            #A job already running can't be cancelled and is kept for the next rover that needs the serial
+            if self._jobs[serial].cancel():
+                del self._jobs[serial]
+
+    def claim(self, rover_id: int, x_pos: int, y_pos: int) -> int:
+        """Claims the mine at a position for digging. Returns the rover that holds the claim,
+        which is `rover_id` unless another rover claimed the mine first."""
+
+        with self._lock:
+            return self._claimed.setdefault((x_pos, y_pos), rover_id)
+
+    def __repr__(self) -> str:
+        return f"SharedPins(jobs={len(self._jobs)}, submitted={self.submitted}, shared={self.shared}, claimed={len(self._claimed)})"
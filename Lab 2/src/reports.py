@@ -0,0 +1,148 @@
+"""Batched, non-blocking reporting to ground control.
+
+`ReportQueue` takes pins, telemetry and final statuses from any number of rovers and sends
+them from a background thread, many per call, through the `ReportBatch` and `SharePins` RPCs.
+Rovers only ever put a report on the queue, so they never wait for the network. One queue can
+be shared by a whole fleet. `close` sends everything still queued.
+"""
+import logging
+import queue
+import threading
+import time
+
+import grpc
+
+from rpc import ground_control_pb2 as gc_pb2
+from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+
+_CLOSE = object()
+
+
+class ReportQueue():
+    """Collects rover reports and sends them in batches from a background thread"""
+
+    def __init__(self, stub: gc_pb2_grpc.GroundControlStub, batch_size: int = 64, linger: float = 0.05,
+                 retries: int = 3, timeout: float = 5.0):
+        """
+        Args:
+            stub (GroundControlStub): Stub the batches are sent with
+            batch_size (int): Most reports sent in one call
+            linger (float): Longest the first report of a batch waits for more to join it, in seconds
+            retries (int): Further attempts at a batch the server was unavailable for before it is dropped
+            timeout (float): Deadline of each call in seconds
+        """
+        self.stub = stub
+        self.batch_size = batch_size
+        self.linger = linger
+        self.retries = retries
+        self.timeout = timeout
+        self.batches = 0
+        self.reports = 0
+        self.dropped = 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._sender = threading.Thread(target=self._run, name="report-sender", daemon=True)
+        self._sender.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def pin(self, rover_id: int, pin: str, x_pos: int, y_pos: int):
+        """Queues the pin of the mine at (x_pos, y_pos). Returns immediately."""
+        self._put(gc_pb2.MinePin(rover_id=rover_id, pin=pin, x_pos=x_pos, y_pos=y_pos))
+
+    def telemetry(self, rover_id: int, x_pos: int, y_pos: int, orientation: str, command_index: int):
+        """Queues a position report. Returns immediately."""
+        position = gc_pb2.Telemetry(x_pos=x_pos, y_pos=y_pos, orientation=orientation, command_index=command_index)
+        self._put(gc_pb2.TelemetryReport(rover_id=rover_id, telemetry=position))
+
+    def status(self, rover_id: int, success: bool, msg: str = ""):
+        """Queues a rover's final status. Returns immediately."""
+        self._put(gc_pb2.ExecutionStatus(rover_id=rover_id, success=success, msg=msg))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Waits until everything queued so far has been sent. Returns False on timeout or if the sender has stopped."""
+        sent = threading.Event()
+        self._queue.put(sent)
+
+        #Wake up now and then so a sender that died doesn't leave us waiting forever
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not sent.is_set():
+            if not self._sender.is_alive():
+                return sent.is_set()
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                return False
+            sent.wait(wait)
+        return True
+
+    def close(self):
+        """Sends everything still queued and stops the sender"""
+        if not self._sender.is_alive():
+            return
+        self._queue.put(_CLOSE)
+        self._sender.join()
+
+    def _put(self, report):
+        if not self._sender.is_alive():
+            raise RuntimeError("Report queue is closed")
+        self._queue.put(report)
+
+    def _run(self):
+        closing = False
+        while not closing:
+            item = self._queue.get()
+
+            #Let the batch fill for a moment before sending it
+            batch, waiters = [], []
+            deadline = time.monotonic() + self.linger
+            while True:
+                if item is _CLOSE:
+                    closing = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+
+                if closing or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            self._send(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _send(self, batch: list):
+        if not batch:
+            return
+
+        pins = [report for report in batch if isinstance(report, gc_pb2.MinePin)]
+        if len(pins) == len(batch):
+            send, request = self.stub.SharePins, gc_pb2.MinePins(pins=pins)
+        else:
+            #Statuses are applied after pins, so a rover's status never overtakes its pins
+            send, request = self.stub.ReportBatch, gc_pb2.ReportBatchRequest(
+                pins=pins,
+                telemetry=[report for report in batch if isinstance(report, gc_pb2.TelemetryReport)],
+                statuses=[report for report in batch if isinstance(report, gc_pb2.ExecutionStatus)])
+
+        for attempt in range(self.retries + 1):
+            try:
+                send(request, timeout=self.timeout)
+                self.batches += 1
+                self.reports += len(batch)
+                return
+            except grpc.RpcError as e:
+                #Only UNAVAILABLE means the batch never reached the server. After any other failure,
+                #a deadline in particular, the server may already have recorded it and a retry would record it twice
+                if e.code() != grpc.StatusCode.UNAVAILABLE or attempt == self.retries:
+                    self.dropped += len(batch)
+                    logging.warning(f"Dropped {len(batch)} reports after {attempt + 1} attempts: {e.code().name} {e.details()}")
+                    return
+                time.sleep(0.1 * 2 ** attempt)
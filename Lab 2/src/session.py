@@ -0,0 +1,139 @@
+"""Client side of a rover's streams to ground control.
+
+`RoverSession`: one long-lived bidirectional stream replaces a rover's separate `GetMineSerial`, `ShareMinPin`
+and `ReportStatus` calls. Messages are queued and sent in order without waiting for earlier
+replies, so telemetry and pin reports never block the rover and serial requests are pipelined.
+
+`MapWatch`: a `WatchMap` stream that applies the mines other rovers clear to the rover's map.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+import grpc
+
+from rpc import ground_control_pb2 as gc_pb2
+from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+
+_CLOSE = object()
+
+
+class RoverSession():
+    """An open session stream for one rover"""
+
+    def __init__(self, stub: gc_pb2_grpc.GroundControlStub, rover_id: int):
+        self.rover_id = rover_id
+        self._outbox: queue.Queue = queue.Queue()
+        self._pending: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._error: grpc.RpcError = None
+        self._closed = False
+
+        #The gRPC runtime pulls requests from the outbox on its own thread. Replies are read on ours
+        self._responses = stub.RoverSession(self._requests())
+        self._reader = threading.Thread(target=self._read, name=f"rover-{rover_id}-session", daemon=True)
+        self._reader.start()
+
+    def telemetry(self, x_pos: int, y_pos: int, orientation: str, command_index: int):
+        """Sends the rover's position. Does not wait for anything."""
+        self._send(telemetry=gc_pb2.Telemetry(x_pos=x_pos, y_pos=y_pos, orientation=orientation, command_index=command_index))
+
+    def request_serial(self, x_pos: int, y_pos: int) -> Future:
+        """Asks for a mine's serial. The returned future resolves to the serial once the reply arrives."""
+        future = Future()
+        self._send(serial_request=gc_pb2.SerialNumRequest(x_pos=x_pos, y_pos=y_pos), future=future)
+        return future
+
+    def report_pin(self, pin: str, x_pos: int, y_pos: int):
+        """Reports the pin of the mine at (x_pos, y_pos). Does not wait for anything."""
+        self._send(pin=gc_pb2.MinePin(rover_id=self.rover_id, pin=pin, x_pos=x_pos, y_pos=y_pos))
+
+    def close(self, success: bool = None, msg: str = ""):
+        """Sends the final status, unless it is reported elsewhere (None), ends the stream and waits until the server has read everything"""
+        if self._closed:
+            return
+        if success is not None:
+            self._send(status=gc_pb2.ExecutionStatus(rover_id=self.rover_id, success=success, msg=msg))
+        self._closed = True
+        self._outbox.put(_CLOSE)
+        self._reader.join()
+
+        if self._error is not None:
+            logging.warning(f"Rover {self.rover_id} session ended with an error: {self._error.details()}")
+
+    def _send(self, future: Future = None, **payload):
+        if self._closed:
+            raise RuntimeError("Rover session is closed")
+        if self._error is not None:
+            raise RuntimeError("Rover session failed") from self._error
+
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            if future is not None:
+                self._pending[seq] = future
+        self._outbox.put(gc_pb2.RoverMessage(rover_id=self.rover_id, seq=seq, **payload))
+
+    def _requests(self):
+        while True:
+            message = self._outbox.get()
+            if message is _CLOSE:
+                return
+            yield message
+
+    def _read(self):
+        try:
+            for reply in self._responses:
+                with self._lock:
+                    future = self._pending.pop(reply.seq, None)
+                if future is not None:
+                    future.set_result(reply.serial.serialNum)
+        except grpc.RpcError as e:
+            self._error = e
+            #Stop feeding a stream that is gone
+            self._outbox.put(_CLOSE)
+
+        #Anything still waiting will never get a reply
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError("Rover session ended before the reply arrived"))
+
+
+class MapWatch():
+    """Keeps a rover's local map in step with ground control's through a `WatchMap` stream"""
+
+    def __init__(self, stub: gc_pb2_grpc.GroundControlStub, rover_id: int, map,
+                 on_update: Callable[[gc_pb2.CellUpdate], None] = None):
+        """
+        Args:
+            stub (GroundControlStub): Stub to open the stream on
+            rover_id (int): The watching rover
+            map (Map): Local map the changes are applied to. Its version says which changes it already has
+            on_update (Callable): Called on the watch thread after each change is applied
+        """
+        self.map = map
+        self.on_update = on_update
+
+        self._updates = stub.WatchMap(gc_pb2.WatchMapRequest(rover_id=rover_id, since_version=map.version))
+        self._reader = threading.Thread(target=self._read, name=f"rover-{rover_id}-watch", daemon=True)
+        self._reader.start()
+
+    def close(self):
+        """Ends the stream"""
+        self._updates.cancel()
+        self._reader.join()
+
+    def _read(self):
+        try:
+            for update in self._updates:
+                self.map.cells[update.y_pos][update.x_pos].value = update.value
+                self.map.version = max(self.map.version, update.version)
+                if self.on_update is not None:
+                    self.on_update(update)
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.CANCELLED:
+                logging.warning(f"Map watch ended with an error: {e.details()}")
@@ -0,0 +1,172 @@
+"""asyncio (grpc.aio) version of the GroundControl server.
+
+`server.py` serves RPCs from a pool of ten threads, so at most ten calls are in flight and a
+`GetCommands` waiting on the rover API holds one of them. Here every handler is a coroutine
+and upstream fetches go through the async HTTP client, so thousands of rovers can hold calls
+at once. The Defused-Mines subscriber still runs on its own thread.
+"""
+import asyncio
+import grpc
+import os
+import threading
+from src.models import ServerMap
+from common.shared_map import attach_map
+from common.fetch import FetchError
+from common.commands import source_from_env
+from common.map_cache import add_servicer_to_server
+from common.cache import AsyncCommandCache
+from common.server_stats import AsyncStatsInterceptor, ServerStats
+from common.ledger import Ledger
+from src.defused_index import DefusedWatch
+from src.ground_control import GroundControl, InvalidPosition
+from server import subscribeToDefusedQueue
+
+from rpc import ground_control_pb2 as gc_pb2
+from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+
+#============================================
+# Constants
+#============================================
+map_file_path = "./res/map.txt"
+mine_file_path = "./res/mines.txt"
+baseURL = os.environ.get("ROVER_API_URL", "https://coe892.reev.dev/lab1/rover/")     #point at common/stub_server.py to run offline
+HOST = "localhost"
+PORT = int(os.environ.get("GROUND_CONTROL_PORT", 5001))          #replicas.py gives each replica its own port
+REUSE_PORT = os.environ.get("GROUND_CONTROL_REUSEPORT") == "1"  #let other replicas listen on the same port
+SHARED_MAP = os.environ.get("GROUND_CONTROL_SHARED_MAP")        #map published in shared memory by replicas.py
+ROVER_IDS = range(1, 11)
+COMMAND_TTL = 300           #seconds
+COMMAND_REFRESH = 30        #seconds
+UPSTREAM_CONCURRENCY = 100  #rover API requests in flight at once
+STATS_DUMP_INTERVAL = None  #seconds between printed call statistics. None = only through GetServerStats
+LEDGER_PATH = os.environ.get("GROUND_CONTROL_LEDGER", "./out/ledger.bin")  #append-only record of every defused mine reported
+
+
+
+class AsyncGroundControlService(gc_pb2_grpc.GroundControlServicer):
+    """asyncio servicer. The answers come from the same GroundControl handlers as server.py's"""
+
+    async def GetMap(self, request, context):
+        return ground_control.get_map()
+
+    async def GetMapVersion(self, request, context):
+        return ground_control.get_map_version()
+
+    async def GetCommands(self, request, context):
+
+        rover_id = request.rover_id
+        print(f"Commands requested for Rover {rover_id}")
+
+        try:
+            moves:str = await command_cache.get(rover_id)
+        except FetchError as e:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+
+        return gc_pb2.CommandResponse(commands=moves)
+
+    async def GetMineSerial(self, request, context):
+
+        try:
+            return ground_control.get_mine_serial(request)
+        except InvalidPosition as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+    async def GetMineSerials(self, request, context):
+
+        try:
+            return ground_control.get_mine_serials(request)
+        except InvalidPosition as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+    async def GetServerStats(self, request, context):
+
+        #Per-method latencies and in-flight counts recorded by the stats interceptor
+        return server_stats.to_proto()
+
+    async def GetDefusedStatus(self, request, context):
+        return ground_control.get_defused_status(request)
+
+    async def WatchDefused(self, request, context):
+        """Each requested mine once it is defused, right away if it already is. Ends when all of them are.
+        Without mines, every defused mine so far and then each new one until the rover cancels."""
+
+        watch = DefusedWatch(request.mines)
+        loop = asyncio.get_running_loop()
+        updates: asyncio.Queue = asyncio.Queue()
+
+        #The index calls watchers on the Defused-Mines subscriber thread
+        def watcher(status):
+            loop.call_soon_threadsafe(updates.put_nowait, status)
+
+        ground_control.defused_index.subscribe(watcher)
+        try:
+            while not watch.done:
+                status = await updates.get()
+                if watch.accept(status):
+                    yield status
+        finally:
+            ground_control.defused_index.unsubscribe(watcher)
+
+
+async def serve():
+    server = grpc.aio.server(interceptors=[AsyncStatsInterceptor(server_stats)], options=[("grpc.so_reuseport", int(REUSE_PORT))])
+    add_servicer_to_server(AsyncGroundControlService(), server)
+    server.add_insecure_port(f"{HOST}:{PORT}")
+    await server.start()
+    print(f"Async gRPC server started on port {PORT}. Listening...\n")
+
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(grace=1)
+
+
+async def main():
+    global command_cache
+
+    #The async client opens its connection pool on this event loop.
+    #Dig commands are removed once here, not on every request
+    command_cache = AsyncCommandCache(command_source, ROVER_IDS, ttl=COMMAND_TTL, refresh_interval=COMMAND_REFRESH,
+                                      transform=lambda moves: moves.replace("D", ""), max_concurrency=UPSTREAM_CONCURRENCY)
+    await command_cache.start()
+    print("Rover commands prefetched")
+
+    try:
+        await serve()
+    finally:
+        await command_cache.stop()
+        await command_source.aclose()
+
+if __name__ == "__main__":
+
+    print("Setting up application...")
+
+    #Initialize the map into memory. Replicas build theirs from the copy replicas.py shared
+    map = attach_map(SHARED_MAP, ServerMap) if SHARED_MAP else ServerMap(map_file_path, mine_file_path)
+    print("Map initialized")
+
+    #Every defused mine reported by a deminer is appended to the ledger and indexed by position,
+    #for GetDefusedStatus and WatchDefused
+    ledger = Ledger(LEDGER_PATH)
+    ground_control = GroundControl(map, ledger)
+    ground_control.replay_ledger()
+
+    #Call statistics of every RPC, recorded by the stats interceptor
+    server_stats = ServerStats()
+    if STATS_DUMP_INTERVAL is not None:
+        server_stats.start_dumping(STATS_DUMP_INTERVAL, emit=print)
+
+    #Pooled async client for the rover command API, with deadlines, retries and hedging.
+    #ROVER_COMMAND_SOURCE switches to a recorded fixture or synthetic commands
+    command_source = source_from_env(baseURL, fixture_path="./res/commands.json", max_concurrency=UPSTREAM_CONCURRENCY)
+
+    #Start subscription to Defused-Mines Queue
+    defused_thread = threading.Thread(target=subscribeToDefusedQueue, args=(ground_control,), daemon=True)
+    defused_thread.start()
+
+    try:
+        asyncio.run(main())     #Start gRPC server
+    except KeyboardInterrupt:
+        print("\n Keyboard Interrupt. Shutting down.")
+    finally:
+        ledger.close()
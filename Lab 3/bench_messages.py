@@ -0,0 +1,75 @@
+"""Cost of the Demine-Queue and Defused-Mines messages as protobuf vs the JSON they replaced.
+
+For each message type, encodes and decodes the same message many times both ways and reports
+the time per message, the body size and the bytes the message takes on the wire (content
+header frame plus body frame). The protobuf header is larger because it carries the content
+type, which is what tells the consumer how to decode the body.
+"""
+import argparse
+import json
+import timeit
+
+from pika import BasicProperties, frame
+
+from rpc import ground_control_pb2 as gc_pb2
+from src.messages import decode_defused_mine, decode_demine_task, encode
+
+#Sample messages, built the way rovers.py and deminers.py build them
+DEMINE_TASK = gc_pb2.DemineTask(rover_id=7, x_pos=12, y_pos=34, serial="8a2b3c4d5e")
+DEFUSED_MINE = gc_pb2.DefusedMine(deminer_id=2, rover_id=7, x_pos=12, y_pos=34, serial="8a2b3c4d5e",
+                                  pin="000000a1f2c3d4e5f60718293a4b5c6d7e8f90a1b2c3d4e5f60718293a4b5c6d")
+
+
+def legacy_demine_task(task: gc_pb2.DemineTask) -> dict:
+    """The JSON payload rovers used to publish"""
+    return {"id": task.rover_id, "position": {"x_pos": task.x_pos, "y_pos": task.y_pos}, "serial": task.serial}
+
+
+def legacy_defused_mine(defused: gc_pb2.DefusedMine) -> dict:
+    """The JSON payload deminers used to publish"""
+    return {"deminer_id": defused.deminer_id, "rover_id": defused.rover_id,
+            "position": {"x_pos": defused.x_pos, "y_pos": defused.y_pos}, "serial": defused.serial, "pin": defused.pin}
+
+
+def wire_size(body: bytes, properties) -> int:
+    """Bytes of the content header frame and body frame of a message"""
+    return len(frame.Header(1, len(body), properties).marshal()) + len(frame.Body(1, body).marshal())
+
+
+def measure(number: int, encode_message, decode_message) -> tuple[float, float]:
+    """Microseconds per encode and per decode"""
+
+    body, properties = encode_message()
+    encode_us = min(timeit.repeat(encode_message, number=number, repeat=3)) / number * 1e6
+    decode_us = min(timeit.repeat(lambda: decode_message(properties, body), number=number, repeat=3)) / number * 1e6
+    return encode_us, decode_us
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000, help="Encodes and decodes timed per variant")
+    args = parser.parse_args()
+
+    cases = (
+        ("DemineTask", DEMINE_TASK, legacy_demine_task, decode_demine_task),
+        ("DefusedMine", DEFUSED_MINE, legacy_defused_mine, decode_defused_mine),
+    )
+
+    print(f"{'message':<12} {'format':<9} {'encode us':>10} {'decode us':>10} {'body B':>7} {'wire B':>7}")
+
+    for name, message, legacy, decode in cases:
+        #Both formats must decode to the same message
+        body, properties = encode(message)
+        assert decode(properties, body) == message
+        assert decode(BasicProperties(), json.dumps(legacy(message)).encode()) == message
+
+        variants = (
+            ("protobuf", lambda: encode(message)),
+            ("json", lambda: (json.dumps(legacy(message)).encode(), BasicProperties())),
+        )
+        for variant, encode_message in variants:
+            body, properties = encode_message()
+            encode_us, decode_us = measure(args.number, encode_message, decode)
+            print(f"{name:<12} {variant:<9} {encode_us:10.2f} {decode_us:10.2f} {len(body):7} "
+                  f"{wire_size(body, properties):7}")
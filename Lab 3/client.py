@@ -1,19 +1,50 @@
 import grpc
+import socket
 from rpc import ground_control_pb2 as gc_pb2
 from rpc import ground_control_pb2_grpc as gc_pb2_grpc
 
 from src.models import Map
 from src.rovers import Rover
+from src.publisher import default_publisher
+from common.map_store import load_map, save_map
+from common.output import PathSink
 
 #============================================
 # Constants
 #============================================
 HOST = "localhost"
 PORT = 5001
+REPLICA_PORTS = None    #e.g. range(5001, 5005) to spread calls round-robin over the servers started by replicas.py
+ARCHIVE_PATH = None     #set to e.g. "./out/paths.bin" to write paths into one archive instead of path_{id}.txt files
+MAP_CACHE_PATH = "./cache/map.pickle"   #decoded map from the last launch. None disables the cache
+CONFIRM_TIMEOUT = 10.0  #seconds to wait at exit for RabbitMQ to confirm the demine tasks
+DEMINE_WINDOW = None    #e.g. 4 to have deminers reply to each task, with at most 4 outstanding. None = fire and forget
+REPLY_TIMEOUT = 300.0   #seconds to wait at exit for the deminers' replies
+
+
+def open_channel() -> grpc.Channel:
+    """Opens the channel to ground control. With REPLICA_PORTS set, it keeps a connection to every
+    replica and sends each call to the next one in turn."""
+    
+    if not REPLICA_PORTS:
+        return grpc.insecure_channel(f"{HOST}:{PORT}")
+    
+    #The ipv4: target lists every replica's address. round_robin balances calls over them
+    address = socket.gethostbyname(HOST)
+    target = "ipv4:" + ",".join(f"{address}:{port}" for port in REPLICA_PORTS)
+    return grpc.insecure_channel(target, options=[("grpc.lb_policy_name", "round_robin")])
 
 
 def fetch_map() -> Map:
-    """Fetch the map from the server and process it into a Map data structure"""
+    """Fetch the map from the server and process it into a Map data structure.
+    Loads the cached copy instead if the server's map hasn't changed since it was saved."""
+    
+    if MAP_CACHE_PATH is not None:
+        version_res = stub.GetMapVersion(gc_pb2.MapRequest())
+        map = load_map(MAP_CACHE_PATH, version_res.map_id, version_res.version)
+        if map is not None:
+            print(f"Map version {version_res.version} loaded from cache")
+            return map
     
     map_res = stub.GetMap(gc_pb2.MapRequest())
     
@@ -28,6 +59,10 @@ def fetch_map() -> Map:
     
     print("Map received and processed")
     
+    #Cache it before any rover changes it
+    if MAP_CACHE_PATH is not None:
+        save_map(MAP_CACHE_PATH, map_res.map_id, map_res.version, map)
+    
     return map
 
 
@@ -40,7 +75,7 @@ def init_rover(rover_id: int) -> Rover:
     commands:str = cmd_res.commands
     
     #Instantiate object
-    rover = Rover(id=rover_id, map=map, commands=commands, stub=stub)
+    rover = Rover(id=rover_id, map=map, commands=commands, stub=stub, publisher=publisher, demine_window=DEMINE_WINDOW)
     print(f"Commands received and processed: {commands}")
     
     return rover
@@ -59,7 +94,7 @@ if __name__ == "__main__":
     # Setup server communication
     #=================================================================
     try:
-        channel = grpc.insecure_channel(f"{HOST}:{PORT}")
+        channel = open_channel()
         stub = gc_pb2_grpc.GroundControlStub(channel)
     except Exception as e:
         print(f"Failed to establish communication with server")
@@ -75,6 +110,8 @@ if __name__ == "__main__":
     #=================================================================
     # Get rover commands and instantiate the Rover object
     #=================================================================
+    #Opens its RabbitMQ connection on the first demine task
+    publisher = default_publisher()
     rover = init_rover(id)
     print(f"Rover {rover.id} initialized")
     
@@ -85,9 +122,25 @@ if __name__ == "__main__":
     
     rover.run()
     
+    #In request-reply mode, the deminers' answers are still coming in
+    if rover.demines is not None:
+        print(f"[ROVER {rover.id}] Waiting for the deminers to reply...")
+        rover.demines.wait(REPLY_TIMEOUT)
+        rover.demines.close()
+        
+        stats = rover.demines.stats()
+        print(f"[ROVER {rover.id}] {stats['defused']} mines defused, {stats['timed_out']} timed out, "
+              f"{stats['unanswered']} unanswered")
+        if stats["defused"]:
+            print(f"[ROVER {rover.id}] Round trip mean/p50/max: {stats['mean_s']:.3f} / {stats['p50_s']:.3f} / {stats['max_s']:.3f} s")
+    
+    unconfirmed = publisher.close(timeout=CONFIRM_TIMEOUT)
+    print(f"[ROVER {rover.id}] {publisher.confirmed} demining tasks confirmed by RabbitMQ")
+    if unconfirmed:
+        print(f"[ROVER {rover.id}] {unconfirmed} demining tasks were not confirmed")
+    
     # write rover's path to file
-    output = open(f"./out/path_{rover.id}.txt", "w")
-    output.write(rover.getPathArrayString())
-    output.close()
+    with PathSink("./out", ARCHIVE_PATH, append=True) as path_sink:
+        path_sink.write(rover.id, rover.getPathArrayString())
     
     print(f"\n[ROVER {rover.id}]: finished.")
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""Runs a fleet of rovers from one client process.
+
+The map is fetched once and every rover gets its own copy of it. All rovers share one gRPC
+channel and one RabbitMQ connection and run at the same time: an asyncio loop drives them and
+each rover's blocking calls run on their own thread. Mining is left to the deminers, as with
+`client.py`. Per-rover timings are printed at the end.
+
+With `--window`, every rover waits for its deminers' replies (see `src/demine_requests.py`) and
+the round trip latency of every mine is reported as well.
+
+    python fleet.py 1-10
+    python fleet.py 1-10 --window 4
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent import futures
+
+import client
+from rpc import ground_control_pb2 as gc_pb2
+from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+from src.models import Map
+from src.rovers import Rover
+from common.output import PathSink
+from src.publisher import DeminePublisher
+
+#============================================
+# Constants
+#============================================
+ARCHIVE_PATH = client.ARCHIVE_PATH
+
+
+def parse_rover_ids(value: str) -> list[int]:
+    """Parses rover ids given as a comma separated list of ids and ranges, e.g. `1-5,8,10`"""
+
+    rover_ids: list[int] = []
+    for item in value.split(","):
+        first, _, last = item.partition("-")
+        rover_ids.extend(range(int(first), int(last or first) + 1))
+
+    if not rover_ids or min(rover_ids) < 1:
+        raise argparse.ArgumentTypeError("rover ids must be positive")
+    return list(dict.fromkeys(rover_ids))
+
+
+async def run_rover(rover_id: int, path_sink: PathSink, demine_window: int = None) -> dict:
+    """Gets one rover's commands, runs it on its own copy of the map and writes its path.
+    With a demine window, then waits for the deminers to answer each of its mines."""
+
+    start_time = time.perf_counter()
+    cmd_res = await asyncio.to_thread(stub.GetCommands, gc_pb2.CommandRequest(rover_id=rover_id))
+    commands_time = time.perf_counter() - start_time
+
+    #Rovers clear the mines they dig, so they can't share a Map
+    rover_map = Map(grid=map_grid, num_rows=map.num_rows, num_cols=map.num_cols)
+    rover = Rover(id=rover_id, map=rover_map, commands=cmd_res.commands, stub=stub, publisher=publisher,
+                  demine_window=demine_window)
+
+    run_start = time.perf_counter()
+    await asyncio.to_thread(rover.run)
+    run_time = time.perf_counter() - run_start
+
+    path_sink.write(rover.id, rover.getPathArrayString())
+
+    timing = {
+        "rover_id": rover_id,
+        "commands": len(rover.commands),
+        "mines": len(rover.serials),
+        "commands_s": commands_time,
+        "run_s": run_time,
+    }
+
+    if rover.demines is not None:
+        try:
+            await asyncio.to_thread(rover.demines.wait, client.REPLY_TIMEOUT)
+        finally:
+            rover.demines.close()
+        timing["demines"] = rover.demines.stats()
+        timing["latencies"] = list(rover.demines.latencies)
+
+    timing["total_s"] = time.perf_counter() - start_time
+    return timing
+
+
+async def run_fleet(rover_ids: list[int], demine_window: int = None) -> list[dict]:
+    """Runs every rover at once. Failed rovers are logged and left out of the results."""
+
+    #One thread per rover, so no rover waits for another's blocking call
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(futures.ThreadPoolExecutor(max_workers=len(rover_ids), thread_name_prefix="rover"))
+
+    with PathSink("./out", ARCHIVE_PATH, append=True) as path_sink:
+        results = await asyncio.gather(*(run_rover(rover_id, path_sink, demine_window) for rover_id in rover_ids), return_exceptions=True)
+
+    timings = []
+    for rover_id, result in zip(rover_ids, results):
+        if isinstance(result, BaseException):
+            print(f"Rover {rover_id} failed: {result!r}")
+        else:
+            timings.append(result)
+    return timings
+
+
+def print_timings(timings: list[dict], wall_time: float):
+    """Prints each rover's timings and the fleet totals"""
+
+    print(f"\n{'rover':>6} {'commands':>9} {'mines':>6} {'commands s':>11} {'run s':>9} {'total s':>9}")
+    for timing in sorted(timings, key=lambda timing: timing["rover_id"]):
+        print(f"{timing['rover_id']:>6} {timing['commands']:>9} {timing['mines']:>6} "
+              f"{timing['commands_s']:11.3f} {timing['run_s']:9.3f} {timing['total_s']:9.3f}")
+
+    if not timings:
+        return
+
+    totals = [timing["total_s"] for timing in timings]
+    print(f"\nrovers: {len(timings)}  wall: {wall_time:.3f} s  "
+          f"per rover min/mean/max: {min(totals):.3f} / {statistics.fmean(totals):.3f} / {max(totals):.3f} s  "
+          f"sequential equivalent: {sum(totals):.3f} s ({sum(totals) / wall_time:.1f}x)")
+
+
+def print_demine_stats(timings: list[dict]):
+    """Prints the replies of every rover's demines and their round trip latencies"""
+
+    demines = [timing["demines"] for timing in timings if "demines" in timing]
+    if not demines:
+        return
+
+    latencies = sorted(latency for timing in timings for latency in timing.get("latencies", ()))
+    print(f"\ndemines: {sum(stats['defused'] for stats in demines)} defused, "
+          f"{sum(stats['timed_out'] for stats in demines)} timed out, "
+          f"{sum(stats['unanswered'] for stats in demines)} unanswered")
+    if latencies:
+        print(f"round trip p50/p99/max: {latencies[len(latencies) // 2]:.3f} / "
+              f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]:.3f} / {latencies[-1]:.3f} s")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("rover_ids", type=parse_rover_ids, help="Rover ids and ranges, e.g. 1-10 or 1,3,5-7")
+    parser.add_argument("--window", type=int, default=client.DEMINE_WINDOW,
+                        help="Outstanding demines per rover, each answered by its deminer. Default: fire and forget")
+    args = parser.parse_args()
+
+
+    #=================================================================
+    # Setup server communication. One channel for the whole fleet, balanced over
+    # the replicas if client.REPLICA_PORTS is set
+    #=================================================================
+    channel = client.open_channel()
+    stub = gc_pb2_grpc.GroundControlStub(channel)
+    client.stub = stub
+
+
+    #=================================================================
+    # Get and process the map from the server, once
+    #=================================================================
+    start_time = time.perf_counter()
+    map: Map = client.fetch_map()
+    map_grid = map.array_repr()
+    print(f"Map ready in {time.perf_counter() - start_time:.3f} s")
+
+
+    #=================================================================
+    # Run the fleet
+    #=================================================================
+    publisher = DeminePublisher()
+    print(f"\n[FLEET]: starting {len(args.rover_ids)} rovers...\n")
+
+    start_time = time.perf_counter()
+    try:
+        timings = asyncio.run(run_fleet(args.rover_ids, args.window))
+    finally:
+        unconfirmed = publisher.close(timeout=client.CONFIRM_TIMEOUT)
+        channel.close()
+    wall_time = time.perf_counter() - start_time
+
+    print(f"\n[FLEET]: finished. {publisher.confirmed} demining tasks confirmed in {publisher.batches} batches, "
+          f"{unconfirmed} unconfirmed")
+    print_timings(timings, wall_time)
+    print_demine_stats(timings)
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14ground_control.proto\"\x0c\n\nMapRequest\"\x17\n\x06MapRow\x12\r\n\x05\x63\x65lls\x18\x01 \x03(\t\"F\n\x0bMapResponse\x12\x15\n\x04grid\x18\x01 \x03(\x0b\x32\x07.MapRow\x12\x0f\n\x07numRows\x18\x02 \x01(\x05\x12\x0f\n\x07numCols\x18\x03 \x01(\x05\"\"\n\x0e\x43ommandRequest\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\"#\n\x0f\x43ommandResponse\x12\x10\n\x08\x63ommands\x18\x01 \x01(\t\"0\n\x10SerialNumRequest\x12\r\n\x05x_pos\x18\x01 \x01(\x05\x12\r\n\x05y_pos\x18\x02 \x01(\x05\"&\n\x11SerialNumResponse\x12\x11\n\tserialNum\x18\x01 \x01(\t2\xa4\x01\n\rGroundControl\x12%\n\x06GetMap\x12\x0b.MapRequest\x1a\x0c.MapResponse\"\x00\x12\x32\n\x0bGetCommands\x12\x0f.CommandRequest\x1a\x10.CommandResponse\"\x00\x12\x38\n\rGetMineSerial\x12\x11.SerialNumRequest\x1a\x12.SerialNumResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14ground_control.proto\"\x0c\n\nMapRequest\"\x17\n\x06MapRow\x12\r\n\x05\x63\x65lls\x18\x01 \x03(\t\"g\n\x0bMapResponse\x12\x15\n\x04grid\x18\x01 \x03(\x0b\x32\x07.MapRow\x12\x0f\n\x07numRows\x18\x02 \x01(\x05\x12\x0f\n\x07numCols\x18\x03 \x01(\x05\x12\x0e\n\x06map_id\x18\x04 \x01(\t\x12\x0f\n\x07version\x18\x05 \x01(\x05\"-\n\nMapVersion\x12\x0e\n\x06map_id\x18\x01 \x01(\t\x12\x0f\n\x07version\x18\x02 \x01(\x05\"\"\n\x0e\x43ommandRequest\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\"#\n\x0f\x43ommandResponse\x12\x10\n\x08\x63ommands\x18\x01 \x01(\t\"0\n\x10SerialNumRequest\x12\r\n\x05x_pos\x18\x01 \x01(\x05\x12\r\n\x05y_pos\x18\x02 \x01(\x05\"&\n\x11SerialNumResponse\x12\x11\n\tserialNum\x18\x01 \x01(\t\"9\n\x11SerialNumsRequest\x12$\n\tpositions\x18\x01 \x03(\x0b\x32\x11.SerialNumRequest\"(\n\x12SerialNumsResponse\x12\x12\n\nserialNums\x18\x01 \x03(\t\"\x0e\n\x0cStatsRequest\"\xd1\x01\n\x0bMethodStats\x12\x0e\n\x06method\x18\x01 \x01(\t\x12\r\n\x05\x63\x61lls\x18\x02 \x01(\x04\x12\x0e\n\x06\x65rrors\x18\x03 \x01(\x04\x12\x11\n\tcancelled\x18\x04 \x01(\x04\x12\x11\n\tin_flight\x18\x05 \x01(\x05\x12\x15\n\rmax_in_flight\x18\x06 \x01(\x05\x12\x0f\n\x07mean_ms\x18\x07 \x01(\x01\x12\x0e\n\x06p50_ms\x18\x08 \x01(\x01\x12\x0e\n\x06p99_ms\x18\t \x01(\x01\x12\x0e\n\x06max_ms\x18\n \x01(\x01\x12\x15\n\rbucket_counts\x18\x0b \x03(\x04\"\x93\x01\n\x0bServerStats\x12\x1d\n\x07methods\x18\x01 \x03(\x0b\x32\x0c.MethodStats\x12\x10\n\x08uptime_s\x18\x02 \x01(\x01\x12\x0f\n\x07workers\x18\x03 \x01(\x05\x12\x11\n\tin_flight\x18\x04 \x01(\x05\x12\x15\n\rmax_in_flight\x18\x05 \x01(\x05\x12\x18\n\x10\x62ucket_bounds_ms\x18\x06 \x03(\x01\"L\n\nDemineTask\x12\x10\n\x08rover_id\x18\x01 \x01(\x05\x12\r\n\x05x_pos\x18\x02 \x01(\x05\x12\r\n\x05y_pos\x18\x03 \x01(\x05\x12\x0e\n\x06serial\x18\x04 \x01(\t\"n\n\x0b\x44\x65\x66usedMine\x12\x12\n\ndeminer_id\x18\x01 \x01(\x05\x12\x10\n\x08rover_id\x18\x02 \x01(\x05\x12\r\n\x05x_pos\x18\x03 \x01(\x05\x12\r\n\x05y_pos\x18\x04 \x01(\x05\x12\x0e\n\x06serial\x18\x05 \x01(\t\x12\x0b\n\x03pin\x18\x06 \x01(\t\"9\n\tMineQuery\x12\r\n\x05x_pos\x18\x01 \x01(\x05\x12\r\n\x05y_pos\x18\x02 \x01(\x05\x12\x0e\n\x06serial\x18\x03 \x01(\t\"1\n\x14\x44\x65\x66usedStatusRequest\x12\x19\n\x05mines\x18\x01 \x03(\x0b\x32\n.MineQuery\"\x95\x01\n\rDefusedStatus\x12\r\n\x05x_pos\x18\x01 \x01(\x05\x12\r\n\x05y_pos\x18\x02 \x01(\x05\x12\x0e\n\x06serial\x18\x03 \x01(\t\x12\x0f\n\x07\x64\x65\x66used\x18\x04 \x01(\x08\x12\x12\n\ndeminer_id\x18\x05 \x01(\x05\x12\x10\n\x08rover_id\x18\x06 \x01(\x05\x12\x0b\n\x03pin\x18\x07 \x01(\t\x12\x12\n\ndefused_at\x18\x08 \x01(\x01\"9\n\x15\x44\x65\x66usedStatusResponse\x12 \n\x08statuses\x18\x01 \x03(\x0b\x32\x0e.DefusedStatus2\xbf\x03\n\rGroundControl\x12%\n\x06GetMap\x12\x0b.MapRequest\x1a\x0c.MapResponse\"\x00\x12+\n\rGetMapVersion\x12\x0b.MapRequest\x1a\x0b.MapVersion\"\x00\x12\x32\n\x0bGetCommands\x12\x0f.CommandRequest\x1a\x10.CommandResponse\"\x00\x12\x38\n\rGetMineSerial\x12\x11.SerialNumRequest\x1a\x12.SerialNumResponse\"\x00\x12;\n\x0eGetMineSerials\x12\x12.SerialNumsRequest\x1a\x13.SerialNumsResponse\"\x00\x12/\n\x0eGetServerStats\x12\r.StatsRequest\x1a\x0c.ServerStats\"\x00\x12\x43\n\x10GetDefusedStatus\x12\x15.DefusedStatusRequest\x1a\x16.DefusedStatusResponse\"\x00\x12\x39\n\x0cWatchDefused\x12\x15.DefusedStatusRequest\x1a\x0e.DefusedStatus\"\x00\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -36,15 +36,39 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_MAPROW']._serialized_start=38
   _globals['_MAPROW']._serialized_end=61
   _globals['_MAPRESPONSE']._serialized_start=63
-  _globals['_MAPRESPONSE']._serialized_end=133
-  _globals['_COMMANDREQUEST']._serialized_start=135
-  _globals['_COMMANDREQUEST']._serialized_end=169
-  _globals['_COMMANDRESPONSE']._serialized_start=171
-  _globals['_COMMANDRESPONSE']._serialized_end=206
-  _globals['_SERIALNUMREQUEST']._serialized_start=208
-  _globals['_SERIALNUMREQUEST']._serialized_end=256
-  _globals['_SERIALNUMRESPONSE']._serialized_start=258
-  _globals['_SERIALNUMRESPONSE']._serialized_end=296
-  _globals['_GROUNDCONTROL']._serialized_start=299
-  _globals['_GROUNDCONTROL']._serialized_end=463
+  _globals['_MAPRESPONSE']._serialized_end=166
+  _globals['_MAPVERSION']._serialized_start=168
+  _globals['_MAPVERSION']._serialized_end=213
+  _globals['_COMMANDREQUEST']._serialized_start=215
+  _globals['_COMMANDREQUEST']._serialized_end=249
+  _globals['_COMMANDRESPONSE']._serialized_start=251
+  _globals['_COMMANDRESPONSE']._serialized_end=286
+  _globals['_SERIALNUMREQUEST']._serialized_start=288
+  _globals['_SERIALNUMREQUEST']._serialized_end=336
+  _globals['_SERIALNUMRESPONSE']._serialized_start=338
+  _globals['_SERIALNUMRESPONSE']._serialized_end=376
+  _globals['_SERIALNUMSREQUEST']._serialized_start=378
+  _globals['_SERIALNUMSREQUEST']._serialized_end=435
+  _globals['_SERIALNUMSRESPONSE']._serialized_start=437
+  _globals['_SERIALNUMSRESPONSE']._serialized_end=477
+  _globals['_STATSREQUEST']._serialized_start=479
+  _globals['_STATSREQUEST']._serialized_end=493
+  _globals['_METHODSTATS']._serialized_start=496
+  _globals['_METHODSTATS']._serialized_end=705
+  _globals['_SERVERSTATS']._serialized_start=708
+  _globals['_SERVERSTATS']._serialized_end=855
+  _globals['_DEMINETASK']._serialized_start=857
+  _globals['_DEMINETASK']._serialized_end=933
+  _globals['_DEFUSEDMINE']._serialized_start=935
+  _globals['_DEFUSEDMINE']._serialized_end=1045
+  _globals['_MINEQUERY']._serialized_start=1047
+  _globals['_MINEQUERY']._serialized_end=1104
+  _globals['_DEFUSEDSTATUSREQUEST']._serialized_start=1106
+  _globals['_DEFUSEDSTATUSREQUEST']._serialized_end=1155
+  _globals['_DEFUSEDSTATUS']._serialized_start=1158
+  _globals['_DEFUSEDSTATUS']._serialized_end=1307
+  _globals['_DEFUSEDSTATUSRESPONSE']._serialized_start=1309
+  _globals['_DEFUSEDSTATUSRESPONSE']._serialized_end=1366
+  _globals['_GROUNDCONTROL']._serialized_start=1369
+  _globals['_GROUNDCONTROL']._serialized_end=1816
 # @@protoc_insertion_point(module_scope)
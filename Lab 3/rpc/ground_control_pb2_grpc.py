@@ -40,6 +40,11 @@ class GroundControlStub(object):
                 request_serializer=ground__control__pb2.MapRequest.SerializeToString,
                 response_deserializer=ground__control__pb2.MapResponse.FromString,
                 _registered_method=True)
+        self.GetMapVersion = channel.unary_unary(
+                '/GroundControl/GetMapVersion',
+                request_serializer=ground__control__pb2.MapRequest.SerializeToString,
+                response_deserializer=ground__control__pb2.MapVersion.FromString,
+                _registered_method=True)
         self.GetCommands = channel.unary_unary(
                 '/GroundControl/GetCommands',
                 request_serializer=ground__control__pb2.CommandRequest.SerializeToString,
@@ -50,6 +55,26 @@ class GroundControlStub(object):
                 request_serializer=ground__control__pb2.SerialNumRequest.SerializeToString,
                 response_deserializer=ground__control__pb2.SerialNumResponse.FromString,
                 _registered_method=True)
+        self.GetMineSerials = channel.unary_unary(
+                '/GroundControl/GetMineSerials',
+                request_serializer=ground__control__pb2.SerialNumsRequest.SerializeToString,
+                response_deserializer=ground__control__pb2.SerialNumsResponse.FromString,
+                _registered_method=True)
+        self.GetServerStats = channel.unary_unary(
+                '/GroundControl/GetServerStats',
+                request_serializer=ground__control__pb2.StatsRequest.SerializeToString,
+                response_deserializer=ground__control__pb2.ServerStats.FromString,
+                _registered_method=True)
+        self.GetDefusedStatus = channel.unary_unary(
+                '/GroundControl/GetDefusedStatus',
+                request_serializer=ground__control__pb2.DefusedStatusRequest.SerializeToString,
+                response_deserializer=ground__control__pb2.DefusedStatusResponse.FromString,
+                _registered_method=True)
+        self.WatchDefused = channel.unary_stream(
+                '/GroundControl/WatchDefused',
+                request_serializer=ground__control__pb2.DefusedStatusRequest.SerializeToString,
+                response_deserializer=ground__control__pb2.DefusedStatus.FromString,
+                _registered_method=True)
 
 
 class GroundControlServicer(object):
@@ -62,6 +87,12 @@ class GroundControlServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetMapVersion(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetCommands(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -74,6 +105,30 @@ class GroundControlServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetMineSerials(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetServerStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetDefusedStatus(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchDefused(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_GroundControlServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -82,6 +137,11 @@ def add_GroundControlServicer_to_server(servicer, server):
                     request_deserializer=ground__control__pb2.MapRequest.FromString,
                     response_serializer=ground__control__pb2.MapResponse.SerializeToString,
             ),
+            'GetMapVersion': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMapVersion,
+                    request_deserializer=ground__control__pb2.MapRequest.FromString,
+                    response_serializer=ground__control__pb2.MapVersion.SerializeToString,
+            ),
             'GetCommands': grpc.unary_unary_rpc_method_handler(
                     servicer.GetCommands,
                     request_deserializer=ground__control__pb2.CommandRequest.FromString,
@@ -92,6 +152,26 @@ def add_GroundControlServicer_to_server(servicer, server):
                     request_deserializer=ground__control__pb2.SerialNumRequest.FromString,
                     response_serializer=ground__control__pb2.SerialNumResponse.SerializeToString,
             ),
+            'GetMineSerials': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMineSerials,
+                    request_deserializer=ground__control__pb2.SerialNumsRequest.FromString,
+                    response_serializer=ground__control__pb2.SerialNumsResponse.SerializeToString,
+            ),
+            'GetServerStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetServerStats,
+                    request_deserializer=ground__control__pb2.StatsRequest.FromString,
+                    response_serializer=ground__control__pb2.ServerStats.SerializeToString,
+            ),
+            'GetDefusedStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetDefusedStatus,
+                    request_deserializer=ground__control__pb2.DefusedStatusRequest.FromString,
+                    response_serializer=ground__control__pb2.DefusedStatusResponse.SerializeToString,
+            ),
+            'WatchDefused': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchDefused,
+                    request_deserializer=ground__control__pb2.DefusedStatusRequest.FromString,
+                    response_serializer=ground__control__pb2.DefusedStatus.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'GroundControl', rpc_method_handlers)
@@ -131,6 +211,33 @@ class GroundControl(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetMapVersion(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GroundControl/GetMapVersion',
+            ground__control__pb2.MapRequest.SerializeToString,
+            ground__control__pb2.MapVersion.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetCommands(request,
             target,
@@ -184,3 +291,111 @@ class GroundControl(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetMineSerials(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GroundControl/GetMineSerials',
+            ground__control__pb2.SerialNumsRequest.SerializeToString,
+            ground__control__pb2.SerialNumsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetServerStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GroundControl/GetServerStats',
+            ground__control__pb2.StatsRequest.SerializeToString,
+            ground__control__pb2.ServerStats.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetDefusedStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/GroundControl/GetDefusedStatus',
+            ground__control__pb2.DefusedStatusRequest.SerializeToString,
+            ground__control__pb2.DefusedStatusResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchDefused(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/GroundControl/WatchDefused',
+            ground__control__pb2.DefusedStatusRequest.SerializeToString,
+            ground__control__pb2.DefusedStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,9 +1,21 @@
 import grpc
-import requests
+import os
 from concurrent import futures
-from src.models import Cell, ServerMap
-import json
+from src.models import ServerMap
+from common.shared_map import attach_map
+from common.fetch import FetchError
+from common.commands import source_from_env
+from common.map_cache import add_servicer_to_server
+from common.cache import CommandCache
+from common.server_stats import ServerStats, StatsInterceptor
+from common.stream_slots import StreamSlots
+from common.ledger import Ledger
+from src.defused_index import DefusedWatch
+from src.ground_control import GroundControl, InvalidPosition
+from src.messages import MalformedMessage, decode_defused_mine
 import threading
+import _thread
+import queue
 import pika
 
 from rpc import ground_control_pb2 as gc_pb2
@@ -14,53 +26,92 @@ from rpc import ground_control_pb2_grpc as gc_pb2_grpc
 #============================================
 map_file_path = "./res/map.txt"
 mine_file_path = "./res/mines.txt"
-baseURL = "https://coe892.reev.dev/lab1/rover/"
+baseURL = os.environ.get("ROVER_API_URL", "https://coe892.reev.dev/lab1/rover/")     #point at common/stub_server.py to run offline
 HOST = "localhost"
-PORT = 5001
+PORT = int(os.environ.get("GROUND_CONTROL_PORT", 5001))          #replicas.py gives each replica its own port
+REUSE_PORT = os.environ.get("GROUND_CONTROL_REUSEPORT") == "1"  #let other replicas listen on the same port
+SHARED_MAP = os.environ.get("GROUND_CONTROL_SHARED_MAP")        #map published in shared memory by replicas.py
+ROVER_IDS = range(1, 11)
+COMMAND_TTL = 300           #seconds
+COMMAND_REFRESH = 30        #seconds
+MAX_WORKERS = 10
+STREAM_WORKERS = 6          #pool threads open WatchDefused streams may hold, the rest stay free for unary calls
+STATS_DUMP_INTERVAL = None  #seconds between printed call statistics. None = only through GetServerStats
+LEDGER_PATH = os.environ.get("GROUND_CONTROL_LEDGER", "./out/ledger.bin")  #append-only record of every defused mine reported
+DEFUSED_EXCHANGE = "Defused-Mines"     #fanout exchange the deminers publish defused mines to
+DEFUSED_QUEUE = os.environ.get("GROUND_CONTROL_DEFUSED_QUEUE", "Defused-Mines")  #replicas.py gives each replica its own copy
+DEFUSED_PREFETCH = 64       #Defused-Mines messages delivered ahead of being acked
+DEFUSED_ACK_DELAY = 0.05    #seconds the queue stays quiet before a partial batch is acked
 
 
 
 class GroundControlService(gc_pb2_grpc.GroundControlServicer):
+    """Thread-pool servicer. The answers come from the shared GroundControl handlers"""
     
     def GetMap(self, request, context):
-        
-        print("\nMap requested")
-        
-        #Protobuf format conversion
-        map_array = map.array_repr()
-        map_rows = [gc_pb2.MapRow(cells=row) for row in map_array]
-        
-        return gc_pb2.MapResponse(grid=map_rows, numRows = map.num_rows, numCols = map.num_cols)
+        return ground_control.get_map()
+    
+    def GetMapVersion(self, request, context):
+        return ground_control.get_map_version()
     
     def GetCommands(self, request, context):
         
         rover_id = request.rover_id
         print(f"Commands requested for Rover {rover_id}")
         
-        endpoint = f"{baseURL}/{str(rover_id)}"
-        response = requests.get(endpoint).json()
-        
-        #Parse the json response body
-        moves:str = response["data"]["moves"]
-        
-        #Remove dig commands
-        moves = moves.replace("D", "")
+        try:
+            moves:str = command_cache.get(rover_id)
+        except FetchError as e:
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
         
         return gc_pb2.CommandResponse(commands=moves)
     
     def GetMineSerial(self, request, context):
         
-        x_pos, y_pos = request.x_pos, request.y_pos
+        try:
+            return ground_control.get_mine_serial(request)
+        except InvalidPosition as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+    
+    def GetMineSerials(self, request, context):
+        
+        try:
+            return ground_control.get_mine_serials(request)
+        except InvalidPosition as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+    
+    def GetServerStats(self, request, context):
         
-        cell: Cell = map.cells[y_pos][x_pos]
-        serial = cell.mine_serial
+        #Per-method latencies and in-flight counts recorded by the stats interceptor
+        return server_stats.to_proto()
+    
+    def GetDefusedStatus(self, request, context):
+        return ground_control.get_defused_status(request)
+    
+    def WatchDefused(self, request, context):
+        """Each requested mine once it is defused, right away if it already is. Ends when all of them are.
+        Without mines, every defused mine so far and then each new one until the rover cancels.
+        The stream holds one of the pool's threads while it is open, and is rejected if STREAM_WORKERS already are."""
         
-        return gc_pb2.SerialNumResponse(serialNum = serial)
+        with stream_slots.hold(context):
+            watch = DefusedWatch(request.mines)
+            updates: queue.Queue = queue.Queue()
+            ground_control.defused_index.subscribe(updates.put)
+            
+            #Wakes the loop below when the rover cancels the stream
+            context.add_callback(lambda: updates.put(None))
+            try:
+                while not watch.done and (status := updates.get()) is not None:
+                    if watch.accept(status):
+                        yield status
+            finally:
+                ground_control.defused_index.unsubscribe(updates.put)
     
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    gc_pb2_grpc.add_GroundControlServicer_to_server(GroundControlService(), server)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=MAX_WORKERS), interceptors=[StatsInterceptor(server_stats)],
+                         options=[("grpc.so_reuseport", int(REUSE_PORT))])
+    add_servicer_to_server(GroundControlService(), server)
     server.add_insecure_port(f"{HOST}:{PORT}")
     server.start()
     print(f"gRPC server started on port {PORT}. Listening...\n")
@@ -72,56 +123,102 @@ def serve():
         raise
     
     
-def subscribeToDefusedQueue():
-    """Thread function to subscribe the server to the Defused-Mines Queue and handle messages"""
+def subscribeToDefusedQueue(ground_control: GroundControl):
+    """Thread function to subscribe the server to the Defused-Mines Queue and handle messages
+    
+    The server's queue, DEFUSED_QUEUE, is bound to the Defused-Mines fanout exchange, so every
+    replica gets every defused mine on a queue of its own. Messages are delivered up to DEFUSED_PREFETCH at a time and acked in batches, once they are
+    in the ledger on disk. A message still unacked when the server stops is delivered again.
+    
+    If the ledger fails to write a batch, the batch is requeued and the whole server is stopped. Its mines are
+    already indexed, so this replica would take their redelivery for duplicates and ack them unwritten.
+    
+    Args:
+        ground_control (GroundControl): Indexes every defused mine and appends it to the ledger
+    """
     
     connection = pika.BlockingConnection(pika.ConnectionParameters(HOST, 5672))
     channel = connection.channel()
-    channel.queue_declare(queue='Defused-Mines')
+    channel.exchange_declare(exchange=DEFUSED_EXCHANGE, exchange_type='fanout')
+    channel.queue_declare(queue=DEFUSED_QUEUE)
+    channel.queue_bind(queue=DEFUSED_QUEUE, exchange=DEFUSED_EXCHANGE)
+    channel.basic_qos(prefetch_count=DEFUSED_PREFETCH)
     
-    def callback(ch, method, properties, body):
-        """Callback function for consuming a message from the 'Defused-Mines' queue.
-        Extracts data from the message body and prints to console.
-        """
-        message = json.loads(body.decode())
-        
-        #Variable Extraction
-        deminer_id = message["deminer_id"]
-        rover_id = message["rover_id"]
-        mine_x_pos, mine_y_pos = message["position"]["x_pos"], message["position"]["y_pos"]
-        serial = message["serial"]
-        pin = message["pin"]
-        
-        
-        print(f"\n[GROUND CONTROL] Incoming message from Deminer {deminer_id}:")
-        print(f"\tSource Rover: Rover {rover_id}")
-        print(f"\tMine position: ({mine_x_pos},{mine_y_pos})")
-        print(f"\tMine serial: {serial}")
-        print(f"\tMine Pin: {pin}")
-        
-    channel.basic_consume(queue='Defused-Mines', on_message_callback=callback, auto_ack=True)
+    unacked, last_tag, writes = 0, None, []
     
     try:
         print(f"[GROUND CONTROL] Waiting for defused mine pins")
-        channel.start_consuming()
+        for method, properties, body in channel.consume(queue=DEFUSED_QUEUE, inactivity_timeout=DEFUSED_ACK_DELAY):
+            if method is not None:
+                try:
+                    #Protobuf, or JSON from an older deminer
+                    write = ground_control.record_defused(decode_defused_mine(properties, body))
+                    if write is not None:
+                        writes.append(write)
+                    unacked, last_tag = unacked + 1, method.delivery_tag
+                except (MalformedMessage, InvalidPosition) as e:
+                    #Dropped rather than requeued, where it would come back forever. The batch ack skips it
+                    print(f"\n[GROUND CONTROL] Rejecting malformed defused mine message: {e}")
+                    channel.basic_reject(delivery_tag=method.delivery_tag, requeue=False)
+            
+            #One ack for the batch, when half the prefetch window is used or the queue goes quiet
+            if unacked and (method is None or unacked >= DEFUSED_PREFETCH // 2):
+                try:
+                    #A failed write is cut off the file, so later writes of the batch can still succeed. Check all of them
+                    for write in writes:
+                        write.result()
+                except OSError as e:
+                    print(f"\n[GROUND CONTROL] Ledger write failed, requeueing {unacked} defused mines and stopping the server: {e}")
+                    channel.basic_nack(delivery_tag=last_tag, multiple=True, requeue=True)
+                    connection.close()
+                    _thread.interrupt_main()
+                    return
+                channel.basic_ack(delivery_tag=last_tag, multiple=True)
+                unacked, writes = 0, []
     except KeyboardInterrupt:
         print(f"\n[GROUND CONTROL] KeyboardInterrupt received. Stopping consumption")
-        channel.stop_consuming()
+        channel.cancel()
         connection.close()
 
 if __name__ == "__main__":
     
     print("Setting up application...")
     
-    #Initialize the map into memory
-    map = ServerMap(map_file_path, mine_file_path)
+    #Initialize the map into memory. Replicas build theirs from the copy replicas.py shared
+    map = attach_map(SHARED_MAP, ServerMap) if SHARED_MAP else ServerMap(map_file_path, mine_file_path)
     print("Map initialized")
     
+    #Every defused mine reported by a deminer is appended to the ledger and indexed by position,
+    #for GetDefusedStatus and WatchDefused
+    ledger = Ledger(LEDGER_PATH)
+    ground_control = GroundControl(map, ledger)
+    ground_control.replay_ledger()
+    
+    #Call statistics of every RPC, recorded by the stats interceptor
+    server_stats = ServerStats(workers=MAX_WORKERS)
+    if STATS_DUMP_INTERVAL is not None:
+        server_stats.start_dumping(STATS_DUMP_INTERVAL, emit=print)
+    
+    #Watchers past STREAM_WORKERS are turned away, so they can't take the threads unary calls need
+    stream_slots = StreamSlots(STREAM_WORKERS)
+    
+    #Pooled client for the rover command API, with deadlines, retries and hedging.
+    #ROVER_COMMAND_SOURCE switches to a recorded fixture or synthetic commands
+    command_source = source_from_env(baseURL, fixture_path="./res/commands.json", max_concurrency=10)
+    
+    #Prefetch every rover's commands. Dig commands are removed once here, not on every request
+    command_cache = CommandCache(command_source, ROVER_IDS, ttl=COMMAND_TTL, refresh_interval=COMMAND_REFRESH,
+                                 transform=lambda moves: moves.replace("D", ""))
+    command_cache.start()
+    print("Rover commands prefetched")
+    
     #Start subscription to Defused-Mines Queue
-    defused_thread = threading.Thread(target=subscribeToDefusedQueue, daemon=True)
+    defused_thread = threading.Thread(target=subscribeToDefusedQueue, args=(ground_control,), daemon=True)
     defused_thread.start()
 
     try:
         serve()     #Start gRPC server
     except KeyboardInterrupt:
-        print("\n Keyboard Interrupt. Shutting down.")
\ No newline at end of file
+        print("\n Keyboard Interrupt. Shutting down.")
+    finally:
+        ledger.close()
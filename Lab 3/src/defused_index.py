@@ -0,0 +1,105 @@
+"""In-memory index of the mines the deminers reported defused.
+
+Ground control consumes the Defused-Mines queue into a `DefusedIndex`, keyed by mine position,
+and answers `GetDefusedStatus` and `WatchDefused` from it. Rovers publish a
+mine and move on, so this is where they can find out whether it was actually cleared.
+
+Serials are not unique: several mines on the map share one. A mine is always identified by its
+position, and a serial in a query only has to match the mine recorded there.
+"""
+import threading
+import time
+from typing import Callable, Iterable
+
+from rpc import ground_control_pb2 as gc_pb2
+
+
+class DefusedIndex():
+    """Defused mines by position. Publishes each newly defused mine to the subscribed watchers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_position: dict[tuple[int, int], gc_pb2.DefusedStatus] = {}
+        self._order: list[gc_pb2.DefusedStatus] = []                #in the order they were recorded
+        self._watchers: list[Callable[[gc_pb2.DefusedStatus], None]] = []
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._order)
+
+    def record(self, defused: gc_pb2.DefusedMine, defused_at: float = None) -> gc_pb2.DefusedStatus:
+        """Adds a defused mine. Returns its status, or None if the mine was already on record,
+        e.g. from a message delivered twice."""
+
+        status = gc_pb2.DefusedStatus(x_pos=defused.x_pos, y_pos=defused.y_pos, serial=defused.serial, defused=True,
+                                      deminer_id=defused.deminer_id, rover_id=defused.rover_id, pin=defused.pin,
+                                      defused_at=time.time() if defused_at is None else defused_at)
+
+        with self._lock:
+            if (status.x_pos, status.y_pos) in self._by_position:
+                return None
+            self._by_position[(status.x_pos, status.y_pos)] = status
+            self._order.append(status)
+
+            #Published under the lock so every watcher sees the mines in the order they were recorded
+            for watcher in self._watchers:
+                watcher(status)
+
+        return status
+
+    def status(self, query: gc_pb2.MineQuery) -> gc_pb2.DefusedStatus:
+        """Status of the mine at the query's position. A mine not on record, or one whose serial is not
+        the query's, comes back with `defused` False."""
+
+        with self._lock:
+            status = self._by_position.get((query.x_pos, query.y_pos))
+        if status is not None and _matches(query, status):
+            return status
+        return gc_pb2.DefusedStatus(x_pos=query.x_pos, y_pos=query.y_pos, serial=query.serial)
+
+    def statuses(self, queries: Iterable[gc_pb2.MineQuery]) -> list[gc_pb2.DefusedStatus]:
+        """Status of each mine, in query order"""
+        return [self.status(query) for query in queries]
+
+    def subscribe(self, watcher: Callable[[gc_pb2.DefusedStatus], None]):
+        """Sends `watcher` every mine defused so far, then each new one as it is recorded.
+        `watcher` is called with the index's lock held, so it must not block."""
+
+        with self._lock:
+            for status in self._order:
+                watcher(status)
+            self._watchers.append(watcher)
+
+    def unsubscribe(self, watcher: Callable[[gc_pb2.DefusedStatus], None]):
+        with self._lock:
+            self._watchers.remove(watcher)
+
+
+class DefusedWatch():
+    """The mines one `WatchDefused` stream is waiting for. With no queries it waits for every mine, forever."""
+
+    def __init__(self, queries: Iterable[gc_pb2.MineQuery]):
+        self._waiting = list(queries)
+        self._watch_all = not self._waiting
+
+    @property
+    def done(self) -> bool:
+        """Every mine asked about is defused"""
+        return not self._watch_all and not self._waiting
+
+    def accept(self, status: gc_pb2.DefusedStatus) -> bool:
+        """Whether the stream sends this status. Each mine asked about is sent once."""
+
+        if self._watch_all:
+            return True
+        waiting = [query for query in self._waiting if not _matches(query, status)]
+        matched = len(waiting) < len(self._waiting)
+        self._waiting = waiting
+        return matched
+
+
+def _matches(query: gc_pb2.MineQuery, status: gc_pb2.DefusedStatus) -> bool:
+    #The serial only confirms the mine at that position, it never stands in for the position
+    if (query.x_pos, query.y_pos) != (status.x_pos, status.y_pos):
+        return False
+    return not query.serial or query.serial == status.serial
@@ -0,0 +1,155 @@
+"""Request-reply demining: a rover learns when each of its mines is defused, and how long it took.
+
+Each rover gets an exclusive reply queue on the shared publisher's connection. Its demine tasks
+carry a `correlation_id` and `reply_to`, and the deminer that defuses a mine sends its
+DefusedMine to `reply_to` as well as to Defused-Mines. At most `window` of a rover's tasks are
+outstanding at the deminers. Later mines wait in the rover's backlog and go out as replies come
+in, so the rover never blocks. A task with no reply after `timeout` seconds is given up on and
+frees its place in the window.
+"""
+import statistics
+import threading
+import time
+import uuid
+from collections import deque
+
+from rpc import ground_control_pb2 as gc_pb2
+from .messages import MalformedMessage, decode_defused_mine, encode
+from .publisher import DeminePublisher
+
+
+class DemineRequests():
+    """One rover's demine tasks awaiting a deminer's reply. Safe to use from any thread."""
+
+    def __init__(self, rover_id: int, publisher: DeminePublisher, window: int = 4, timeout: float = 300.0):
+        """
+        Args:
+            rover_id (int): Rover the tasks are for
+            publisher (DeminePublisher): Publishes the tasks and carries the reply queue
+            window (int): Most tasks sent and not yet answered
+            timeout (float): Seconds to wait for a task's reply before giving up on it
+        """
+        self.rover_id = rover_id
+        self.publisher = publisher
+        self.window = window
+        self.timeout = timeout
+        self.reply_queue = f"Demine-Replies-{rover_id}-{uuid.uuid4().hex[:8]}"
+
+        self.defused: list[gc_pb2.DefusedMine] = []
+        self.latencies: list[float] = []        #seconds from sending each defused mine's task to its reply
+        self.timed_out = 0
+
+        self._cond = threading.Condition()
+        self._outstanding: dict[str, tuple[gc_pb2.DemineTask, float]] = {}     #correlation id -> (task, sent at)
+        self._backlog: deque[gc_pb2.DemineTask] = deque()
+
+        publisher.consume_replies(self.reply_queue, self._on_reply)
+
+    @property
+    def outstanding(self) -> int:
+        """Tasks sent to the deminers and not yet answered"""
+        with self._cond:
+            return len(self._outstanding)
+
+    @property
+    def waiting(self) -> int:
+        """Tasks held back until the window has room"""
+        with self._cond:
+            return len(self._backlog)
+
+    def submit(self, task: gc_pb2.DemineTask):
+        """Sends a task if the window has room, otherwise holds it until it does. Never blocks."""
+
+        with self._cond:
+            self._expire()
+            self._backlog.append(task)
+            self._fill()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Waits until every task is answered or given up on. Returns False on timeout."""
+
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while True:
+                self._expire()
+                self._fill()
+                if not self._outstanding and not self._backlog:
+                    return True
+
+                #Wakes for the next reply, or when the oldest task runs out of time
+                wake_in = min(sent_at for _, sent_at in self._outstanding.values()) + self.timeout - time.perf_counter()
+                if deadline is not None:
+                    if deadline <= time.perf_counter():
+                        return False
+                    wake_in = min(wake_in, deadline - time.perf_counter())
+                self._cond.wait(max(wake_in, 0.0))
+
+    def close(self):
+        """Stops listening for replies. Replies still on their way are dropped."""
+        self.publisher.cancel_replies(self.reply_queue)
+
+    def stats(self) -> dict:
+        """Defused, timed out and unanswered tasks, and the round trip latencies in seconds"""
+
+        with self._cond:
+            latencies = sorted(self.latencies)
+            stats = {
+                "defused": len(self.defused),
+                "timed_out": self.timed_out,
+                "unanswered": len(self._outstanding) + len(self._backlog),
+            }
+
+        if latencies:
+            stats.update({
+                "mean_s": statistics.fmean(latencies),
+                "p50_s": latencies[len(latencies) // 2],
+                "max_s": latencies[-1],
+            })
+        return stats
+
+    def _fill(self):
+        """Sends held back tasks while the window has room. Called with the lock held."""
+
+        while self._backlog and len(self._outstanding) < self.window:
+            task = self._backlog.popleft()
+            body, properties = encode(task)
+            properties.correlation_id = uuid.uuid4().hex
+            properties.reply_to = self.reply_queue
+
+            self._outstanding[properties.correlation_id] = (task, time.perf_counter())
+            self.publisher.publish(body, properties)
+
+    def _expire(self):
+        """Gives up on tasks that waited longer than the timeout. Called with the lock held."""
+
+        now = time.perf_counter()
+        for correlation_id, (task, sent_at) in list(self._outstanding.items()):
+            if now - sent_at >= self.timeout:
+                del self._outstanding[correlation_id]
+                self.timed_out += 1
+                print(f"[ROVER {self.rover_id}] No deminer replied for mine ({task.x_pos},{task.y_pos}) "
+                      f"within {self.timeout:g} s")
+
+    def _on_reply(self, properties, body: bytes):
+        """Runs on the publisher's IO thread for every message on the reply queue"""
+
+        try:
+            defused = decode_defused_mine(properties, body)
+        except MalformedMessage as e:
+            #Left outstanding, so the task times out like one that got no reply
+            print(f"[ROVER {self.rover_id}] Ignoring malformed reply: {e}")
+            return
+
+        with self._cond:
+            #A late reply to a task already given up on has nothing to settle
+            sent = self._outstanding.pop(properties.correlation_id, None)
+            if sent is None:
+                return
+            latency = time.perf_counter() - sent[1]
+            self.latencies.append(latency)
+            self.defused.append(defused)
+            self._fill()
+            self._cond.notify_all()
+
+        print(f"[ROVER {self.rover_id}] Mine ({defused.x_pos},{defused.y_pos}) defused by Deminer {defused.deminer_id}, "
+              f"pin {defused.pin}, round trip {latency:.3f} s")
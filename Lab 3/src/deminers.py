@@ -1,24 +1,39 @@
 import pika
-import json
+import time
 from hashlib import sha256
+from typing import Callable
+from rpc import ground_control_pb2 as gc_pb2
+from .messages import MalformedMessage, decode_demine_task, encode
 
 class Deminer:
     """An instance of a deminer object used for demining mines"""
     
-    def __init__(self, id):
+    def __init__(self, id, on_task_start: Callable[[], None] = None, on_task_done: Callable[[float], None] = None):
+        """
+        Args:
+            id (int): Deminer number
+            on_task_start (Callable): Called when a task is taken on, e.g. by the supervisor's workers
+            on_task_done (Callable): Called with the seconds each task took once it is acked
+        """
         self.id = id
+        self.on_task_start = on_task_start
+        self.on_task_done = on_task_done
         
         self.rabbit_connection = pika.BlockingConnection(pika.ConnectionParameters("localhost", 5672))
         self.rabbit_channel = self.rabbit_connection.channel()
         
         self.rabbit_channel.queue_declare(queue="Demine-Queue")
-        self.rabbit_channel.queue_declare(queue="Defused-Mines")
+        #Fanned out to every ground control replica's own queue, which each declares and binds
+        self.rabbit_channel.exchange_declare(exchange="Defused-Mines", exchange_type="fanout")
+        
+        #One task at a time, so the rest stay in the queue where any deminer can take them
+        self.rabbit_channel.basic_qos(prefetch_count=1)
         
     def start(self):
         """Startup the deminer instance"""
         
         try:
-            self.rabbit_channel.basic_consume(queue="Demine-Queue", on_message_callback=self.on_task_received, auto_ack=True)
+            self.rabbit_channel.basic_consume(queue="Demine-Queue", on_message_callback=self.on_task_received)
             print(f"\n[DEMINER {self.id}] awaiting tasks")
             self.rabbit_channel.start_consuming()
         except KeyboardInterrupt:
@@ -27,39 +42,58 @@ class Deminer:
             self.rabbit_connection.close()
         
     def on_task_received(self, channel, method, properties, body: bytes):
-        """Handles a task in the queue"""
+        """Handles a task in the queue. Acked once the pin is published, so the task of a deminer
+        stopped halfway goes to another one"""
+        
+        start_time = time.perf_counter()
 
-        message = json.loads(body.decode())
+        #Protobuf, or JSON from an older rover. Anything else would only fail again if requeued
+        try:
+            task = decode_demine_task(properties, body)
+        except MalformedMessage as e:
+            print(f"\n[DEMINER {self.id}] Rejecting malformed task: {e}")
+            channel.basic_reject(delivery_tag=method.delivery_tag, requeue=False)
+            return
+        if self.on_task_start is not None:
+            self.on_task_start()
         
         #Variable Extraction
-        rover_id = message["id"]
-        x_pos, y_pos = message["position"]["x_pos"], message["position"]["y_pos"]
-        serial = message["serial"]
+        rover_id = task.rover_id
+        x_pos, y_pos = task.x_pos, task.y_pos
+        serial = task.serial
         
         print(f"\n[DEMINER {self.id}] is processing a request from Rover {rover_id} for serial {serial} at position ({x_pos},{y_pos})")
         
         #Find the pin
         pin = self.mine(serial)
         
-        payload = json.dumps({
-            "deminer_id": self.id,
-            "rover_id": rover_id,
-            "position": {
-                "x_pos": x_pos,
-                "y_pos": y_pos
-            },
-            "serial": serial,
-            "pin": pin
-        })
+        defused = gc_pb2.DefusedMine(deminer_id=self.id, rover_id=rover_id, x_pos=x_pos, y_pos=y_pos, serial=serial, pin=pin)
+        payload, defused_properties = encode(defused)
         
         #Publish message to channel
         self.rabbit_channel.basic_publish(
-            exchange='',
-            routing_key='Defused-Mines',
-            body=payload
+            exchange='Defused-Mines',
+            routing_key='',
+            body=payload,
+            properties=defused_properties
         )
         
-        print(f"[DEMINER {self.id}] Found pin {pin}, published to 'Defused-Mines' Queue")
+        print(f"[DEMINER {self.id}] Found pin {pin}, published to 'Defused-Mines' Exchange")
+        
+        #A rover waiting for the answer gets it on its own reply queue too
+        if properties.reply_to:
+            self.rabbit_channel.basic_publish(
+                exchange='',
+                routing_key=properties.reply_to,
+                body=payload,
+                properties=pika.BasicProperties(content_type=defused_properties.content_type, type=defused_properties.type,
+                                                correlation_id=properties.correlation_id)
+            )
+            print(f"[DEMINER {self.id}] Replied to Rover {rover_id}")
+        
+        channel.basic_ack(delivery_tag=method.delivery_tag)
+        if self.on_task_done is not None:
+            self.on_task_done(time.perf_counter() - start_time)
         
     def mine(self, serial: str) -> str:
         """Attempts to mine the current mine with the given serial number.
@@ -99,5 +133,5 @@ if __name__ == "__main__":
         
     print("Setting up deminer...")
     
-    deminer = Deminer(deminer_id)
+    deminer = Deminer(int(deminer_id))
     deminer.start()
\ No newline at end of file
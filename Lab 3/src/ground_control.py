@@ -0,0 +1,106 @@
+"""Request handling shared by the GroundControl servers.
+
+`server.py` and `aio_server.py` differ only in how a call waits: on a pool thread or on the event
+loop. What a call answers from the map and the defused mine index, and what a defused mine
+records, is the same for both, so their servicers hand every request to one `GroundControl`.
+"""
+from concurrent.futures import Future
+
+from rpc import ground_control_pb2 as gc_pb2
+from common.ledger import DEFUSED, Ledger
+from common.map_cache import MapResponseCache
+from .defused_index import DefusedIndex
+from .models import Cell, ServerMap
+
+
+class InvalidPosition(ValueError):
+    """A request or message named a cell outside the map"""
+
+
+class GroundControl():
+    """The server's map, ledger and defused mine index, and the handlers that answer from them"""
+
+    def __init__(self, map: ServerMap, ledger: Ledger):
+        """
+        Args:
+            map (ServerMap): Map the rovers are served, loaded from the map files or shared memory
+            ledger (Ledger): Ledger every defused mine is appended to
+        """
+        self.map = map
+        self.ledger = ledger
+        self.map_cache = MapResponseCache(map)      #GetMap responses, serialized once per map version
+        self.defused_index = DefusedIndex()         #defused mines by position, for GetDefusedStatus and WatchDefused
+
+    def replay_ledger(self):
+        """Adds the defused mines on record in the ledger to the index. The ledger keeps no serials,
+        so they are taken from the map. A mine outside the map, e.g. recorded against other map files,
+        is skipped with a warning."""
+
+        for entry in self.ledger.entries:
+            if entry.kind != DEFUSED:
+                continue
+            try:
+                self.check_position(entry.x_pos, entry.y_pos)
+            except InvalidPosition as e:
+                print(f"[GROUND CONTROL] Skipping ledger entry of deminer {entry.agent_id}: {e}")
+                continue
+            serial = self.map.cells[entry.y_pos][entry.x_pos].mine_serial
+            self.defused_index.record(gc_pb2.DefusedMine(deminer_id=entry.agent_id, rover_id=entry.rover_id, x_pos=entry.x_pos,
+                                                         y_pos=entry.y_pos, serial=serial, pin=entry.text), entry.timestamp)
+        print(f"Ledger replayed: {len(self.ledger.entries)} defused mines on record")
+
+    def check_position(self, x_pos: int, y_pos: int):
+        """Raises InvalidPosition unless the position is a cell of the map. Unchecked, a negative
+        position would index the grid from its far end and a large one would raise IndexError."""
+
+        if not (0 <= x_pos < self.map.num_cols and 0 <= y_pos < self.map.num_rows):
+            raise InvalidPosition(f"Position ({x_pos},{y_pos}) is outside the {self.map.num_cols}x{self.map.num_rows} map")
+
+    def get_map(self) -> bytes:
+
+        print("\nMap requested")
+
+        #Serialized once per map version and shared by every request
+        return self.map_cache.get()
+
+    def get_map_version(self) -> gc_pb2.MapVersion:
+
+        #Lets clients skip GetMap when their cached copy is current
+        return gc_pb2.MapVersion(map_id = self.map.map_id, version = self.map.version)
+
+    def get_mine_serial(self, request) -> gc_pb2.SerialNumResponse:
+
+        self.check_position(request.x_pos, request.y_pos)
+        cell: Cell = self.map.cells[request.y_pos][request.x_pos]
+        return gc_pb2.SerialNumResponse(serialNum = cell.mine_serial)
+
+    def get_mine_serials(self, request) -> gc_pb2.SerialNumsResponse:
+
+        print(f"Serial numbers requested for {len(request.positions)} cells")
+
+        for position in request.positions:
+            self.check_position(position.x_pos, position.y_pos)
+        serials = [self.map.cells[position.y_pos][position.x_pos].mine_serial for position in request.positions]
+        return gc_pb2.SerialNumsResponse(serialNums = serials)
+
+    def get_defused_status(self, request) -> gc_pb2.DefusedStatusResponse:
+
+        #Answered from the mines the Defused-Mines queue reported
+        return gc_pb2.DefusedStatusResponse(statuses = self.defused_index.statuses(request.mines))
+
+    def record_defused(self, defused: gc_pb2.DefusedMine) -> Future:
+        """Prints, indexes and records a mine a deminer defused.
+        Returns the ledger write, or None for a mine already on record.
+        A mine outside the map raises InvalidPosition and is never written to the ledger."""
+
+        self.check_position(defused.x_pos, defused.y_pos)
+        if self.defused_index.record(defused) is None:
+            return None
+
+        print(f"\n[GROUND CONTROL] Incoming message from Deminer {defused.deminer_id}:")
+        print(f"\tSource Rover: Rover {defused.rover_id}")
+        print(f"\tMine position: ({defused.x_pos},{defused.y_pos})")
+        print(f"\tMine serial: {defused.serial}")
+        print(f"\tMine Pin: {defused.pin}")
+
+        return self.ledger.record_defused(defused.rover_id, defused.deminer_id, defused.pin, defused.x_pos, defused.y_pos)
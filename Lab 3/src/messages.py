@@ -0,0 +1,66 @@
+"""Encoding of the messages on the Demine-Queue and Defused-Mines queues.
+
+Messages are sent as protobuf (`DemineTask` and `DefusedMine` in ground_control.proto) and
+marked as such by their `content_type` property. A message without it is read as the JSON the
+rovers and deminers used to send, so publishers of both kinds can share the queues.
+
+A body that is neither raises `MalformedMessage`. Consumers reject such a message without
+requeueing it, so it is not delivered again and again.
+"""
+import json
+
+import pika
+from google.protobuf.message import DecodeError
+
+from rpc import ground_control_pb2 as gc_pb2
+
+PROTOBUF = "application/x-protobuf"
+JSON = "application/json"
+
+
+class MalformedMessage(ValueError):
+    """A queue message that is neither a valid protobuf message nor the JSON it replaced"""
+
+
+def encode(message: gc_pb2.DemineTask | gc_pb2.DefusedMine) -> tuple[bytes, pika.BasicProperties]:
+    """Serializes a queue message. Returns the body and the properties to publish it with."""
+    return message.SerializeToString(), pika.BasicProperties(content_type=PROTOBUF, type=message.DESCRIPTOR.name)
+
+
+def decode_demine_task(properties: pika.BasicProperties, body: bytes) -> gc_pb2.DemineTask:
+    """Reads a Demine-Queue message, protobuf or JSON
+
+    Raises:
+        MalformedMessage: If the body is neither
+    """
+    try:
+        if _is_protobuf(properties):
+            return gc_pb2.DemineTask.FromString(body)
+
+        message = json.loads(body)
+        return gc_pb2.DemineTask(rover_id=int(message["id"]), x_pos=message["position"]["x_pos"],
+                                 y_pos=message["position"]["y_pos"], serial=message["serial"])
+    except (DecodeError, ValueError, KeyError, TypeError) as e:
+        raise MalformedMessage(f"Unreadable demine task ({len(body)} bytes): {e!r}") from e
+
+
+def decode_defused_mine(properties: pika.BasicProperties, body: bytes) -> gc_pb2.DefusedMine:
+    """Reads a Defused-Mines message, protobuf or JSON
+
+    Raises:
+        MalformedMessage: If the body is neither
+    """
+    try:
+        if _is_protobuf(properties):
+            return gc_pb2.DefusedMine.FromString(body)
+
+        message = json.loads(body)
+        return gc_pb2.DefusedMine(deminer_id=int(message["deminer_id"]), rover_id=int(message["rover_id"]),
+                                  x_pos=message["position"]["x_pos"], y_pos=message["position"]["y_pos"],
+                                  serial=message["serial"], pin=message["pin"])
+    except (DecodeError, ValueError, KeyError, TypeError) as e:
+        raise MalformedMessage(f"Unreadable defused mine ({len(body)} bytes): {e!r}") from e
+
+
+def _is_protobuf(properties: pika.BasicProperties) -> bool:
+    return properties is not None and properties.content_type == PROTOBUF
@@ -1,4 +1,6 @@
 """All the data models for the Rover application"""
+from hashlib import sha256
+
 
 class Cell():
     """Represents a single cell on the map"""
@@ -15,6 +17,13 @@ class Cell():
         
     def __repr__(self):
         return f"Cell({self.x_coord}, {self.y_coord}, {self.value})"
+    
+    def __getstate__(self):
+        #Neighbour links are left out so pickling doesn't recurse across the whole grid. Map restores them
+        state = self.__dict__.copy()
+        for link in ("up", "down", "left", "right"):
+            state[link] = None
+        return state
 
      
 class Map():
@@ -53,6 +62,10 @@ class Map():
                 if col < self.num_cols - 1:
                     cell.right = self.cells[row][col + 1]
             
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._link_cells()
+        
     def print_grid(self):
         """Print the map grid with character representations of empty cells and mines."""
         for row in self.cells:
@@ -88,6 +101,9 @@ class ServerMap(Map):
         
         super().__init__(grid, num_rows, num_cols)
         
+        #Identifies this map to clients caching it, so a restart with different files is noticed
+        self.map_id: str = sha256(f"{num_rows} {num_cols}\n{grid}".encode()).hexdigest()[:16]
+        
         #Process the mine file and add mine serials into the data structure
         with open(mine_file_path, "r") as mine_f:
             mine_serials = [line.strip() for line in mine_f]
@@ -98,4 +114,7 @@ class ServerMap(Map):
             for cell in row:
                 if cell.value == "MINE":
                     cell.mine_serial = mine_serials[serial_cntr % num_serials]
-                    serial_cntr += 1
\ No newline at end of file
+                    serial_cntr += 1
+        
+        #Deminers don't change the grid in Lab 3, so this stays 0. The shared map cache and clients still compare it
+        self.version: int = 0
\ No newline at end of file
@@ -0,0 +1,307 @@
+"""Shared, non-blocking publisher of demine tasks.
+
+`DeminePublisher` owns one RabbitMQ connection for any number of rovers. It is opened on the
+first publish, on a pika `SelectConnection` whose IO loop runs on a background thread. Rovers
+only ever append a task to the pending list, so publishing never blocks movement. The IO loop
+publishes whatever is pending a moment later in one go, so the frames of a burst of tasks share
+socket writes, and the broker confirms them (publisher confirms), often many at once.
+
+Every published task is held as in flight until the broker confirms it. At most `max_in_flight`
+are unconfirmed at a time. A task the broker rejects is published again up to `max_rejects` times
+and then dropped. One still unconfirmed when the connection drops is published again on the next
+connection, so a task is delivered at least once unless it is dropped. A lost connection is
+reopened after `reconnect_delay` seconds.
+
+The connection can also carry reply queues (`consume_replies`) for rovers that wait for their
+deminers' answers (`demine_requests.py`).
+"""
+import atexit
+import threading
+from collections import deque
+from itertools import takewhile
+from typing import Callable
+
+import pika
+from pika.spec import Basic
+
+
+class DeminePublisher():
+    """Publishes demine tasks to one queue over one lazily opened connection. Safe to use from any thread."""
+
+    def __init__(self, host: str = "localhost", port: int = 5672, queue: str = "Demine-Queue", linger: float = 0.005,
+                 max_in_flight: int = 256, reconnect_delay: float = 2.0, max_rejects: int = 5):
+        """
+        Args:
+            host (str): RabbitMQ host
+            port (int): RabbitMQ port
+            queue (str): Queue the tasks are published to
+            linger (float): How long a new task waits for others to be published with it, in seconds
+            max_in_flight (int): Most tasks published but not yet confirmed
+            reconnect_delay (float): Wait before reopening a failed connection, in seconds
+            max_rejects (int): Times the broker may reject a task before it is dropped
+        """
+        self.parameters = pika.ConnectionParameters(host, port)
+        self.queue = queue
+        self.linger = linger
+        self.max_in_flight = max_in_flight
+        self.reconnect_delay = reconnect_delay
+        self.max_rejects = max_rejects
+
+        self.published = 0
+        self.confirmed = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.batches = 0
+
+        self._cond = threading.Condition()
+        self._pending: deque = deque()
+        self._in_flight: dict[int, tuple] = {}      #delivery tag -> (body, properties, rejects so far), in publish order
+        self._delivery_tag = 0
+        self._ready = False
+        self._drain_scheduled = False
+        self._closing = False
+        self._connection: pika.SelectConnection = None
+        self._channel = None
+        self._thread: threading.Thread = None
+        self._wake = threading.Event()
+        self._failing = False
+        self._reply_queues: dict[str, Callable[[pika.BasicProperties, bytes], None]] = {}
+        self._consumer_tags: dict[str, str] = {}    #reply queue -> consumer tag, on the current channel
+
+    @property
+    def in_flight(self) -> int:
+        """Tasks published to the broker and not yet confirmed"""
+        with self._cond:
+            return len(self._in_flight)
+
+    @property
+    def unconfirmed(self) -> int:
+        """Tasks not yet confirmed, published or not"""
+        with self._cond:
+            return len(self._pending) + len(self._in_flight)
+
+    def publish(self, body: str | bytes, properties: pika.BasicProperties = None):
+        """Queues a task for publishing and returns immediately. Opens the connection on first use.
+
+        Args:
+            body (str | bytes): The message
+            properties (BasicProperties): Its properties, e.g. the content type from `messages.encode`
+        """
+
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("Demine publisher is closed")
+            self._pending.append((body.encode() if isinstance(body, str) else body, properties, 0))
+            self.published += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="demine-publisher", daemon=True)
+                self._thread.start()
+            elif self._ready and not self._drain_scheduled:
+                self._drain_scheduled = True
+                self._connection.ioloop.add_callback_threadsafe(self._schedule_drain)
+
+    def consume_replies(self, queue: str, on_reply: Callable[[pika.BasicProperties, bytes], None]):
+        """Declares an exclusive reply queue on the publisher's connection and calls `on_reply(properties, body)`
+        on the IO thread for each message on it. Declared again after a reconnect, but replies sent while the
+        connection was down are lost. Does not open the connection by itself.
+
+        Args:
+            queue (str): Reply queue name, unique to the caller
+            on_reply (Callable): Called with every reply. Must not block
+        """
+
+        with self._cond:
+            self._reply_queues[queue] = on_reply
+            if self._connection is not None:
+                self._connection.ioloop.add_callback_threadsafe(self._declare_reply_queues)
+
+    def cancel_replies(self, queue: str):
+        """Stops consuming a reply queue and deletes it"""
+
+        with self._cond:
+            if self._reply_queues.pop(queue, None) is not None and self._connection is not None:
+                self._connection.ioloop.add_callback_threadsafe(lambda: self._delete_reply_queue(queue))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Waits until every task queued so far is confirmed or dropped. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def close(self, timeout: float = 10.0) -> int:
+        """Waits up to `timeout` seconds for the outstanding confirms, then closes the connection.
+        Returns the number of tasks that were never confirmed."""
+
+        if self._thread is None:
+            return 0
+        self.flush(timeout)
+
+        with self._cond:
+            self._closing = True
+            connection = self._connection
+        self._wake.set()
+        if connection is not None:
+            connection.ioloop.add_callback_threadsafe(lambda: self._close_connection(connection))
+        self._thread.join()
+        return self.unconfirmed
+
+    #====================================================
+    # Everything below runs on the publisher's IO thread
+    #====================================================
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._closing:
+                    return
+                self._connection = pika.SelectConnection(self.parameters, on_open_callback=self._on_open,
+                                                         on_open_error_callback=self._on_open_error,
+                                                         on_close_callback=self._on_closed)
+            self._connection.ioloop.start()
+
+            with self._cond:
+                #Tasks the broker never confirmed go out again on the next connection
+                self._pending.extendleft(reversed(self._in_flight.values()))
+                self._in_flight.clear()
+                self._connection = self._channel = None
+                self._ready = self._drain_scheduled = False
+                if self._closing:
+                    return
+            self._wake.wait(self.reconnect_delay)
+
+    def _close_connection(self, connection: pika.SelectConnection):
+        if not (connection.is_closing or connection.is_closed):
+            connection.close()
+
+    def _on_open(self, connection: pika.SelectConnection):
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_open_error(self, connection: pika.SelectConnection, error: Exception):
+        #Reported once per outage, not on every retry
+        if not self._failing:
+            print(f"[PUBLISHER] Could not connect to RabbitMQ, retrying every {self.reconnect_delay:g} s: {error!r}")
+            self._failing = True
+        connection.ioloop.stop()
+
+    def _on_closed(self, connection: pika.SelectConnection, reason: Exception):
+        with self._cond:
+            self._ready = False
+            closing = self._closing
+        if not closing and not self._failing:
+            print(f"[PUBLISHER] Connection to RabbitMQ lost, reconnecting: {reason!r}")
+            self._failing = True
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel):
+        self._channel = channel
+        channel.add_on_close_callback(self._on_channel_closed)
+
+        #Reply queues first, so they exist before any task naming them is published
+        self._consumer_tags.clear()
+        self._declare_reply_queues()
+        channel.queue_declare(queue=self.queue, callback=lambda _frame: channel.confirm_delivery(
+            ack_nack_callback=self._on_confirm, callback=self._on_ready))
+
+    def _on_channel_closed(self, channel, reason: Exception):
+        with self._cond:
+            self._ready = False
+            closing = self._closing
+
+        #Publishing needs the channel, so the connection is restarted with a new one
+        if not closing and not self._failing:
+            print(f"[PUBLISHER] Channel closed, reconnecting: {reason!r}")
+            self._failing = True
+        self._close_connection(self._connection)
+
+    def _declare_reply_queues(self):
+        if self._channel is None or not self._channel.is_open:
+            return
+        with self._cond:
+            queues = {queue: on_reply for queue, on_reply in self._reply_queues.items() if queue not in self._consumer_tags}
+
+        for queue, on_reply in queues.items():
+            self._channel.queue_declare(queue=queue, exclusive=True, auto_delete=True)
+            self._consumer_tags[queue] = self._channel.basic_consume(
+                queue, lambda _channel, _method, properties, body, on_reply=on_reply: on_reply(properties, body), auto_ack=True)
+
+    def _delete_reply_queue(self, queue: str):
+        consumer_tag = self._consumer_tags.pop(queue, None)
+        if consumer_tag is not None and self._channel is not None and self._channel.is_open:
+            self._channel.basic_cancel(consumer_tag)
+            self._channel.queue_delete(queue)
+
+    def _on_ready(self, _frame):
+        if self._failing:
+            print("[PUBLISHER] Connected to RabbitMQ again")
+            self._failing = False
+        with self._cond:
+            self._ready = True
+            self._delivery_tag = 0      #confirms count from 1 on every channel
+        self._drain()
+
+    def _schedule_drain(self):
+        self._connection.ioloop.call_later(self.linger, self._drain)
+
+    def _drain(self):
+        """Publishes pending tasks while the in-flight window has room"""
+
+        with self._cond:
+            self._drain_scheduled = False
+            if not self._ready:
+                return
+            batch = []
+            while self._pending and len(self._in_flight) < self.max_in_flight:
+                message = self._pending.popleft()
+                self._delivery_tag += 1
+                self._in_flight[self._delivery_tag] = message
+                batch.append(message)
+
+        for body, properties, _rejects in batch:
+            self._channel.basic_publish(exchange="", routing_key=self.queue, body=body, properties=properties)
+        if batch:
+            self.batches += 1
+
+    def _on_confirm(self, frame):
+        """Settles one task, or with `multiple` every task up to the delivery tag"""
+
+        method = frame.method
+        acked = isinstance(method, Basic.Ack)
+        with self._cond:
+            if method.multiple:
+                tags = list(takewhile(lambda tag: tag <= method.delivery_tag, self._in_flight))
+            else:
+                tags = [method.delivery_tag] if method.delivery_tag in self._in_flight else []
+
+            for tag in tags:
+                body, properties, rejects = self._in_flight.pop(tag)
+                if acked:
+                    self.confirmed += 1
+                    continue
+                self.rejected += 1
+                if rejects + 1 < self.max_rejects:
+                    self._pending.append((body, properties, rejects + 1))
+                else:
+                    #A task the broker keeps refusing would otherwise be published forever
+                    self.dropped += 1
+                    print(f"[PUBLISHER] Dropping a task the broker rejected {rejects + 1} times")
+            self._cond.notify_all()
+
+            #Confirms free room in the window. Tasks held back go out together with the next batch
+            drain = bool(self._pending) and not self._drain_scheduled
+            self._drain_scheduled = self._drain_scheduled or drain
+        if drain:
+            self._schedule_drain()
+
+
+_default: DeminePublisher = None
+_default_lock = threading.Lock()
+
+
+def default_publisher() -> DeminePublisher:
+    """The publisher shared by every rover of this process. Created on first use and closed at exit."""
+
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = DeminePublisher()
+            atexit.register(_default.close)
+        return _default
@@ -1,20 +1,25 @@
-import json
 from rpc import ground_control_pb2 as gc_pb2
 from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+from .demine_requests import DemineRequests
+from .messages import encode
 from .models import Cell, Map
-import pika
+from .publisher import DeminePublisher, default_publisher
 
 class Rover():
     """A class representing the Rover object"""
     
-    def __init__(self, id: int, map: Map, commands: str, stub: gc_pb2_grpc.GroundControlStub, start_x: int = 0, start_y: int = 0):
+    def __init__(self, id: int, map: Map, commands: str, stub: gc_pb2_grpc.GroundControlStub, start_x: int = 0, start_y: int = 0,
+                 publisher: DeminePublisher = None, demine_window: int = None):
         self.id: int = id
         self.commands: list = list(commands)
         self.stub: gc_pb2_grpc.GroundControlStub = stub         #lets rover comm w/ server on its own
         
-        self.rabbit_connection = pika.BlockingConnection(pika.ConnectionParameters('localhost', 5672))
-        self.rabbit_channel = self.rabbit_connection.channel()
-        self.rabbit_channel.queue_declare(queue="Demine-Queue")
+        #Shared by every rover of the process. Connects on the first demine task, not here
+        self.publisher: DeminePublisher = publisher if publisher is not None else default_publisher()
+        
+        #With a window, the deminers reply to each task and at most that many are outstanding.
+        #None publishes the tasks and forgets them
+        self.demines: DemineRequests = DemineRequests(id, self.publisher, demine_window) if demine_window else None
         
         self.path_array: list[list[str]] = [["0" for _ in range(map.num_cols)] for _ in range(map.num_rows)]
         
@@ -23,9 +28,55 @@ class Rover():
         self.position: Cell = map.cells[start_y][start_x]
         self.orientation: str = "DOWN"
         
+        #Serials of the mines the rover will reach, fetched up front. (x, y) -> serial
+        self.serials: dict[tuple[int, int], str] = {}
+        
+        
+    def scan_mines(self) -> list[Cell]:
+        """Dry-runs the commands against the map and returns the mines the rover will reach, in order.
+        Nothing is cleared and the rover is left where it started."""
+        
+        start_position, start_orientation = self.position, self.orientation
+        mines: list[Cell] = []
+        reached: set[Cell] = set()
+        
+        for cmd in self.commands:
+            if cmd == "D":
+                continue
+            
+            if self.position.value == "MINE" and self.position not in reached:
+                mines.append(self.position)
+                reached.add(self.position)
+                
+            self.move(cmd)
+            
+        self.position, self.orientation = start_position, start_orientation
+        return mines
+    
+    def fetch_serials(self):
+        """Fetches the serials of every mine the rover will reach in one GetMineSerials call"""
+        
+        mines = self.scan_mines()
+        if not mines:
+            return
+        
+        positions = [gc_pb2.SerialNumRequest(x_pos=cell.x_coord, y_pos=cell.y_coord) for cell in mines]
+        serials_res = self.stub.GetMineSerials(gc_pb2.SerialNumsRequest(positions=positions))
+        
+        self.serials = {(cell.x_coord, cell.y_coord): serial for cell, serial in zip(mines, serials_res.serialNums)}
+        print(f"[ROVER {self.id}] Serial numbers fetched for {len(self.serials)} mines")
+        
+    def get_serial(self, cell: Cell) -> str:
+        """Returns a mine's serial, from the prefetched serials if possible"""
+        
+        serial = self.serials.get((cell.x_coord, cell.y_coord))
+        if serial is None:
+            serial_res = self.stub.GetMineSerial(gc_pb2.SerialNumRequest(x_pos=cell.x_coord, y_pos=cell.y_coord))
+            serial = serial_res.serialNum
+        return serial
         
     def publish_demine_task(self, x_pos: int, y_pos: int, serial: str) -> None:
-        """Publishes a demining task to the rabbitMQ on the 'Demine-Queue' queue
+        """Publishes a demining task to the rabbitMQ on the 'Demine-Queue' queue, without waiting for it
 
         Args:
             x_pos (int): the x coordinate of the mine
@@ -33,20 +84,20 @@ class Rover():
             serial (str): the serial number of the mine
         """
         
-        message = {
-            "id": self.id,
-            "position": {
-                "x_pos": x_pos,
-                "y_pos": y_pos
-            },
-            "serial": serial
-        }
+        task = gc_pb2.DemineTask(rover_id=self.id, x_pos=x_pos, y_pos=y_pos, serial=serial)
+        
+        #Sent now or once the window has room, and answered on the rover's reply queue
+        if self.demines is not None:
+            self.demines.submit(task)
+            print(f"[ROVER {self.id}] Requested demining: mine ({x_pos},{y_pos}), serial {serial}. "
+                  f"{self.demines.outstanding} outstanding, {self.demines.waiting} waiting")
+            return
         
-        payload = json.dumps(message)
+        payload, properties = encode(task)
         
-        #Publish the message to the queue
-        self.rabbit_channel.basic_publish(exchange='', routing_key='Demine-Queue', body=payload)
-        print(f"[ROVER {self.id}] Published demining task: {payload}")
+        #Queue the message for publishing. Returns at once; the broker confirms it later
+        self.publisher.publish(payload, properties)
+        print(f"[ROVER {self.id}] Queued demining task: mine ({x_pos},{y_pos}), serial {serial}")
     
     def move(self, command: str):
         "Moves the rover in the direction specified by the command and updates position and orientation."
@@ -87,6 +138,9 @@ class Rover():
     def run(self):
         """Runs the rover through the map"""
         
+        #Get every serial the run will need before starting, so no mine needs a round trip
+        self.fetch_serials()
+        
         for cmd in self.commands:
             #Mark position in path array
             self.path_array[self.position.y_coord][self.position.x_coord] = "*"
@@ -99,9 +153,8 @@ class Rover():
             if self.position.value == "MINE":
                 print(f"\n[ROVER {self.id}] Is on a mine at position ({self.position.x_coord},{self.position.y_coord}). Fetching serial #")
 
-                #Fetch the mine's serial number from ground control
-                serial_res = self.stub.GetMineSerial(gc_pb2.SerialNumRequest(x_pos=self.position.x_coord, y_pos=self.position.y_coord))
-                serial_num = serial_res.serialNum
+                #Look up the mine's serial number. Normally prefetched by fetch_serials
+                serial_num = self.get_serial(self.position)
                 print(f"[ROVER {self.id}] Serial number fetched: {serial_num}")
                 
                 #Publish the demining task
@@ -112,10 +165,6 @@ class Rover():
 
 
             self.move(cmd)
-            
-        #Close the connection to the RabbitMQ server
-        self.rabbit_channel.close()
-        self.rabbit_connection.close()
         
                     
     def __repr__(self) -> str:
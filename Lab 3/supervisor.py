@@ -0,0 +1,255 @@
+"""Runs deminers as worker processes and scales their number with the Demine-Queue backlog.
+
+Every `--poll` seconds the supervisor reads the queue's depth and consumer count. Each worker
+reports how long its tasks take, which gives the estimated queue latency: how long a task
+published now would wait for a deminer,
+
+    latency = depth * mean task time / consumers
+
+Consumers include deminers started by hand. Above `--scale-up` seconds of latency the supervisor
+starts as many workers as would bring the latency back to `--target`. Below `--scale-down`
+seconds it stops one. Both are limited to `--min` and `--max` workers and wait out their
+cool-downs after any change. Each decision is printed with the latency that triggered it.
+
+Workers are stopped gracefully, idle ones first: a worker told to stop finishes and acks the task
+in hand, then exits. Worker ids start at FIRST_WORKER_ID, clear of the deminers started by hand.
+
+    python supervisor.py --min 1 --max 8
+"""
+import argparse
+import itertools
+import math
+import multiprocessing
+import queue
+import signal
+import sys
+import time
+from multiprocessing.sharedctypes import Synchronized
+from multiprocessing.synchronize import Event
+from typing import NamedTuple
+
+import pika
+
+from src.deminers import Deminer
+
+#============================================
+# Constants
+#============================================
+HOST = "localhost"
+QUEUE = "Demine-Queue"
+FIRST_WORKER_ID = 101      #deminers started by hand are 1 and 2
+STOP_CHECK = 0.5           #seconds between a worker's checks of its stop flag
+
+#Workers start fresh rather than forked, so they don't inherit the supervisor's RabbitMQ connection
+CONTEXT = multiprocessing.get_context("spawn")
+
+
+def run_worker(deminer_id: int, task_times: multiprocessing.Queue, busy: Synchronized, stop: Event):
+    """Worker process: one deminer, reporting each task's duration to the supervisor.
+
+    Runs until `stop` is set, checking it only between tasks, so it never quits halfway through one.
+    """
+
+    #Ctrl-C reaches the whole process group. The supervisor stops its workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    #A SIGTERM stops the worker like the supervisor does, after the task in hand
+    terminated = False
+
+    def on_sigterm(signum, frame):
+        nonlocal terminated
+        terminated = True
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+    def on_task_start():
+        busy.value = True
+
+    def on_task_done(seconds: float):
+        busy.value = False
+        task_times.put(seconds)
+
+    deminer = Deminer(deminer_id, on_task_start=on_task_start, on_task_done=on_task_done)
+
+    #Scheduled on the connection, so it only runs while no task callback is
+    def check_stop():
+        if stop.is_set() or terminated:
+            deminer.rabbit_channel.stop_consuming()
+        else:
+            deminer.rabbit_connection.call_later(STOP_CHECK, check_stop)
+
+    deminer.rabbit_connection.call_later(STOP_CHECK, check_stop)
+    deminer.start()
+    if deminer.rabbit_connection.is_open:
+        deminer.rabbit_connection.close()
+
+
+class Worker(NamedTuple):
+    """A deminer process and the flags it shares with the supervisor"""
+    process: multiprocessing.Process
+    busy: Synchronized      #working on a task
+    stop: Event             #set to stop after the task in hand
+
+
+class DeminerSupervisor():
+    """Starts and stops deminer worker processes as the Demine-Queue backlog changes"""
+
+    def __init__(self, min_workers: int, max_workers: int, target_latency: float, scale_up_latency: float,
+                 scale_down_latency: float, up_cooldown: float, down_cooldown: float, task_time: float):
+        """
+        Args:
+            min_workers (int): Workers kept running however empty the queue is
+            max_workers (int): Most workers at once
+            target_latency (float): Queue latency a scale up aims for, in seconds
+            scale_up_latency (float): Queue latency above which workers are added, in seconds
+            scale_down_latency (float): Queue latency below which a worker is stopped, in seconds
+            up_cooldown (float): Seconds after any change before workers are added
+            down_cooldown (float): Seconds after any change before a worker is stopped
+            task_time (float): Estimated seconds per task until the workers report their own
+        """
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.target_latency = target_latency
+        self.scale_up_latency = scale_up_latency
+        self.scale_down_latency = scale_down_latency
+        self.up_cooldown = up_cooldown
+        self.down_cooldown = down_cooldown
+        self.task_time = task_time
+
+        self.workers: dict[int, Worker] = {}       #deminer id -> worker, oldest first
+        self.stopping: dict[int, Worker] = {}      #told to stop, still finishing their task
+        self.task_times: multiprocessing.Queue = CONTEXT.Queue()
+        self.last_change = -math.inf
+
+        self._connection: pika.BlockingConnection = None
+        self._channel = None
+
+    def poll(self) -> tuple[int, int]:
+        """The queue's depth and consumer count"""
+
+        if self._connection is None or not self._connection.is_open:
+            self._connection = pika.BlockingConnection(pika.ConnectionParameters(HOST, 5672))
+            self._channel = self._connection.channel()
+
+        #Declaring an existing queue returns its counts
+        declare_ok = self._channel.queue_declare(queue=QUEUE)
+        return declare_ok.method.message_count, declare_ok.method.consumer_count
+
+    def update_task_time(self):
+        """Folds the task durations the workers reported since the last poll into the estimate"""
+
+        while True:
+            try:
+                seconds = self.task_times.get_nowait()
+            except queue.Empty:
+                return
+            self.task_time = 0.8 * self.task_time + 0.2 * seconds
+
+    def step(self):
+        """One poll and, if called for, one scaling decision"""
+
+        self.reap()
+        self.update_task_time()
+        depth, consumers = self.poll()
+        latency = depth * self.task_time / max(consumers, 1)
+        reason = f"{depth} tasks queued, {consumers} consumers, {self.task_time:.1f} s per task, queue latency {latency:.1f} s"
+        since_change = time.monotonic() - self.last_change
+
+        if len(self.workers) < self.min_workers:
+            self.scale_to(self.min_workers, f"below the minimum of {self.min_workers} workers. {reason}")
+
+        elif latency > self.scale_up_latency and len(self.workers) < self.max_workers and since_change >= self.up_cooldown:
+            #Enough consumers to bring the latency down to the target, counting deminers not run by us
+            needed = math.ceil(depth * self.task_time / self.target_latency) - (consumers - len(self.workers))
+            self.scale_to(min(max(needed, len(self.workers) + 1), self.max_workers),
+                          f"{reason} > {self.scale_up_latency:g} s")
+
+        elif latency < self.scale_down_latency and len(self.workers) > self.min_workers and since_change >= self.down_cooldown:
+            self.scale_to(len(self.workers) - 1, f"{reason} < {self.scale_down_latency:g} s")
+
+    def scale_to(self, count: int, reason: str):
+        """Starts or stops workers until `count` are running"""
+
+        print(f"[SUPERVISOR] Scaling {len(self.workers)} -> {count} deminers: {reason}")
+
+        while len(self.workers) < count:
+            #Ids of workers still stopping stay taken, so no two deminers share one
+            deminer_id = next(deminer_id for deminer_id in itertools.count(FIRST_WORKER_ID)
+                              if deminer_id not in self.workers and deminer_id not in self.stopping)
+            busy, stop = CONTEXT.Value("b", False), CONTEXT.Event()
+            process = CONTEXT.Process(target=run_worker, args=(deminer_id, self.task_times, busy, stop),
+                                      name=f"deminer-{deminer_id}", daemon=True)
+            process.start()
+            self.workers[deminer_id] = Worker(process, busy, stop)
+
+        #Idle workers go first, then the newest. Each finishes the task in hand and is reaped once it exits
+        surplus = len(self.workers) - count
+        if surplus > 0:
+            newest_first = list(reversed(self.workers))
+            for deminer_id in sorted(newest_first, key=lambda deminer_id: bool(self.workers[deminer_id].busy.value))[:surplus]:
+                worker = self.workers.pop(deminer_id)
+                worker.stop.set()
+                self.stopping[deminer_id] = worker
+
+        self.last_change = time.monotonic()
+
+    def reap(self):
+        """Forgets workers that exited, whether stopped or on their own, e.g. when RabbitMQ went away"""
+
+        for deminer_id, worker in list(self.stopping.items()):
+            if not worker.process.is_alive():
+                worker.process.join()
+                print(f"[SUPERVISOR] Deminer {deminer_id} stopped")
+                del self.stopping[deminer_id]
+
+        for deminer_id, worker in list(self.workers.items()):
+            if not worker.process.is_alive():
+                print(f"[SUPERVISOR] Deminer {deminer_id} exited with code {worker.process.exitcode}")
+                del self.workers[deminer_id]
+
+    def stop(self):
+        """Stops every worker, waits for their tasks in hand to finish and closes the connection"""
+
+        if self.workers:
+            self.scale_to(0, "supervisor stopping")
+        for worker in self.stopping.values():
+            worker.process.join()
+        self.reap()
+        if self._connection is not None and self._connection.is_open:
+            self._connection.close()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min", type=int, default=1, help="Fewest deminers")
+    parser.add_argument("--max", type=int, default=4, help="Most deminers")
+    parser.add_argument("--poll", type=float, default=2.0, help="Seconds between queue polls")
+    parser.add_argument("--target", type=float, default=30.0, help="Queue latency to scale up to, in seconds")
+    parser.add_argument("--scale-up", type=float, default=60.0, help="Queue latency that adds deminers, in seconds")
+    parser.add_argument("--scale-down", type=float, default=5.0, help="Queue latency that removes a deminer, in seconds")
+    parser.add_argument("--up-cooldown", type=float, default=10.0, help="Seconds after a change before scaling up")
+    parser.add_argument("--down-cooldown", type=float, default=60.0, help="Seconds after a change before scaling down")
+    parser.add_argument("--task-time", type=float, default=20.0, help="Seconds per task until the deminers report theirs")
+    args = parser.parse_args()
+
+    if not 0 <= args.min <= args.max or args.max < 1:
+        parser.error("need 0 <= --min <= --max and --max >= 1")
+
+    #A terminated supervisor still stops its workers
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    supervisor = DeminerSupervisor(args.min, args.max, args.target, args.scale_up, args.scale_down,
+                                   args.up_cooldown, args.down_cooldown, args.task_time)
+    print(f"[SUPERVISOR] Keeping {args.min} to {args.max} deminers on {QUEUE}")
+
+    try:
+        while True:
+            try:
+                supervisor.step()
+            except pika.exceptions.AMQPConnectionError as e:
+                print(f"[SUPERVISOR] Could not reach RabbitMQ, retrying: {e!r}")
+            time.sleep(args.poll)
+    except KeyboardInterrupt:
+        print("\n[SUPERVISOR] Keyboard Interrupt. Shutting down.")
+    finally:
+        supervisor.stop()
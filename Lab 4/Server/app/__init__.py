@@ -0,0 +1 @@
+from . import common_path     #pins is shared with the other labs and imports as the `common` package
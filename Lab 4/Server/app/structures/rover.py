@@ -5,6 +5,7 @@ import time
 
 from ..models.rover import RoverModel
 from . import map
+from common.pins import solve_pin
 
 class Rover():
     """A class representing the Rover object"""
@@ -153,21 +154,15 @@ class Rover():
            (bool) : True if the mine was successfully mined, False otherwise
         """
         
-        pin = 0
-        while True:
-            hash_val = self.hashKey(str(pin), serial)
-            
-            if hash_val.startswith("000000"):
-                
-                #Clear the current cell
-                self.position = map.Cell(self.position.x_position, self.position.y_position)
-                
-                print(f"[MINE {serial}]: Dig Success. Pin: {pin}. Full hash: {hash_val}")
-                return pin
-            
-            pin += 1
-            
-        return None
+        #Rovers digging mines with the same serial share one brute force
+        pin = solve_pin(serial)
+        hash_val = self.hashKey(str(pin), serial)
+        
+        #Clear the current cell
+        self.position = map.Cell(self.position.x_position, self.position.y_position)
+        
+        print(f"[MINE {serial}]: Dig Success. Pin: {pin}. Full hash: {hash_val}")
+        return pin
                     
     def __repr__(self) -> str:
         return f"[ROVER {self.id}]: Position: ({self.position.x_position}, {self.position.y_position}), Orientation: {self.orientation}"
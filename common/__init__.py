@@ -0,0 +1,6 @@
+"""The modules every lab shares.
+
+Each lab puts the top of the repository on the import path through its `common_path.py` and imports
+them from this package, e.g. `from common import fetch`. Run their command line tools from the top of
+the repository as modules, e.g. `python -m common.output`.
+"""
@@ -0,0 +1,69 @@
+"""Compares sequential, pooled async and hedged/retried command fetching against the local stub API"""
+import argparse
+import asyncio
+import time
+
+import requests
+
+from . import commands, fetch
+from .stub_server import StubServer
+
+
+def sequential_fetch(base_url: str, rover_ids: list[int]) -> dict[int, str]:
+    """Fetches commands the way `init_rovers` used to: one new connection per rover, one after another.
+    Failed rovers are left out of the result."""
+
+    fetched: dict[int, str] = {}
+    for rover_id in rover_ids:
+        try:
+            response = requests.get(fetch.endpoint_for(base_url, rover_id))
+            response.raise_for_status()
+        except requests.RequestException:
+            continue
+        fetched[rover_id] = response.json()["data"]["moves"]
+    return fetched
+
+
+async def async_fetch(base_url: str, rover_ids: list[int], **kwargs) -> tuple[dict[int, str], fetch.LatencyStats]:
+    source = commands.HttpCommandSource(base_url, **kwargs)
+    try:
+        fetched = await commands.fetch_all_commands(source, rover_ids)
+    finally:
+        await source.aclose()
+    return fetched, source.stats
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rovers", type=int, default=100, help="Number of rovers to fetch")
+    parser.add_argument("--delay", type=float, default=0.1, help="Stub server delay per request in seconds")
+    parser.add_argument("--concurrency", type=int, default=20, help="Maximum requests in flight for the async fetch")
+    parser.add_argument("--slow-rate", type=float, default=0.02, help="Fraction of stub responses that are slow")
+    parser.add_argument("--slow-delay", type=float, default=2.0, help="Extra delay of a slow response in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="Fraction of stub requests that fail")
+    args = parser.parse_args()
+
+    server = StubServer(port=0, delay=args.delay, slow_rate=args.slow_rate, slow_delay=args.slow_delay,
+                        failure_rate=args.failure_rate, seed=0)
+    server.start_background()
+    rover_ids = list(range(1, args.rovers + 1))
+
+    print(f"Rovers: {args.rovers}, stub delay: {args.delay}s, slow: {args.slow_rate:.0%} (+{args.slow_delay}s), "
+          f"failures: {args.failure_rate:.0%}, concurrency: {args.concurrency}\n")
+
+    start_time = time.perf_counter()
+    fetched = sequential_fetch(server.base_url, rover_ids)
+    print(f"{'Sequential requests.get':<26} {time.perf_counter() - start_time:7.3f}s  fetched {len(fetched)}/{args.rovers}")
+
+    runs = {
+        "Pooled async, no retries": dict(retries=0, hedge=False),
+        "Pooled async, hedged": dict(retries=3, hedge=True),
+    }
+    for name, options in runs.items():
+        start_time = time.perf_counter()
+        fetched, stats = asyncio.run(async_fetch(server.base_url, rover_ids, max_concurrency=args.concurrency, **options))
+        print(f"{name:<26} {time.perf_counter() - start_time:7.3f}s  fetched {len(fetched)}/{args.rovers}")
+        print(f"{'':<26} {stats}")
+
+    server.shutdown()
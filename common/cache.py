@@ -0,0 +1,259 @@
+"""In-memory cache of rover command strings for the GroundControl server"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent import futures
+from typing import Callable, Iterable
+
+from .commands import CommandSource
+
+
+class CommandCache():
+    """TTL cache of rover commands in front of a command source such as the rover API.
+
+    Every known rover is prefetched at startup and a background thread refreshes entries before
+    they expire, so lookups are normally a dictionary read. Concurrent misses for the same rover
+    share one upstream request, and a stale entry is served if a refresh fails.
+    """
+
+    def __init__(self, source: CommandSource, rover_ids: Iterable[int], ttl: float = 300.0,
+                 refresh_interval: float = 30.0, transform: Callable[[str], str] = None, max_concurrency: int = 10):
+        """
+        Args:
+            source (CommandSource): Where the commands come from, normally the rover API
+            rover_ids (Iterable[int]): The rovers to prefetch and keep refreshed
+            ttl (float): Seconds an entry is served before it must be fetched again
+            refresh_interval (float): Seconds between background refresh passes
+            transform (Callable[[str], str]): Applied once to each fetched command string
+            max_concurrency (int): Most rovers fetched at once while prefetching
+        """
+        self.source = source
+        self.rover_ids = list(rover_ids)
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.transform = transform
+        self.max_concurrency = max_concurrency
+
+        self._lock = threading.Lock()
+        self._entries: dict[int, tuple[str, float]] = {}       #rover_id -> (commands, fetched at)
+        self._inflight: dict[int, futures.Future] = {}
+        self._stop = threading.Event()
+        self._refresher: threading.Thread = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+
+    def start(self):
+        """Prefetches every rover and starts the background refresher"""
+        self.prefetch(self.rover_ids)
+        self._refresher = threading.Thread(target=self._refresh_loop, name="command-refresh", daemon=True)
+        self._refresher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+
+    def prefetch(self, rover_ids: Iterable[int]):
+        """Fetches the given rovers concurrently. Failures are logged and left to a later refresh."""
+        rover_ids = list(rover_ids)
+        with futures.ThreadPoolExecutor(max_workers=max(1, min(len(rover_ids), self.max_concurrency))) as pool:
+            results = pool.map(self._try_load, rover_ids)
+        loaded = sum(results)
+        logging.info(f"Prefetched commands for {loaded}/{len(rover_ids)} rovers")
+
+    def get(self, rover_id: int) -> str:
+        """Returns the rover's command string, fetching it only if it is missing or expired.
+
+        Raises:
+            FetchError: If the rover is not cached and the rover API can't be reached
+        """
+        with self._lock:
+            entry = self._entries.get(rover_id)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        try:
+            return self._load(rover_id)
+        except Exception:
+            if entry is None:
+                raise
+            logging.warning(f"Serving stale commands for rover {rover_id}")
+            with self._lock:
+                self.stale_served += 1
+            return entry[0]
+
+    def _load(self, rover_id: int) -> str:
+        """Fetches a rover's commands. Concurrent calls for one rover share one upstream request."""
+        with self._lock:
+            future = self._inflight.get(rover_id)
+            leader = future is None
+            if leader:
+                future = futures.Future()
+                self._inflight[rover_id] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            commands = self.source.get_commands(rover_id)
+            if self.transform is not None:
+                commands = self.transform(commands)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[rover_id]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[rover_id] = (commands, time.monotonic())
+            del self._inflight[rover_id]
+        future.set_result(commands)
+        return commands
+
+    def _try_load(self, rover_id: int) -> bool:
+        try:
+            self._load(rover_id)
+            return True
+        except Exception as e:
+            logging.warning(f"Could not fetch commands for rover {rover_id}: {e}")
+            return False
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            #Refresh anything that would expire before the next pass, plus anything that failed before
+            now = time.monotonic()
+            with self._lock:
+                due = [rover_id for rover_id in self.rover_ids
+                       if rover_id not in self._entries or now - self._entries[rover_id][1] >= self.ttl - self.refresh_interval]
+            if due:
+                self.prefetch(due)
+
+    def __repr__(self) -> str:
+        return f"CommandCache(entries={len(self._entries)}, hits={self.hits}, misses={self.misses}, stale_served={self.stale_served})"
+
+
+class AsyncCommandCache():
+    """asyncio version of `CommandCache` for the grpc.aio server.
+
+    Misses are fetched with the source's `aget_commands`, so a lookup waiting on the rover API
+    holds no thread. Concurrent misses for the same rover share one upstream request.
+    """
+
+    def __init__(self, source: CommandSource, rover_ids: Iterable[int], ttl: float = 300.0,
+                 refresh_interval: float = 30.0, transform: Callable[[str], str] = None, max_concurrency: int = 10):
+        """
+        Args:
+            source (CommandSource): Where the commands come from, normally the rover API
+            rover_ids (Iterable[int]): The rovers to prefetch and keep refreshed
+            ttl (float): Seconds an entry is served before it must be fetched again
+            refresh_interval (float): Seconds between background refresh passes
+            transform (Callable[[str], str]): Applied once to each fetched command string
+            max_concurrency (int): Most rovers fetched at once while prefetching
+        """
+        self.source = source
+        self.rover_ids = list(rover_ids)
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.transform = transform
+        self.max_concurrency = max_concurrency
+
+        #Only touched from the event loop, so no lock is needed
+        self._entries: dict[int, tuple[str, float]] = {}       #rover_id -> (commands, fetched at)
+        self._inflight: dict[int, asyncio.Task] = {}
+        self._refresher: asyncio.Task = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+
+    async def start(self):
+        """Prefetches every rover and starts the background refresher"""
+        await self.prefetch(self.rover_ids)
+        self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+
+    async def prefetch(self, rover_ids: Iterable[int]):
+        """Fetches the given rovers concurrently. Failures are logged and left to a later refresh."""
+        rover_ids = list(rover_ids)
+        limiter = asyncio.Semaphore(self.max_concurrency)
+
+        async def limited(rover_id: int) -> bool:
+            async with limiter:
+                return await self._try_load(rover_id)
+
+        loaded = sum(await asyncio.gather(*(limited(rover_id) for rover_id in rover_ids)))
+        logging.info(f"Prefetched commands for {loaded}/{len(rover_ids)} rovers")
+
+    async def get(self, rover_id: int) -> str:
+        """Returns the rover's command string, fetching it only if it is missing or expired.
+
+        Raises:
+            FetchError: If the rover is not cached and the rover API can't be reached
+        """
+        entry = self._entries.get(rover_id)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+
+        try:
+            return await self._load(rover_id)
+        except Exception:
+            if entry is None:
+                raise
+            logging.warning(f"Serving stale commands for rover {rover_id}")
+            self.stale_served += 1
+            return entry[0]
+
+    async def _load(self, rover_id: int) -> str:
+        """Fetches a rover's commands. Concurrent calls for one rover share one upstream request."""
+        task = self._inflight.get(rover_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(rover_id))
+            task.add_done_callback(lambda done: self._finish(rover_id, done))
+            self._inflight[rover_id] = task
+
+        #Shielded so a caller that gives up doesn't cancel the request the others are waiting on
+        return await asyncio.shield(task)
+
+    async def _fetch(self, rover_id: int) -> str:
+        commands = await self.source.aget_commands(rover_id)
+        if self.transform is not None:
+            commands = self.transform(commands)
+        self._entries[rover_id] = (commands, time.monotonic())
+        return commands
+
+    def _finish(self, rover_id: int, task: asyncio.Task):
+        del self._inflight[rover_id]
+        if not task.cancelled():
+            #Mark the error as retrieved in case every caller has already given up
+            task.exception()
+
+    async def _try_load(self, rover_id: int) -> bool:
+        try:
+            await self._load(rover_id)
+            return True
+        except Exception as e:
+            logging.warning(f"Could not fetch commands for rover {rover_id}: {e}")
+            return False
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            now = time.monotonic()
+            due = [rover_id for rover_id in self.rover_ids
+                   if rover_id not in self._entries or now - self._entries[rover_id][1] >= self.ttl - self.refresh_interval]
+            if due:
+                await self.prefetch(due)
+
+    def __repr__(self) -> str:
+        return f"AsyncCommandCache(entries={len(self._entries)}, hits={self.hits}, misses={self.misses}, stale_served={self.stale_served})"
@@ -0,0 +1,308 @@
+"""Pluggable sources of rover command strings.
+
+Every source provides `get_commands(rover_id)` and `aget_commands(rover_id)`:
+
+    HttpCommandSource       the rover API, through the pooled clients in `fetch.py`
+    FixtureCommandSource    command strings recorded to a JSON file
+    SyntheticCommandSource  deterministic random command strings
+
+`SimulatedLatencySource` wraps any of them with a latency, jitter and failure model so the
+pipeline can be load tested without the network. `source_from_env` picks one from environment
+variables:
+
+    ROVER_COMMAND_SOURCE    http (default), fixture or synthetic
+    ROVER_COMMAND_FIXTURE   fixture file path
+    ROVER_SOURCE_LATENCY    simulated latency as "mean_ms[,jitter_ms[,failure_rate]]"
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Iterable
+
+from . import fetch
+
+
+class CommandSource(ABC):
+    """Interface of a source of rover command strings"""
+
+    #Per-attempt latency stats, for sources that have them
+    stats: fetch.LatencyStats = None
+
+    @abstractmethod
+    def get_commands(self, rover_id: int) -> str:
+        """Returns the command string of a rover.
+
+        Raises:
+            FetchError: If the commands could not be retrieved
+        """
+
+    async def aget_commands(self, rover_id: int) -> str:
+        """Async version of `get_commands`. By default runs it on a worker thread."""
+        return await asyncio.to_thread(self.get_commands, rover_id)
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        self.close()
+
+
+class HttpCommandSource(CommandSource):
+    """The rover API. Blocking calls share one pooled client and async calls get one per event loop,
+    all sharing one set of stats."""
+
+    def __init__(self, base_url: str, **client_kwargs):
+        self.base_url = base_url
+        self.client_kwargs = client_kwargs
+        self.stats = fetch.LatencyStats()
+        self._client: fetch.CommandClient = None
+        #Concurrent first calls must share one client, not each open their own pool
+        self._client_lock = threading.Lock()
+        #An async client and its lock only work in the event loop they were made in, so they are kept per loop
+        self._async_clients: dict[asyncio.AbstractEventLoop, fetch.AsyncCommandClient] = {}
+        self._async_locks: dict[asyncio.AbstractEventLoop, asyncio.Lock] = {}
+
+    def get_commands(self, rover_id: int) -> str:
+        client = self._client
+        if client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = fetch.CommandClient(self.base_url, stats=self.stats, **self.client_kwargs)
+                client = self._client
+        return client.get_commands(rover_id)
+
+    async def aget_commands(self, rover_id: int) -> str:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            async with self._async_lock(loop):
+                client = self._async_clients.get(loop)
+                if client is None:
+                    client = await fetch.AsyncCommandClient(self.base_url, stats=self.stats, **self.client_kwargs).__aenter__()
+                    self._async_clients[loop] = client
+        return await client.get_commands(rover_id)
+
+    def _async_lock(self, loop: asyncio.AbstractEventLoop) -> asyncio.Lock:
+        with self._client_lock:
+            lock = self._async_locks.get(loop)
+            if lock is None:
+                #A new loop. Forget the ones that were closed, whose clients can't be used or closed any more
+                for closed in [other for other in self._async_locks if other.is_closed()]:
+                    del self._async_locks[closed]
+                    self._async_clients.pop(closed, None)
+                lock = self._async_locks[loop] = asyncio.Lock()
+        return lock
+
+    def close(self):
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    async def aclose(self):
+        """Closes the async client of the running event loop and the blocking client.
+        Clients of other loops can only be closed from their own loop."""
+        loop = asyncio.get_running_loop()
+        async with self._async_lock(loop):
+            client = self._async_clients.pop(loop, None)
+        if client is not None:
+            await client.__aexit__(None, None, None)
+        self.close()
+
+
+class FixtureCommandSource(CommandSource):
+    """Command strings recorded to a JSON file of the form {"<rover id>": "<commands>"}"""
+
+    def __init__(self, fixture_path: str):
+        self.fixture_path = fixture_path
+        with open(fixture_path, "r") as fixture_f:
+            self.commands: dict[int, str] = {int(rover_id): moves for rover_id, moves in json.load(fixture_f).items()}
+
+    def get_commands(self, rover_id: int) -> str:
+        try:
+            return self.commands[rover_id]
+        except KeyError:
+            raise fetch.FetchError(f"Rover {rover_id} is not in fixture {self.fixture_path}") from None
+
+    async def aget_commands(self, rover_id: int) -> str:
+        return self.get_commands(rover_id)
+
+
+class SyntheticCommandSource(CommandSource):
+    """Deterministic random command strings. The same rover id and seed always give the same commands."""
+
+    def __init__(self, length: int = 500, alphabet: str = "MMLRD", seed: int = 0):
+        """
+        Args:
+            length (int): Length of each command string
+            alphabet (str): Commands to draw from. Repeat a command to make it more likely
+            seed (int): Seed mixed with the rover id
+        """
+        self.length = length
+        self.alphabet = alphabet
+        self.seed = seed
+
+    def get_commands(self, rover_id: int) -> str:
+        rng = random.Random(f"{self.seed}:{rover_id}")
+        return "".join(rng.choice(self.alphabet) for _ in range(self.length))
+
+    async def aget_commands(self, rover_id: int) -> str:
+        return self.get_commands(rover_id)
+
+
+class LatencyModel():
+    """Draws response latencies: a normally distributed base with an occasional slow tail, plus injected failures"""
+
+    def __init__(self, mean: float = 0.05, jitter: float = 0.0, tail_rate: float = 0.0, tail_delay: float = 1.0,
+                 failure_rate: float = 0.0, seed: int = None):
+        """
+        Args:
+            mean (float): Mean latency in seconds
+            jitter (float): Standard deviation of the latency in seconds
+            tail_rate (float): Fraction of calls that get an extra `tail_delay`
+            tail_delay (float): Extra latency of a slow call in seconds
+            failure_rate (float): Fraction of calls that fail after their latency
+            seed (int): Seed for reproducible draws
+        """
+        self.mean = mean
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_delay = tail_delay
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+
+    def draw(self) -> tuple[float, bool]:
+        """Returns the latency of the next call and whether it fails"""
+        latency = max(0.0, self.rng.gauss(self.mean, self.jitter)) if self.jitter > 0 else self.mean
+        if self.rng.random() < self.tail_rate:
+            latency += self.tail_delay
+        return latency, self.rng.random() < self.failure_rate
+
+    def __repr__(self) -> str:
+        return f"LatencyModel(mean={self.mean}, jitter={self.jitter}, tail_rate={self.tail_rate}, failure_rate={self.failure_rate})"
+
+
+class SimulatedLatencySource(CommandSource):
+    """Wraps another source and delays (or fails) every call according to a `LatencyModel`"""
+
+    def __init__(self, source: CommandSource, model: LatencyModel):
+        self.source = source
+        self.model = model
+        self.stats = fetch.LatencyStats()
+
+    def get_commands(self, rover_id: int) -> str:
+        latency, fail = self.model.draw()
+        time.sleep(latency)
+        self._check(rover_id, latency, fail)
+        return self.source.get_commands(rover_id)
+
+    async def aget_commands(self, rover_id: int) -> str:
+        latency, fail = self.model.draw()
+        await asyncio.sleep(latency)
+        self._check(rover_id, latency, fail)
+        return await self.source.aget_commands(rover_id)
+
+    def _check(self, rover_id: int, latency: float, fail: bool):
+        self.stats.record(latency, "error" if fail else "ok")
+        if fail:
+            raise fetch.FetchError(f"Simulated failure fetching commands for rover {rover_id}")
+
+    def close(self):
+        self.source.close()
+
+    async def aclose(self):
+        await self.source.aclose()
+
+
+def parse_latency(spec: str) -> LatencyModel:
+    """Parses "mean_ms[,jitter_ms[,failure_rate]]" into a `LatencyModel`"""
+    parts = [float(part) for part in spec.split(",")]
+    mean_ms, jitter_ms, failure_rate = (parts + [0.0, 0.0])[:3]
+    return LatencyModel(mean=mean_ms / 1000, jitter=jitter_ms / 1000, failure_rate=failure_rate)
+
+
+def source_from_env(base_url: str, fixture_path: str = "./res/commands.json", **client_kwargs) -> CommandSource:
+    """Builds the command source selected by the ROVER_COMMAND_* environment variables"""
+
+    kind = os.environ.get("ROVER_COMMAND_SOURCE", "http")
+    match kind:
+        case "http":
+            source = HttpCommandSource(base_url, **client_kwargs)
+        case "fixture":
+            source = FixtureCommandSource(os.environ.get("ROVER_COMMAND_FIXTURE", fixture_path))
+        case "synthetic":
+            source = SyntheticCommandSource()
+        case _:
+            raise ValueError(f"Unknown command source {kind!r}. Expected http, fixture or synthetic")
+
+    latency = os.environ.get("ROVER_SOURCE_LATENCY")
+    if latency:
+        source = SimulatedLatencySource(source, parse_latency(latency))
+    return source
+
+
+async def iter_commands(source: CommandSource, rover_ids: Iterable[int]) -> AsyncIterator[tuple[int, str]]:
+    """Fetches the commands of every rover concurrently and yields them as the responses arrive.
+
+    With an `HttpCommandSource` all requests share one connection pool, so connections are
+    kept alive and reused instead of being opened once per rover.
+
+    Args:
+        source (CommandSource): Where the commands come from
+        rover_ids (Iterable[int]): The ids of the rovers to fetch
+
+    Yields:
+        (tuple[int, str]) : The rover id and its command string, in completion order.
+        Rovers whose commands could not be fetched are reported and skipped.
+    """
+
+    async def fetch_one(rover_id: int) -> tuple[int, str | None]:
+        try:
+            return rover_id, await source.aget_commands(rover_id)
+        except fetch.FetchError as e:
+            print(f"[ROVER {rover_id}]: {e}. Skipping rover.")
+            return rover_id, None
+
+    tasks = [asyncio.create_task(fetch_one(rover_id)) for rover_id in rover_ids]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            rover_id, moves = await next_done
+            if moves is not None:
+                yield rover_id, moves
+    finally:
+        #Don't leave requests running if the consumer stops early or a request fails
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fetch_all_commands(source: CommandSource, rover_ids: Iterable[int]) -> dict[int, str]:
+    """Fetches the commands of every rover and returns them once all have arrived"""
+    return {rover_id: moves async for rover_id, moves in iter_commands(source, rover_ids)}
+
+
+def record_fixture(source: CommandSource, rover_ids, fixture_path: str):
+    """Records the commands of the given rovers from `source` into a fixture file"""
+    commands = {str(rover_id): source.get_commands(rover_id) for rover_id in rover_ids}
+    with open(fixture_path, "w") as fixture_f:
+        json.dump(commands, fixture_f, indent=2)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Record rover commands from the rover API into a fixture file")
+    parser.add_argument("fixture_path", help="Where to write the fixture")
+    parser.add_argument("--url", default="https://coe892.reev.dev/lab1/rover/", help="Base URL of the rover API")
+    parser.add_argument("--rovers", type=int, default=10, help="Record rovers 1 to N")
+    args = parser.parse_args()
+
+    source = HttpCommandSource(args.url)
+    record_fixture(source, range(1, args.rovers + 1), args.fixture_path)
+    source.close()
+    print(f"Recorded {args.rovers} rovers to {args.fixture_path}")
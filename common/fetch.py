@@ -0,0 +1,353 @@
+"""Fetch layer for the rover command API.
+
+Both clients apply the same policy to every rover: a deadline on each attempt, jittered
+exponential backoff between retries, and a hedged duplicate request once an attempt has
+been outstanding longer than the observed p95 latency. The first good reply wins.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent import futures
+import httpx
+import requests
+
+
+def endpoint_for(base_url: str, rover_id: int) -> str:
+    """Builds the rover endpoint the same way the synchronous version does"""
+    return f"{base_url}/{rover_id}"
+
+
+class FetchError(Exception):
+    """Raised when every attempt to fetch a rover's commands has failed"""
+
+
+class LatencyStats():
+    """Thread-safe record of per-attempt latencies and outcomes"""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=window)
+        self.attempts = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, latency: float, outcome: str = "ok"):
+        """Records one attempt. `outcome` is one of "ok", "error" or "timeout"."""
+        with self._lock:
+            self.attempts += 1
+            if outcome == "ok":
+                self._latencies.append(latency)
+            elif outcome == "timeout":
+                self.timeouts += 1
+            else:
+                self.failures += 1
+
+    def count(self, counter: str):
+        """Increments one of the retry/hedge counters"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def percentile(self, pct: float) -> float | None:
+        """Returns the `pct` percentile of successful attempt latencies, or None if there are none"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    def summary(self) -> dict:
+        """Returns the counters and latency percentiles (in milliseconds) as a dict"""
+
+        def ms(value: float | None) -> float | None:
+            return None if value is None else round(value * 1000, 2)
+
+        return {
+            "attempts": self.attempts,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+            "max_ms": ms(self.percentile(100)),
+        }
+
+    def __repr__(self) -> str:
+        return " ".join(f"{key}={value}" for key, value in self.summary().items())
+
+
+class _CommandClientBase():
+    """Retry and hedging policy shared by the sync and async clients"""
+
+    HEDGE_POLL = 0.05       #seconds between re-checks of the hedge delay while an attempt is outstanding
+
+    def __init__(self, base_url: str, max_concurrency: int = 10, timeout: float = 5.0, retries: int = 3,
+                 backoff: float = 0.1, max_backoff: float = 2.0, hedge: bool = True, hedge_percentile: float = 95,
+                 min_hedge_delay: float = 0.01, hedge_warmup: int = 10, stats: LatencyStats = None):
+        """
+        Args:
+            base_url (str): The base URL of the rover API
+            max_concurrency (int): The maximum number of requests in flight at once
+            timeout (float): Deadline of a single attempt in seconds
+            retries (int): How many times a failed request is retried
+            backoff (float): Base backoff in seconds, doubled on every retry and fully jittered
+            max_backoff (float): Upper bound on a single backoff in seconds
+            hedge (bool): Whether to send a hedged duplicate of slow requests
+            hedge_percentile (float): Latency percentile after which a request is hedged
+            min_hedge_delay (float): Lower bound on the hedge delay in seconds
+            hedge_warmup (int): Successful samples needed before hedging starts
+            stats (LatencyStats): Stats to record into, to share them between clients
+        """
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.hedge_warmup = hedge_warmup
+        self.stats = stats if stats is not None else LatencyStats()
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def hedge_delay(self) -> float | None:
+        """How long to wait on an attempt before hedging it, or None if there are too few samples"""
+        if self.stats.samples < self.hedge_warmup:
+            return None
+        return max(self.min_hedge_delay, self.stats.percentile(self.hedge_percentile))
+
+    def hedge_wait(self, elapsed: float) -> float | None:
+        """How long to keep waiting on an attempt that has run for `elapsed` seconds before
+        checking it again. 0 means hedge now and None means don't hedge it at all."""
+        if not self.hedge or elapsed >= self.timeout:
+            return None
+
+        delay = self.hedge_delay()
+        if delay is None:
+            #Not warmed up yet. Check again once more replies have come in
+            return self.HEDGE_POLL
+        return max(0.0, min(delay - elapsed, self.HEDGE_POLL))
+
+    @staticmethod
+    def parse_moves(body: dict) -> str:
+        #Parse the json response body
+        return body["data"]["moves"]
+
+
+class CommandClient(_CommandClientBase):
+    """Blocking client on a pooled `requests.Session`. Hedges run on a small thread pool."""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(base_url, **kwargs)
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2 * self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = futures.ThreadPoolExecutor(max_workers=2 * self.max_concurrency, thread_name_prefix="fetch")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def _attempt(self, rover_id: int, started: threading.Event = None) -> str:
+        if started is not None:
+            started.set()
+
+        start_time = time.perf_counter()
+        try:
+            response = self.session.get(endpoint_for(self.base_url, rover_id), timeout=self.timeout)
+            response.raise_for_status()
+            moves = self.parse_moves(response.json())
+        except requests.Timeout:
+            self.stats.record(time.perf_counter() - start_time, "timeout")
+            raise
+        except Exception:
+            self.stats.record(time.perf_counter() - start_time, "error")
+            raise
+
+        self.stats.record(time.perf_counter() - start_time)
+        return moves
+
+    def _hedged(self, rover_id: int) -> str:
+        started = threading.Event()
+        primary = self._executor.submit(self._attempt, rover_id, started)
+        pending = {primary}
+
+        try:
+            #The hedge clock starts once the primary is actually on the wire, not while it is queued.
+            #A primary cancelled in the queue by close() never starts, so check on it now and then
+            while not started.wait(0.1):
+                if primary.done():
+                    break
+            start_time = time.monotonic()
+            deadline = start_time + self.timeout
+
+            while (wait := self.hedge_wait(time.monotonic() - start_time)) is not None:
+                if wait == 0:
+                    self.stats.count("hedges")
+                    pending.add(self._executor.submit(self._attempt, rover_id))
+                    break
+                done, _ = futures.wait(pending, timeout=wait)
+                if done:
+                    break
+
+            error: BaseException = None
+            while pending:
+                done, pending = futures.wait(pending, timeout=max(0, deadline - time.monotonic()),
+                                             return_when=futures.FIRST_COMPLETED)
+                if not done:
+                    raise TimeoutError(f"Rover {rover_id}: no reply within {self.timeout}s")
+
+                for future in done:
+                    if future.cancelled():
+                        error = futures.CancelledError(f"Rover {rover_id}: request cancelled")
+                    elif future.exception() is None:
+                        if future is not primary:
+                            self.stats.count("hedge_wins")
+                        return future.result()
+                    else:
+                        error = future.exception()
+        finally:
+            #Requests already on the wire run out their own timeout. Queued ones are dropped
+            for future in pending:
+                future.cancel()
+
+        raise error
+
+    def get_commands(self, rover_id: int) -> str:
+        """Fetches the command string of a rover, retrying and hedging as configured.
+
+        Raises:
+            FetchError: If every attempt failed
+        """
+
+        for attempt in range(self.retries + 1):
+            try:
+                return self._hedged(rover_id)
+            except Exception as e:
+                error = e
+
+            if attempt < self.retries:
+                self.stats.count("retries")
+                time.sleep(self.backoff_delay(attempt))
+
+        raise FetchError(f"Failed to fetch commands for rover {rover_id} after {self.retries + 1} attempts: {error}") from error
+
+
+class AsyncCommandClient(_CommandClientBase):
+    """Asyncio client on one pooled `httpx.AsyncClient`"""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.client: httpx.AsyncClient = None
+        self._limiter: asyncio.Semaphore = None
+
+    async def __aenter__(self):
+        #Headroom above the limiter for hedged requests
+        limits = httpx.Limits(max_connections=2 * self.max_concurrency, max_keepalive_connections=2 * self.max_concurrency)
+        self.client = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+        self._limiter = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    async def _attempt(self, rover_id: int) -> str:
+        start_time = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self.client.get(endpoint_for(self.base_url, rover_id)), self.timeout)
+            response.raise_for_status()
+            moves = self.parse_moves(response.json())
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            self.stats.record(time.perf_counter() - start_time, "timeout")
+            raise
+        except Exception:
+            self.stats.record(time.perf_counter() - start_time, "error")
+            raise
+
+        self.stats.record(time.perf_counter() - start_time)
+        return moves
+
+    async def _primary_attempt(self, rover_id: int, started: asyncio.Event) -> str:
+        #Only primaries queue on the limiter. A hedge queued behind them would arrive too late to help
+        async with self._limiter:
+            started.set()
+            return await self._attempt(rover_id)
+
+    async def _hedged(self, rover_id: int) -> str:
+        started = asyncio.Event()
+        primary = asyncio.create_task(self._primary_attempt(rover_id, started))
+        pending = {primary}
+
+        error: BaseException = None
+        try:
+            #The hedge clock starts once the primary holds a connection slot, not while it is queued
+            await started.wait()
+
+            start_time = time.monotonic()
+            while (wait := self.hedge_wait(time.monotonic() - start_time)) is not None:
+                if wait == 0:
+                    self.stats.count("hedges")
+                    pending.add(asyncio.create_task(self._attempt(rover_id)))
+                    break
+                done, _ = await asyncio.wait(pending, timeout=wait)
+                if done:
+                    break
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats.count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+        finally:
+            #Also runs when the caller cancels us, so no attempt outlives the fetch
+            for task in pending:
+                task.cancel()
+
+        raise error
+
+    async def get_commands(self, rover_id: int) -> str:
+        """Fetches the command string of a rover, retrying and hedging as configured.
+
+        Raises:
+            FetchError: If every attempt failed
+        """
+
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._hedged(rover_id)
+            except Exception as e:
+                error = e
+
+            if attempt < self.retries:
+                self.stats.count("retries")
+                await asyncio.sleep(self.backoff_delay(attempt))
+
+        raise FetchError(f"Failed to fetch commands for rover {rover_id} after {self.retries + 1} attempts: {error}") from error
@@ -0,0 +1,327 @@
+"""Append-only ledger of the reports made to ground control: the pins and statuses rovers report
+in Lab 2, and the defused mines deminers report through the Defused-Mines queue in Lab 3.
+
+Reports are appended to one binary file by a background writer. Everything that arrives while
+the previous write is being synced goes out in the next single write and fsync (group commit),
+so a burst of reports costs a few disk syncs rather than one each. The ledger keeps all entries
+in memory, indexed by rover and by mine position, and reads the file back in one pass at startup.
+
+File layout (little endian):
+    magic                                                                   8 bytes
+    records     crc32 u32, text length u32, kind u8, success u8, rover_id i32,
+                agent_id i32, x_pos i32, y_pos i32, timestamp f64, text (utf-8)    repeated
+
+The crc covers the rest of the record. A record cut short by a crash fails it, and replay drops
+it and everything after it. A write that fails while the server runs is cut off the file the
+same way, so the records after it stay readable. If even that fails, or the writer hits any other
+error, the ledger stops, and every report from then on fails instead of being appended after a torn record.
+"""
+import argparse
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import Future, InvalidStateError
+from typing import NamedTuple
+
+MAGIC = b"GCLEDGR1"
+RECORD = struct.Struct("<IIBBiiiid")
+CRC = struct.Struct("<I")
+
+PIN = 1
+STATUS = 2
+DEFUSED = 3
+KIND_NAMES = {PIN: "pin", STATUS: "status", DEFUSED: "defused"}
+
+_CLOSE = object()
+
+
+class LedgerEntry(NamedTuple):
+    """One report. `text` is the pin for pins and defused mines, the message for statuses.
+    `agent_id` is the deminer for defused mines and 0 otherwise. Positions are -1 for statuses."""
+    kind: int
+    rover_id: int
+    x_pos: int
+    y_pos: int
+    text: str
+    success: bool = True
+    agent_id: int = 0
+    timestamp: float = 0.0
+
+    def encode(self) -> bytes:
+        text = self.text.encode()
+        body = RECORD.pack(0, len(text), self.kind, self.success, self.rover_id, self.agent_id,
+                           self.x_pos, self.y_pos, self.timestamp)[CRC.size:] + text
+        return CRC.pack(zlib.crc32(body)) + body
+
+
+def read_entries(path: str) -> tuple[list[LedgerEntry], int]:
+    """Reads a ledger file in one pass without changing it.
+    Returns its entries and where its valid records end, which is 0 if there is no ledger yet."""
+
+    try:
+        with open(path, "rb") as ledger_f:
+            data = ledger_f.read()
+    except FileNotFoundError:
+        return [], 0
+
+    if not data:
+        return [], 0
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a ground control ledger")
+
+    entries: list[LedgerEntry] = []
+    offset = len(MAGIC)
+    view = memoryview(data)
+    while offset + RECORD.size <= len(data):
+        crc, text_len, kind, success, rover_id, agent_id, x_pos, y_pos, timestamp = RECORD.unpack_from(data, offset)
+        end = offset + RECORD.size + text_len
+        if end > len(data) or zlib.crc32(view[offset + CRC.size:end]) != crc:
+            break
+        text = bytes(view[offset + RECORD.size:end]).decode()
+        entries.append(LedgerEntry(kind, rover_id, x_pos, y_pos, text, bool(success), agent_id, timestamp))
+        offset = end
+
+    if offset != len(data):
+        logging.warning(f"Ledger {path}: ignoring {len(data) - offset} bytes of incomplete records at the end")
+    return entries, offset
+
+
+class Ledger():
+    """The ledger file and its in-memory index. Safe to use from any thread."""
+
+    def __init__(self, path: str, sync: bool = True, max_batch: int = 4096):
+        """
+        Args:
+            path (str): Ledger file. Created if missing, replayed if not
+            sync (bool): fsync after every group of records. Without it a crash of the machine
+                (not just the server) may lose the last records
+            max_batch (int): Most records written by one write and fsync
+        """
+        self.path = path
+        self.sync = sync
+        self.max_batch = max_batch
+        self.commits = 0
+        self.error: OSError = None      #why the ledger stopped, if it did
+
+        self._lock = threading.Lock()
+        self.entries: list[LedgerEntry] = []
+        self._by_rover: dict[int, list[LedgerEntry]] = {}
+        self._by_mine: dict[tuple[int, int], list[LedgerEntry]] = {}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        entries, valid_end = read_entries(path)
+        for entry in entries:
+            self._index(entry)
+        self._file = open(path, "r+b" if valid_end else "wb")
+        if valid_end:
+            self._file.truncate(valid_end)
+            self._file.seek(valid_end)
+        else:
+            self._file.write(MAGIC)
+            self._file.flush()
+        self._end = self._file.tell()      #end of the last committed record
+
+        self._queue: queue.Queue = queue.Queue()
+        self._batch: list[Future] = []     #futures of the commit in progress
+        self._writer = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+        self._writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record_pin(self, rover_id: int, pin: str, x_pos: int, y_pos: int) -> Future:
+        """Appends a pin reported by a rover. The returned future resolves once it is on disk."""
+        return self._append(LedgerEntry(PIN, rover_id, x_pos, y_pos, pin))
+
+    def record_status(self, rover_id: int, success: bool, msg: str) -> Future:
+        """Appends a rover's final status. The returned future resolves once it is on disk."""
+        return self._append(LedgerEntry(STATUS, rover_id, -1, -1, msg, success))
+
+    def record_defused(self, rover_id: int, deminer_id: int, pin: str, x_pos: int, y_pos: int) -> Future:
+        """Appends a mine a deminer defused. The returned future resolves once it is on disk."""
+        return self._append(LedgerEntry(DEFUSED, rover_id, x_pos, y_pos, pin, agent_id=deminer_id))
+
+    def for_rover(self, rover_id: int) -> list[LedgerEntry]:
+        """Every entry of a rover, oldest first"""
+        with self._lock:
+            return list(self._by_rover.get(rover_id, ()))
+
+    def for_mine(self, x_pos: int, y_pos: int) -> list[LedgerEntry]:
+        """Every pin or defusal recorded for the mine at (x_pos, y_pos), oldest first"""
+        with self._lock:
+            return list(self._by_mine.get((x_pos, y_pos), ()))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Waits until everything appended so far is on disk. Returns False on timeout.
+
+        Raises:
+            OSError: If a write failed, or the ledger stopped
+        """
+        marker = Future()
+        with self._lock:
+            if self.error is not None:
+                marker.set_exception(self.error)
+            else:
+                self._queue.put(marker)
+        try:
+            marker.result(timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    def close(self):
+        """Writes everything still queued and closes the file"""
+        if self._writer.is_alive():
+            self._queue.put(_CLOSE)
+        self._writer.join()
+        self._file.close()
+
+    def _append(self, entry: LedgerEntry) -> Future:
+        entry = entry._replace(timestamp=time.time())
+        future = Future()
+
+        #Indexed right away, so queries see a report before it is synced
+        with self._lock:
+            if self.error is not None:
+                future.set_exception(self.error)
+                return future
+            self._index(entry)
+            self._queue.put((entry.encode(), future))
+        return future
+
+    def _index(self, entry: LedgerEntry):
+        self.entries.append(entry)
+        self._by_rover.setdefault(entry.rover_id, []).append(entry)
+        if entry.kind != STATUS:
+            self._by_mine.setdefault((entry.x_pos, entry.y_pos), []).append(entry)
+
+    def _run(self):
+        try:
+            self._commit_loop()
+        except Exception as e:
+            #Anything but a failed write is a bug. Stop rather than leave reports waiting on a dead writer
+            logging.exception(f"Ledger {self.path}: writer failed, stopping")
+            error = OSError(f"Ledger writer failed: {e!r}")
+            for future in self._batch:
+                _fail(future, error)
+            self._stop(error)
+
+    def _commit_loop(self):
+        closing = False
+        while not closing:
+            item = self._queue.get()
+
+            #Everything that queued up during the last commit goes into this one
+            records, futures = [], []
+            self._batch = futures
+            while True:
+                if item is _CLOSE:
+                    closing = True
+                elif isinstance(item, Future):
+                    futures.append(item)
+                else:
+                    records.append(item[0])
+                    futures.append(item[1])
+                if closing or len(records) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            try:
+                if records:
+                    self._file.write(b"".join(records))
+                    self._file.flush()
+                    if self.sync:
+                        os.fsync(self._file.fileno())
+                    self.commits += 1
+            except OSError as e:
+                logging.exception(f"Ledger {self.path}: write failed")
+                for future in futures:
+                    _fail(future, e)
+                if not self._rewind():
+                    self._stop(e)
+                    return
+                continue
+
+            self._end += sum(len(record) for record in records)
+            for future in futures:
+                if not future.done():       #a caller may have cancelled it
+                    future.set_result(None)
+            self._batch = []
+
+    def _rewind(self) -> bool:
+        """Cuts a possibly torn write off the end of the file. Returns False if that failed too."""
+
+        #Reopened rather than seeked, so the unwritten part of the failed write is dropped, not retried
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        try:
+            self._file = open(self.path, "r+b")
+            self._file.truncate(self._end)
+            self._file.seek(self._end)
+            if self.sync:
+                os.fsync(self._file.fileno())
+            return True
+        except OSError:
+            logging.exception(f"Ledger {self.path}: could not cut off the failed write, stopping")
+            return False
+
+    def _stop(self, error: OSError):
+        """Fails every report still queued, and every later one"""
+
+        with self._lock:
+            self.error = error
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, Future):
+                _fail(item, error)
+            elif item is not _CLOSE:
+                _fail(item[1], error)
+
+
+def _fail(future: Future, error: BaseException):
+    """Fails a future, unless its caller cancelled it"""
+    try:
+        future.set_exception(error)
+    except InvalidStateError:
+        pass
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Prints entries of a ground control ledger")
+    parser.add_argument("path", help="Ledger file")
+    parser.add_argument("--rover", type=int, default=None, help="Only this rover's entries")
+    parser.add_argument("--mine", type=lambda value: tuple(int(part) for part in value.split(",")), default=None,
+                        help="Only entries of the mine at x,y")
+    args = parser.parse_args()
+
+    #Read only, so it is safe on the ledger of a running server
+    all_entries, _ = read_entries(args.path)
+    entries = all_entries
+    if args.rover is not None:
+        entries = [entry for entry in entries if entry.rover_id == args.rover]
+    if args.mine is not None:
+        entries = [entry for entry in entries if entry.kind != STATUS and (entry.x_pos, entry.y_pos) == args.mine]
+
+    for entry in entries:
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.timestamp))
+        where = f" ({entry.x_pos},{entry.y_pos})" if entry.kind != STATUS else ""
+        outcome = "" if entry.kind != STATUS else (" Completed" if entry.success else " Failure")
+        agent = f" deminer {entry.agent_id}" if entry.kind == DEFUSED else ""
+        print(f"{when} rover {entry.rover_id}{agent} {KIND_NAMES.get(entry.kind, entry.kind)}{where}{outcome}: {entry.text}")
+    print(f"{len(entries)} of {len(all_entries)} entries")
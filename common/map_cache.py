@@ -0,0 +1,84 @@
+"""Pre-serialized GetMap responses for the GroundControl servers.
+
+The map response is the same for every rover, so it is built and serialized once and the
+bytes are handed straight to gRPC. It is rebuilt only after the map's version changes.
+
+The map is the lab's `ServerMap`, and `rpc` is the lab's generated gRPC code, so this module runs
+from within a lab like the servers that use it.
+"""
+import threading
+
+import grpc
+
+from rpc import ground_control_pb2 as gc_pb2
+from rpc import ground_control_pb2_grpc as gc_pb2_grpc
+
+
+class MapResponseCache():
+    """The serialized `MapResponse` of a `ServerMap`, tagged with the map version it was built from"""
+
+    def __init__(self, map):
+        """
+        Args:
+            map (ServerMap): The lab's server map. Only its cells, size, map_id and version are read
+        """
+        self.map = map
+        self._lock = threading.Lock()
+        self._entry: tuple[int, bytes] = None      #(map version, serialized response), swapped as one
+        self.builds = 0
+
+    @property
+    def version(self) -> int:
+        """Map version of the cached response"""
+        return self._entry[0] if self._entry is not None else None
+
+    def get(self) -> bytes:
+        """Returns the serialized response, rebuilding it first if the map has changed"""
+
+        entry = self._entry
+        if entry is not None and entry[0] == self.map.version:
+            return entry[1]
+
+        #One rebuild at a time. Requests that arrive meanwhile wait for it instead of repeating it
+        with self._lock:
+            entry = self._entry
+            if entry is None or entry[0] != self.map.version:
+                version = self.map.version
+                entry = (version, build_map_response(self.map).SerializeToString())
+                self._entry = entry
+                self.builds += 1
+            return entry[1]
+
+
+def build_map_response(map) -> gc_pb2.MapResponse:
+    """Protobuf format conversion of the map"""
+
+    map_rows = [gc_pb2.MapRow(cells=row) for row in map.array_repr()]
+    return gc_pb2.MapResponse(grid=map_rows, numRows = map.num_rows, numCols = map.num_cols,
+                              map_id = map.map_id, version = map.version)
+
+
+class _HandlerCapture():
+    """Stands in for a server to collect the method handlers the generated code registers"""
+
+    def add_generic_rpc_handlers(self, generic_handlers):
+        pass
+
+    def add_registered_method_handlers(self, service_name, method_handlers):
+        self.method_handlers = method_handlers
+
+
+def add_servicer_to_server(servicer: gc_pb2_grpc.GroundControlServicer, server):
+    """Same as `add_GroundControlServicer_to_server`, except `GetMap` returns already serialized bytes.
+    Works with both `grpc.server` and `grpc.aio.server`."""
+
+    capture = _HandlerCapture()
+    gc_pb2_grpc.add_GroundControlServicer_to_server(servicer, capture)
+    method_handlers = dict(capture.method_handlers)
+
+    #No response serializer: gRPC sends the returned bytes as they are
+    method_handlers["GetMap"] = grpc.unary_unary_rpc_method_handler(
+        servicer.GetMap, request_deserializer=gc_pb2.MapRequest.FromString)
+
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler("GroundControl", method_handlers),))
+    server.add_registered_method_handlers("GroundControl", method_handlers)
@@ -0,0 +1,43 @@
+"""On-disk cache of the decoded client map, keyed by the server's map id and version.
+
+A client launch asks the server for the map version and loads the pickled `Map` when it
+matches, instead of transferring and decoding the whole map again. The map is pickled as the
+lab's own `Map`, in a cache file of that lab.
+"""
+import logging
+import os
+import pickle
+import tempfile
+
+
+def load_map(cache_path: str, map_id: str, version: int):
+    """Returns the cached map if it exists and was saved for the given map id and version"""
+
+    try:
+        with open(cache_path, "rb") as cache_f:
+            entry = pickle.load(cache_f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable map cache {cache_path}: {e}")
+        return None
+
+    if entry.get("map_id") != map_id or entry.get("version") != version:
+        return None
+    return entry["map"]
+
+
+def save_map(cache_path: str, map_id: str, version: int, map):
+    """Caches a freshly fetched map. The file is replaced atomically so a crash never leaves half a cache."""
+
+    directory = os.path.dirname(cache_path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".map_cache_")
+    try:
+        with os.fdopen(fd, "wb") as cache_f:
+            pickle.dump({"map_id": map_id, "version": version, "map": map}, cache_f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
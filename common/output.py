@@ -0,0 +1,287 @@
+"""Buffered output for rover path files.
+
+`PathSink` takes finished paths off the simulation threads and writes them in batches from a
+background thread, either as the usual `path_{id}.txt` files or into a single indexed archive.
+
+Archive layout (little endian):
+    magic                           8 bytes
+    records     rover_id u32, length u32, path bytes (utf-8)      repeated
+    index       count u32, then rover_id u32, offset u64, length u32   per rover
+    footer      index offset u64, magic
+
+If the writer never got to close the archive, the index and footer are missing and
+`PathArchive` rebuilds the index by scanning the records instead.
+
+A sink holds an exclusive lock on `<archive>.lock` from opening the archive until closing it,
+so rover processes sharing one archive write it one after another.
+"""
+import os
+import queue
+import struct
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:     #Windows
+    fcntl = None
+    import msvcrt
+
+MAGIC = b"RVRPATH1"
+RECORD_HEADER = struct.Struct("<II")
+INDEX_COUNT = struct.Struct("<I")
+INDEX_ENTRY = struct.Struct("<IQI")
+FOOTER = struct.Struct("<Q8s")
+
+_CLOSE = object()
+
+
+def _lock(lock_file):
+    """Blocks until this process holds the exclusive lock on `lock_file`"""
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        return
+
+    #msvcrt locks bytes from the current position, so lock and unlock the same first byte
+    lock_file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            #LK_LOCK gives up after 10 attempts a second apart
+            continue
+
+
+def _unlock(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class PathSink():
+    """Collects rover paths and writes them from a background thread in batches"""
+
+    def __init__(self, out_dir: str = "./out", archive_path: str = None, append: bool = False,
+                 batch_size: int = 64, flush_interval: float = 0.1):
+        """
+        Args:
+            out_dir (str): Directory for the `path_{id}.txt` files
+            archive_path (str): If given, all paths go into this one archive file instead
+            append (bool): Add to an existing archive rather than replacing it. Processes
+                appending to the same archive wait for each other's sinks to close
+            batch_size (int): Maximum number of paths written per batch
+            flush_interval (float): Longest a path waits in the queue before its batch is written
+        """
+        self.out_dir = out_dir
+        self.archive_path = archive_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: queue.Queue = queue.Queue()
+        self._error: BaseException = None
+        self._archive = None
+        self._archive_lock = None
+        self._index: dict[int, tuple[int, int]] = {}
+
+        if archive_path is not None:
+            self._archive_lock = open(archive_path + ".lock", "a+b")
+            _lock(self._archive_lock)
+
+        try:
+            self._open_archive(append)
+        except BaseException:
+            self._release_archive_lock()
+            raise
+
+        self._writer = threading.Thread(target=self._run, name="path-writer", daemon=True)
+        self._writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, rover_id: int, path: str):
+        """Queues a rover's path for writing. Returns immediately."""
+        if self._error is not None:
+            raise RuntimeError("Path writer failed") from self._error
+        self._queue.put((rover_id, path))
+
+    def close(self):
+        """Writes everything still queued, finishes the archive index and stops the writer.
+
+        Raises:
+            RuntimeError: If the writer failed. Raised on every call, not just the first
+        """
+        if self._writer.is_alive():
+            self._queue.put(_CLOSE)
+        self._writer.join()
+
+        if self._archive is not None and not self._archive.closed:
+            try:
+                #After a failed write the index could point past the records. Readers scan them instead
+                if self._error is None:
+                    self._write_index()
+            finally:
+                self._archive.close()
+                self._release_archive_lock()
+
+        if self._error is not None:
+            raise RuntimeError("Path writer failed") from self._error
+
+    def _open_archive(self, append: bool):
+        archive_path = self.archive_path
+        if archive_path is not None and append and os.path.exists(archive_path):
+            #Keep the existing records and drop the old index. A new one is written on close
+            with PathArchive(archive_path) as existing:
+                self._index = dict(existing.index)
+                records_end = existing.records_end
+            self._archive = open(archive_path, "r+b")
+            self._archive.truncate(records_end)
+            self._archive.seek(records_end)
+        elif archive_path is not None:
+            self._archive = open(archive_path, "wb")
+            self._archive.write(MAGIC)
+
+    def _release_archive_lock(self):
+        if self._archive_lock is not None:
+            _unlock(self._archive_lock)
+            self._archive_lock.close()
+            self._archive_lock = None
+
+    def _run(self):
+        closing = False
+        while not closing:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            while True:
+                if item is _CLOSE:
+                    closing = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(batch)
+            except BaseException as e:
+                self._error = e
+                return
+
+    def _write_batch(self, batch: list[tuple[int, str]]):
+        if not batch:
+            return
+
+        if self._archive is None:
+            for rover_id, path in batch:
+                with open(os.path.join(self.out_dir, f"path_{rover_id}.txt"), "w") as output:
+                    output.write(path)
+            return
+
+        #One write call per batch
+        chunks = []
+        offset = self._archive.tell()
+        for rover_id, path in batch:
+            data = path.encode()
+            chunks.append(RECORD_HEADER.pack(rover_id, len(data)))
+            chunks.append(data)
+            self._index[rover_id] = (offset + RECORD_HEADER.size, len(data))
+            offset += RECORD_HEADER.size + len(data)
+
+        self._archive.write(b"".join(chunks))
+        self._archive.flush()
+
+    def _write_index(self):
+        index_offset = self._archive.tell()
+        entries = [INDEX_ENTRY.pack(rover_id, offset, length) for rover_id, (offset, length) in sorted(self._index.items())]
+        self._archive.write(INDEX_COUNT.pack(len(entries)) + b"".join(entries) + FOOTER.pack(index_offset, MAGIC))
+
+
+class PathArchive():
+    """Reads single rover paths out of an archive written by `PathSink`"""
+
+    def __init__(self, archive_path: str):
+        self._file = open(archive_path, "rb")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{archive_path} is not a rover path archive")
+
+        self.records_end: int = len(MAGIC)
+        self.index: dict[int, tuple[int, int]] = self._read_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, rover_id: int) -> bool:
+        return rover_id in self.index
+
+    def close(self):
+        self._file.close()
+
+    def rover_ids(self) -> list[int]:
+        return sorted(self.index)
+
+    def read(self, rover_id: int) -> str:
+        """Returns the path of one rover, as it would appear in `path_{id}.txt`"""
+        try:
+            offset, length = self.index[rover_id]
+        except KeyError:
+            raise KeyError(f"No path for rover {rover_id} in archive") from None
+
+        self._file.seek(offset)
+        return self._file.read(length).decode()
+
+    def _read_index(self) -> dict[int, tuple[int, int]]:
+        size = self._file.seek(0, os.SEEK_END)
+
+        if size >= len(MAGIC) + FOOTER.size:
+            self._file.seek(size - FOOTER.size)
+            index_offset, magic = FOOTER.unpack(self._file.read(FOOTER.size))
+            if magic == MAGIC:
+                self.records_end = index_offset
+                self._file.seek(index_offset)
+                (count,) = INDEX_COUNT.unpack(self._file.read(INDEX_COUNT.size))
+                raw = self._file.read(count * INDEX_ENTRY.size)
+                return {rover_id: (offset, length) for rover_id, offset, length in INDEX_ENTRY.iter_unpack(raw)}
+
+        return self._scan_records(size)
+
+    def _scan_records(self, size: int) -> dict[int, tuple[int, int]]:
+        #No footer: the archive was not closed. Walk the records that were fully written
+        index = {}
+        offset = len(MAGIC)
+        while offset + RECORD_HEADER.size <= size:
+            self._file.seek(offset)
+            rover_id, length = RECORD_HEADER.unpack(self._file.read(RECORD_HEADER.size))
+            if offset + RECORD_HEADER.size + length > size:
+                break
+            index[rover_id] = (offset + RECORD_HEADER.size, length)
+            offset += RECORD_HEADER.size + length
+
+        self.records_end = offset
+        return index
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) != 3:
+        print("Usage: python -m common.output <archive> <rover id>")
+        exit(1)
+
+    with PathArchive(sys.argv[1]) as archive:
+        print(archive.read(int(sys.argv[2])), end="")
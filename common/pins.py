@@ -0,0 +1,97 @@
+"""Single-flight pin solving shared by every rover in the process.
+
+The maps of Lab 1 and Lab 4 hand out mine serials modulo the length of `mines.txt`, so many mines
+share a serial. Rovers that dig mines with the same serial at the same time wait on one brute force
+instead of each running their own, and solved pins are kept in a bounded LRU cache.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from hashlib import sha256
+from typing import Callable, Hashable
+
+
+class SingleFlightCache():
+    """Bounded LRU cache where concurrent misses on the same key share one computation"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._results: OrderedDict = OrderedDict()
+        self._inflight: dict[Hashable, Future] = {}
+        self._generation = 0        #bumped by clear() so computations started before it don't fill the cache after it
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def get(self, key: Hashable, compute: Callable):
+        """Returns the cached value for `key`, computing it with `compute(key)` on a miss.
+        Callers that miss while another caller is computing the same key wait for its result."""
+
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key]
+
+            future = self._inflight.get(key)
+            generation = self._generation
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute(key)
+        except BaseException as e:
+            #Don't cache failures. The next caller tries again
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            #Callers already waiting still get the value, but a cleared cache stays clear
+            if self._generation == generation:
+                self._results[key] = value
+                if len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+                del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        """Forgets every solved pin. Computations still running finish for the callers waiting on them,
+        but their results are not cached, and later callers of the same key start a new one."""
+        with self._lock:
+            self._results.clear()
+            self._inflight.clear()
+            self._generation += 1
+            self.hits = self.misses = self.shared = 0
+
+    def __repr__(self) -> str:
+        return f"SingleFlightCache(size={len(self._results)}/{self.maxsize}, hits={self.hits}, misses={self.misses}, shared={self.shared})"
+
+
+def find_pin(serial: str, prefix: str = "000000") -> int:
+    """Brute forces the smallest pin whose sha256(pin + serial) hex digest starts with `prefix`"""
+
+    pin = 0
+    while not sha256((str(pin) + serial).encode()).hexdigest().startswith(prefix):
+        pin += 1
+    return pin
+
+
+pin_cache = SingleFlightCache()
+
+
+def solve_pin(serial: str, prefix: str = "000000") -> int:
+    """Returns the pin of a mine, solving it at most once per process for each serial"""
+    return pin_cache.get((serial, prefix), lambda key: find_pin(*key))
@@ -0,0 +1,252 @@
+"""Per-method call statistics for the GroundControl servers.
+
+`StatsInterceptor` (thread-pool server) and `AsyncStatsInterceptor` (grpc.aio server) wrap
+every handler and record into a shared `ServerStats`: calls, errors, cancellations, calls in
+flight and a fixed-bucket latency histogram per method. Recording is a bisect and a few
+counter updates under one lock, so it is cheap enough to leave on. For streams, the latency
+is how long the stream stayed open. `rpc` is the generated gRPC code of the lab it runs in.
+"""
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from typing import Callable
+
+import grpc
+
+from rpc import ground_control_pb2 as gc_pb2
+
+#Upper bounds of the histogram buckets in milliseconds. The last bucket has no upper bound
+BUCKET_BOUNDS_MS: tuple[float, ...] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class MethodStats():
+    """Counters and latency histogram of one RPC method"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets: list[int] = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def percentile(self, pct: float) -> float:
+        """Estimates the `pct` percentile latency as the upper bound of the bucket it falls in"""
+
+        finished = sum(self.buckets)
+        if finished == 0:
+            return 0.0
+
+        rank = pct / 100 * finished
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return min(BUCKET_BOUNDS_MS[index], self.max_ms) if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+
+class ServerStats():
+    """Thread-safe statistics of every RPC method the server has seen"""
+
+    def __init__(self, workers: int = 0):
+        """
+        Args:
+            workers (int): Size of the server's thread pool, reported alongside the in-flight counts. 0 for grpc.aio
+        """
+        self.workers = workers
+        self.started = time.monotonic()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._methods: dict[str, MethodStats] = {}
+
+    def begin(self, method: str) -> float:
+        """Marks a call as started. Returns the start time to pass to `end`."""
+
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = MethodStats()
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return time.perf_counter()
+
+    def end(self, method: str, start_time: float, outcome: str = "ok"):
+        """Records a finished call. `outcome` is one of "ok", "error" or "cancelled"."""
+
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        bucket = bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)
+
+        with self._lock:
+            stats = self._methods[method]
+            stats.in_flight -= 1
+            self.in_flight -= 1
+            stats.calls += 1
+            if outcome == "error":
+                stats.errors += 1
+            elif outcome == "cancelled":
+                stats.cancelled += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.buckets[bucket] += 1
+
+    def to_proto(self) -> gc_pb2.ServerStats:
+        """Snapshot of the statistics as a `GetServerStats` response"""
+
+        with self._lock:
+            methods = []
+            for name, stats in sorted(self._methods.items()):
+                methods.append(gc_pb2.MethodStats(
+                    method=name, calls=stats.calls, errors=stats.errors, cancelled=stats.cancelled,
+                    in_flight=stats.in_flight, max_in_flight=stats.max_in_flight,
+                    mean_ms=stats.total_ms / stats.calls if stats.calls else 0.0,
+                    p50_ms=stats.percentile(50), p99_ms=stats.percentile(99), max_ms=stats.max_ms,
+                    bucket_counts=stats.buckets))
+
+            return gc_pb2.ServerStats(methods=methods, uptime_s=time.monotonic() - self.started, workers=self.workers,
+                                      in_flight=self.in_flight, max_in_flight=self.max_in_flight,
+                                      bucket_bounds_ms=BUCKET_BOUNDS_MS)
+
+    def start_dumping(self, interval: float, emit: Callable[[str], None] = logging.info) -> threading.Thread:
+        """Writes a summary through `emit` every `interval` seconds from a daemon thread"""
+
+        def dump():
+            while True:
+                time.sleep(interval)
+                for line in format_stats(self.to_proto()):
+                    emit(line)
+
+        thread = threading.Thread(target=dump, name="server-stats", daemon=True)
+        thread.start()
+        return thread
+
+
+def format_stats(stats: gc_pb2.ServerStats) -> list[str]:
+    """Readable summary lines of a `GetServerStats` response"""
+
+    workers = f"/{stats.workers} workers" if stats.workers else ""
+    lines = [f"[SERVER STATS]: up {stats.uptime_s:.0f} s, in flight {stats.in_flight}{workers} (max {stats.max_in_flight})"]
+    for method in stats.methods:
+        lines.append(f"   {method.method:<16} calls {method.calls:>7}  errors {method.errors:>4}  cancelled {method.cancelled:>4}  "
+                     f"in flight {method.in_flight:>3} (max {method.max_in_flight:>3})  "
+                     f"mean {method.mean_ms:8.2f} ms  p50 {method.p50_ms:8.2f} ms  p99 {method.p99_ms:8.2f} ms  max {method.max_ms:8.2f} ms")
+    return lines
+
+
+def _method_name(handler_call_details) -> str:
+    return handler_call_details.method.rsplit("/", 1)[-1]
+
+
+def _failed(context) -> bool:
+    """Whether the handler returned normally but set a non-OK status"""
+    code = context.code()
+    return code is not None and code != grpc.StatusCode.OK
+
+
+class StatsInterceptor(grpc.ServerInterceptor):
+    """Records every call of a `grpc.server` into `stats`"""
+
+    def __init__(self, stats: ServerStats):
+        self.stats = stats
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        method = _method_name(handler_call_details)
+        if handler.unary_unary is not None:
+            return handler._replace(unary_unary=self._wrap_unary(method, handler.unary_unary))
+        if handler.stream_unary is not None:
+            return handler._replace(stream_unary=self._wrap_unary(method, handler.stream_unary))
+        if handler.unary_stream is not None:
+            return handler._replace(unary_stream=self._wrap_stream(method, handler.unary_stream))
+        return handler._replace(stream_stream=self._wrap_stream(method, handler.stream_stream))
+
+    def _wrap_unary(self, method: str, behavior):
+        def unary(request, context):
+            start_time = self.stats.begin(method)
+            outcome = "error"
+            try:
+                response = behavior(request, context)
+                outcome = "error" if _failed(context) else "ok"
+                return response
+            finally:
+                self.stats.end(method, start_time, outcome)
+        return unary
+
+    def _wrap_stream(self, method: str, behavior):
+        def stream(request, context):
+            start_time = self.stats.begin(method)
+            outcome = "error"
+            try:
+                yield from behavior(request, context)
+                if not context.is_active():
+                    outcome = "cancelled"
+                else:
+                    outcome = "error" if _failed(context) else "ok"
+            except GeneratorExit:
+                #The client went away before the stream finished
+                outcome = "cancelled"
+                raise
+            finally:
+                self.stats.end(method, start_time, outcome)
+        return stream
+
+
+class AsyncStatsInterceptor(grpc.aio.ServerInterceptor):
+    """Records every call of a `grpc.aio.server` into `stats`"""
+
+    def __init__(self, stats: ServerStats):
+        self.stats = stats
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        method = _method_name(handler_call_details)
+        if handler.unary_unary is not None:
+            return handler._replace(unary_unary=self._wrap_unary(method, handler.unary_unary))
+        if handler.stream_unary is not None:
+            return handler._replace(stream_unary=self._wrap_unary(method, handler.stream_unary))
+        if handler.unary_stream is not None:
+            return handler._replace(unary_stream=self._wrap_stream(method, handler.unary_stream))
+        return handler._replace(stream_stream=self._wrap_stream(method, handler.stream_stream))
+
+    def _wrap_unary(self, method: str, behavior):
+        async def unary(request, context):
+            start_time = self.stats.begin(method)
+            outcome = "error"
+            try:
+                response = await behavior(request, context)
+                outcome = "error" if _failed(context) else "ok"
+                return response
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            finally:
+                self.stats.end(method, start_time, outcome)
+        return unary
+
+    def _wrap_stream(self, method: str, behavior):
+        async def stream(request, context):
+            start_time = self.stats.begin(method)
+            outcome = "error"
+            try:
+                async for response in behavior(request, context):
+                    yield response
+                outcome = "error" if _failed(context) else "ok"
+            except (asyncio.CancelledError, GeneratorExit):
+                outcome = "cancelled"
+                raise
+            finally:
+                self.stats.end(method, start_time, outcome)
+        return stream
@@ -0,0 +1,80 @@
+"""The server map in shared memory, for running several GroundControl replicas on one host.
+
+`replicas.py` loads the map and mine files once and publishes the grid and the mine serials in
+one read-only `multiprocessing.shared_memory` segment. Each replica builds its lab's `ServerMap`
+from that segment instead of the files, so every replica serves the same map with the same `map_id`.
+
+Segment layout (little endian):
+    header      magic 8 bytes, num_rows u32, num_cols u32, map_id 16 bytes, serials length u32
+    grid        one byte per cell, row by row: b"1" for a mine, b"0" otherwise
+    serials     the serials of the mines in grid order, newline separated (utf-8)
+"""
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+MAGIC = b"GCMAPSH1"
+HEADER = struct.Struct("<8sII16sI")
+
+
+def publish_map(map, name: str = None) -> shared_memory.SharedMemory:
+    """Copies a map into a new shared memory segment. The caller unlinks it once the replicas are done.
+
+    Args:
+        map (ServerMap): Map to publish
+        name (str): Segment name. None picks a free one
+
+    Returns:
+        (SharedMemory) : The segment. Replicas attach to it by `segment.name`
+    """
+
+    cells = [cell for row in map.cells for cell in row]
+    grid = bytes(ord("1") if cell.value == "MINE" else ord("0") for cell in cells)
+    serials = "\n".join(cell.mine_serial for cell in cells if cell.value == "MINE").encode()
+
+    segment = shared_memory.SharedMemory(name=name, create=True, size=HEADER.size + len(grid) + len(serials))
+    HEADER.pack_into(segment.buf, 0, MAGIC, map.num_rows, map.num_cols, map.map_id.encode(), len(serials))
+    segment.buf[HEADER.size:HEADER.size + len(grid)] = grid
+    segment.buf[HEADER.size + len(grid):HEADER.size + len(grid) + len(serials)] = serials
+    return segment
+
+
+def attach_map(name: str, map_class: type):
+    """Builds a map from a segment published by `publish_map` rather than from the map files.
+    Mines cleared on it change only this process's copy; the segment is never written.
+
+    Args:
+        name (str): Segment name
+        map_class (type): The lab's `ServerMap`. The grid is built by its base class, the lab's `Map`
+
+    Returns:
+        (ServerMap) : The map, an instance of `map_class`
+    """
+
+    segment = shared_memory.SharedMemory(name=name)
+
+    #Attaching registers the segment with this process's resource tracker, which would
+    #unlink it when this replica exits. Only the publisher may do that
+    resource_tracker.unregister(segment._name, "shared_memory")
+
+    try:
+        magic, num_rows, num_cols, map_id, serials_len = HEADER.unpack_from(segment.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Shared memory segment {name} does not hold a ground control map")
+
+        grid_end = HEADER.size + num_rows * num_cols
+        grid = bytes(segment.buf[HEADER.size:grid_end])
+        serials = bytes(segment.buf[grid_end:grid_end + serials_len]).decode().split("\n")
+    finally:
+        segment.close()
+
+    #The map files are not read, so ServerMap's own constructor is skipped
+    rows = [[chr(value) for value in grid[row * num_cols:(row + 1) * num_cols]] for row in range(num_rows)]
+    map = map_class.__new__(map_class)
+    super(map_class, map).__init__(rows, num_rows, num_cols)
+    map.map_id = map_id.decode()
+    map.version = 0
+
+    mines = (cell for row in map.cells for cell in row if cell.value == "MINE")
+    for cell, serial in zip(mines, serials):
+        cell.mine_serial = serial
+    return map
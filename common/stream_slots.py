@@ -0,0 +1,31 @@
+"""Caps the pool threads that long-lived streams may hold on a thread-pool gRPC server.
+
+On `server.py` every open stream keeps one pool thread until it ends. Once streams hold all of
+them, the unary calls that their own rovers are waiting on queue up behind them and the server
+deadlocks. `StreamSlots` keeps the rest of the pool for unary calls: a stream opened while every
+slot is taken is rejected with RESOURCE_EXHAUSTED instead of waiting for a thread.
+"""
+import contextlib
+import threading
+
+import grpc
+
+
+class StreamSlots():
+    """A fixed number of slots, one per open stream. Safe to use from any thread."""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._semaphore = threading.BoundedSemaphore(slots)
+
+    @contextlib.contextmanager
+    def hold(self, context: grpc.ServicerContext):
+        """Holds a slot while the stream runs. Aborts the call with RESOURCE_EXHAUSTED if none is free."""
+
+        if not self._semaphore.acquire(blocking=False):
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,
+                          f"All {self.slots} stream slots of the thread-pool server are taken. Run aio_server.py for more rovers")
+        try:
+            yield
+        finally:
+            self._semaphore.release()
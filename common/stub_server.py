@@ -0,0 +1,137 @@
+"""Local stand-in for the rover command API, used for benchmarking without the real endpoint.
+
+The server can inject a base delay, occasional slow responses and failed (503) responses
+to exercise the retry and hedging logic in `fetch.py`.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+HOST = "127.0.0.1"
+PORT = 8000
+ROVER_PATH = re.compile(r"^/lab1/rover/+(\d+)/?$")
+
+
+def generate_moves(rover_id: int, length: int = 500) -> str:
+    """Generates a deterministic command string for the given rover"""
+    rng = random.Random(rover_id)
+    return "".join(rng.choice("MMLRD") for _ in range(length))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves `/lab1/rover/{id}` with the same JSON body as the real API"""
+
+    #Keep connections alive so clients can reuse them
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        match = ROVER_PATH.match(self.path)
+        if match is None:
+            self.send_error(404)
+            return
+
+        delay, fail = self.server.draw_fault()
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            self.send_error(503, "Injected failure")
+            return
+
+        rover_id = int(match.group(1))
+        body = json.dumps({
+            "result": True,
+            "data": {
+                "rover_id": rover_id,
+                "moves": generate_moves(rover_id, self.server.moves_length)
+            }
+        }).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server that simulates the rover command API"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, host: str = HOST, port: int = PORT, delay: float = 0.0, moves_length: int = 500,
+                 slow_rate: float = 0.0, slow_delay: float = 1.0, failure_rate: float = 0.0, seed: int = None):
+        """
+        Args:
+            host (str): Interface to bind to
+            port (int): Port to bind to. 0 picks a free port
+            delay (float): Delay added to every response in seconds
+            moves_length (int): Length of the generated command strings
+            slow_rate (float): Fraction of responses delayed by an extra `slow_delay`
+            slow_delay (float): Extra delay of a slow response in seconds
+            failure_rate (float): Fraction of requests answered with a 503
+            seed (int): Seed for the fault injection
+        """
+        super().__init__((host, port), StubHandler)
+        self.delay = delay
+        self.moves_length = moves_length
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.failure_rate = failure_rate
+        self.requests_served = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        #Clients abandon losing hedges mid-response. That is expected, not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def draw_fault(self) -> tuple[float, bool]:
+        """Picks the delay and failure outcome of the next request"""
+        with self._lock:
+            self.requests_served += 1
+            delay = self.delay + (self.slow_delay if self._rng.random() < self.slow_rate else 0.0)
+            return delay, self._rng.random() < self.failure_rate
+
+    @property
+    def base_url(self) -> str:
+        """The base URL to use in place of the real API's `baseURL`"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/lab1/rover/"
+
+    def start_background(self) -> threading.Thread:
+        """Serves requests on a daemon thread and returns the thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the rover command API")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--delay", type=float, default=0.0, help="Delay added to every response in seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of responses that are slow")
+    parser.add_argument("--slow-delay", type=float, default=1.0, help="Extra delay of a slow response in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests that fail with a 503")
+    args = parser.parse_args()
+
+    server = StubServer(port=args.port, delay=args.delay, slow_rate=args.slow_rate,
+                        slow_delay=args.slow_delay, failure_rate=args.failure_rate)
+    print(f"Stub rover API listening on {server.base_url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
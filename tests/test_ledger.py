@@ -0,0 +1,124 @@
+"""Tests of the append-only ledger in common/ledger.py"""
+import os
+
+import pytest
+
+from common.ledger import DEFUSED, MAGIC, PIN, STATUS, Ledger, read_entries
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "out" / "ledger.bin")
+
+
+def fill(path: str) -> list[int]:
+    """Writes three reports and returns the file size after each"""
+    sizes = []
+    with Ledger(path, sync=False) as ledger:
+        ledger.record_pin(1, "6039996", 2, 0).result()
+        sizes.append(os.path.getsize(path))
+        ledger.record_status(1, False, "Rover destroyed: mine hit at (3, 4)").result()
+        sizes.append(os.path.getsize(path))
+        ledger.record_defused(2, 7, "123", 5, 6).result()
+        sizes.append(os.path.getsize(path))
+    return sizes
+
+
+def test_round_trip(path):
+    fill(path)
+    entries, end = read_entries(path)
+
+    assert end == os.path.getsize(path)
+    assert [(entry.kind, entry.rover_id, entry.x_pos, entry.y_pos, entry.text, entry.success, entry.agent_id)
+            for entry in entries] == [
+        (PIN, 1, 2, 0, "6039996", True, 0),
+        (STATUS, 1, -1, -1, "Rover destroyed: mine hit at (3, 4)", False, 0),
+        (DEFUSED, 2, 5, 6, "123", True, 7),
+    ]
+    assert all(entry.timestamp > 0 for entry in entries)
+
+
+def test_reopen_replays_index(path):
+    fill(path)
+    with Ledger(path, sync=False) as ledger:
+        assert [entry.text for entry in ledger.for_rover(1)] == ["6039996", "Rover destroyed: mine hit at (3, 4)"]
+        assert [entry.agent_id for entry in ledger.for_mine(5, 6)] == [7]
+        assert ledger.for_mine(-1, -1) == []       #statuses have no mine
+
+        #New reports go after the replayed ones
+        ledger.record_pin(3, "42", 0, 1).result()
+    assert [entry.rover_id for entry in read_entries(path)[0]] == [1, 1, 2, 3]
+
+
+@pytest.mark.parametrize("cut", [1, 10])
+def test_torn_record_is_dropped_and_overwritten(path, cut):
+    sizes = fill(path)
+    with open(path, "r+b") as ledger_f:
+        ledger_f.truncate(sizes[-1] - cut)
+
+    entries, end = read_entries(path)
+    assert len(entries) == 2 and end == sizes[1]
+
+    with Ledger(path, sync=False) as ledger:
+        assert len(ledger.entries) == 2
+        ledger.record_pin(4, "99", 1, 1).result()
+    assert [entry.rover_id for entry in read_entries(path)[0]] == [1, 1, 4]
+
+
+def test_corrupt_record_ends_replay(path):
+    sizes = fill(path)
+    with open(path, "r+b") as ledger_f:
+        ledger_f.seek(sizes[0] + 4)     #inside the second record, past its crc
+        ledger_f.write(b"\xff")
+
+    entries, end = read_entries(path)
+    assert [entry.kind for entry in entries] == [PIN]
+    assert end == sizes[0]
+
+
+def test_failed_write_is_cut_off(path):
+    with Ledger(path, sync=False) as ledger:
+        ledger.record_pin(1, "1", 0, 0).result()
+        good_end = os.path.getsize(path)
+
+        real_write = ledger._file.write
+        def torn_write(data):
+            real_write(data[:5])
+            raise OSError(28, "No space left on device")
+        ledger._file.write = torn_write
+
+        with pytest.raises(OSError):
+            ledger.record_pin(2, "2", 0, 0).result()
+        assert os.path.getsize(path) == good_end
+
+        #The file was reopened, so later writes go through again
+        ledger.record_pin(3, "3", 0, 0).result()
+    assert [entry.rover_id for entry in read_entries(path)[0]] == [1, 3]
+
+
+def test_writer_crash_fails_reports(path):
+    with Ledger(path, sync=False) as ledger:
+        def crash(data):
+            raise ValueError("boom")
+        ledger._file.write = crash
+
+        with pytest.raises(OSError):
+            ledger.record_pin(1, "1", 0, 0).result(5)
+        with pytest.raises(OSError):
+            ledger.record_pin(2, "2", 0, 0).result(5)
+        with pytest.raises(OSError):
+            ledger.flush(5)
+
+
+def test_empty_and_foreign_files(path, tmp_path):
+    assert read_entries(path) == ([], 0)
+
+    foreign = tmp_path / "other.bin"
+    foreign.write_bytes(b"not a ledger")
+    with pytest.raises(ValueError):
+        read_entries(str(foreign))
+
+    with Ledger(path, sync=False):
+        pass
+    with open(path, "rb") as ledger_f:
+        assert ledger_f.read() == MAGIC
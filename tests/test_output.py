@@ -0,0 +1,67 @@
+"""Tests of the path files and archive written by common/output.py"""
+import pytest
+
+from common.output import FOOTER, INDEX_COUNT, INDEX_ENTRY, PathArchive, PathSink
+
+PATHS = {rover_id: f"* 0 0\n0 * 0\n{rover_id} 0 *\n" for rover_id in range(1, 11)}
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    return str(tmp_path / "paths.bin")
+
+
+def write_paths(archive_path: str, paths: dict[int, str], **kwargs):
+    with PathSink(archive_path=archive_path, batch_size=3, **kwargs) as sink:
+        for rover_id, path in paths.items():
+            sink.write(rover_id, path)
+
+
+def test_path_files(tmp_path):
+    with PathSink(out_dir=str(tmp_path)) as sink:
+        sink.write(3, PATHS[3])
+    assert (tmp_path / "path_3.txt").read_text() == PATHS[3]
+
+
+def test_archive_round_trip(archive_path):
+    write_paths(archive_path, PATHS)
+
+    with PathArchive(archive_path) as archive:
+        assert archive.rover_ids() == sorted(PATHS)
+        assert all(archive.read(rover_id) == path for rover_id, path in PATHS.items())
+        assert 11 not in archive
+        with pytest.raises(KeyError):
+            archive.read(11)
+
+
+def test_archive_without_footer_is_scanned(archive_path):
+    write_paths(archive_path, PATHS)
+
+    #Cut the index and footer off, and the last record in half, as if the writer had died
+    with open(archive_path, "rb") as archive_f:
+        data = archive_f.read()
+    index_offset, _ = FOOTER.unpack(data[-FOOTER.size:])
+    assert len(data) == index_offset + INDEX_COUNT.size + len(PATHS) * INDEX_ENTRY.size + FOOTER.size
+    with open(archive_path, "wb") as archive_f:
+        archive_f.write(data[:index_offset - 4])
+
+    with PathArchive(archive_path) as archive:
+        assert archive.rover_ids() == sorted(PATHS)[:-1]
+        assert archive.read(9) == PATHS[9]
+
+
+def test_append_keeps_earlier_paths(archive_path):
+    write_paths(archive_path, {1: PATHS[1], 2: PATHS[2]})
+    write_paths(archive_path, {2: "rewritten\n", 3: PATHS[3]}, append=True)
+
+    with PathArchive(archive_path) as archive:
+        assert archive.rover_ids() == [1, 2, 3]
+        assert archive.read(1) == PATHS[1]
+        assert archive.read(2) == "rewritten\n"
+
+
+def test_not_an_archive(tmp_path):
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not an archive")
+    with pytest.raises(ValueError):
+        PathArchive(str(other))
@@ -0,0 +1,84 @@
+"""Tests of the single-flight pin cache in common/pins.py"""
+import threading
+from hashlib import sha256
+
+import pytest
+
+from common.pins import SingleFlightCache, find_pin
+
+
+def test_find_pin_hash_has_prefix():
+    pin = find_pin("b1l3qy2l9g", "00")
+    assert sha256((str(pin) + "b1l3qy2l9g").encode()).hexdigest().startswith("00")
+    assert all(not sha256((str(smaller) + "b1l3qy2l9g").encode()).hexdigest().startswith("00") for smaller in range(pin))
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = SingleFlightCache()
+    release = threading.Event()
+    calls = []
+
+    def compute(key):
+        calls.append(key)
+        release.wait(5)
+        return key * 2
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(21, compute))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    #Let every thread reach the cache before the leader finishes
+    while cache.misses + cache.shared < len(threads):
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert calls == [21]
+    assert results == [42] * len(threads)
+    assert (cache.misses, cache.shared, cache.hits) == (1, len(threads) - 1, 0)
+    assert cache.get(21, compute) == 42
+    assert cache.hits == 1
+
+
+def test_evicts_least_recently_used():
+    cache = SingleFlightCache(maxsize=2)
+    cache.get("a", str.upper)
+    cache.get("b", str.upper)
+    cache.get("a", str.upper)       #"b" is now the least recently used
+    cache.get("c", str.upper)
+
+    assert list(cache._results) == ["a", "c"]
+
+
+def test_failures_are_not_cached():
+    cache = SingleFlightCache()
+
+    def fail(key):
+        raise ValueError(key)
+
+    with pytest.raises(ValueError):
+        cache.get("x", fail)
+    assert cache.get("x", str.upper) == "X"
+    assert cache.misses == 2
+
+
+def test_clear_drops_results_of_running_computations():
+    cache = SingleFlightCache()
+    started, release = threading.Event(), threading.Event()
+
+    def slow(key):
+        started.set()
+        release.wait(5)
+        return "stale"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get("k", slow)))
+    leader.start()
+    started.wait(5)
+    cache.clear()
+    release.set()
+    leader.join()
+
+    assert results == ["stale"]
+    assert cache.get("k", lambda key: "fresh") == "fresh"